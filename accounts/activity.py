@@ -0,0 +1,123 @@
+# accounts/activity.py
+"""
+Write-behind last-seen tracking.
+
+Requests only touch an in-process dict: a user is recorded at most once
+per LAST_SEEN_THROTTLE seconds, and the buffer is written with one
+bulk_update when it is older than LAST_SEEN_FLUSH_INTERVAL (by whichever
+request notices), before the admin dashboard counts online users, and at
+exit. UserActivity.last_seen therefore lags real activity by at most the
+sum of the two settings per worker.
+"""
+import atexit
+import time
+from threading import Lock
+
+from django.conf import settings
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.utils import OperationalError, ProgrammingError
+from django.utils.timezone import now
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class LastSeenBuffer:
+    """user_id -> last request time, flushed in bulk."""
+
+    def __init__(self, throttle, flush_interval):
+        self.throttle = throttle
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._recorded = {}  # user_id -> monotonic time of last record
+        self._oldest = None
+        self._lock = Lock()
+
+    def touch(self, user_id):
+        """Record a request by `user_id`; True when a flush is due."""
+        clock = time.monotonic()
+        with self._lock:
+            last = self._recorded.get(user_id)
+            if last is None or clock - last >= self.throttle:
+                self._recorded[user_id] = clock
+                self._pending[user_id] = now()
+                if self._oldest is None:
+                    self._oldest = clock
+            return self._oldest is not None and clock - self._oldest >= self.flush_interval
+
+    def take(self):
+        """Pending {user_id: last_seen}, leaving the buffer empty."""
+        clock = time.monotonic()
+        with self._lock:
+            pending, self._pending, self._oldest = self._pending, {}, None
+            # Forget users idle past the throttle so the map stays small
+            self._recorded = {
+                user_id: last
+                for user_id, last in self._recorded.items()
+                if clock - last < self.throttle
+            }
+        return pending
+
+    def restore(self, pending):
+        """Put back entries a failed flush didn't write."""
+        with self._lock:
+            for user_id, seen in pending.items():
+                self._pending[user_id] = max(seen, self._pending.get(user_id, seen))
+            if self._pending and self._oldest is None:
+                self._oldest = time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+            self._recorded.clear()
+            self._oldest = None
+
+
+last_seen_buffer = LastSeenBuffer(
+    throttle=_setting("LAST_SEEN_THROTTLE", 60),
+    flush_interval=_setting("LAST_SEEN_FLUSH_INTERVAL", 30),
+)
+
+
+def flush_last_seen(buffer=None):
+    """Write buffered timestamps; returns the number of users written."""
+    from django.contrib.auth.models import User
+
+    from .models import UserActivity
+
+    buffer = buffer or last_seen_buffer
+    pending = buffer.take()
+    if not pending:
+        return 0
+
+    try:
+        rows = list(UserActivity.objects.filter(user_id__in=pending).only("id", "user_id"))
+        for row in rows:
+            # Another worker may have flushed a later time already
+            row.last_seen = Greatest(F("last_seen"), pending[row.user_id])
+        UserActivity.objects.bulk_update(rows, ["last_seen"], batch_size=500)
+
+        missing = set(pending) - {row.user_id for row in rows}
+        # Skip users deleted since their request
+        missing = User.objects.filter(pk__in=missing).values_list("pk", flat=True)
+        UserActivity.objects.bulk_create(
+            [UserActivity(user_id=user_id) for user_id in missing],
+            ignore_conflicts=True,
+        )
+    except (OperationalError, ProgrammingError) as e:
+        # Table missing (fresh deploy) or database briefly unavailable
+        print("LAST_SEEN FLUSH ERROR:", e)
+        buffer.restore(pending)
+        return 0
+
+    return len(pending)
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        flush_last_seen()
+    except Exception as e:
+        print("LAST_SEEN FLUSH ERROR:", e)
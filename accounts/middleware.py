@@ -1,32 +1,22 @@
 # accounts/middleware.py
-from django.utils.timezone import now
-from django.db.utils import OperationalError, ProgrammingError
-
-try:
-    from .models import UserActivity
-except Exception:
-    UserActivity = None
+from .activity import flush_last_seen, last_seen_buffer
 
 
 class ActiveUserMiddleware:
+    """
+    Notes when authenticated users were last seen. Only buffers in memory
+    per request; see accounts.activity for how and when it is written.
+    """
+
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
         response = self.get_response(request)
 
-        if (
-            UserActivity
-            and hasattr(request, "user")
-            and request.user.is_authenticated
-        ):
-            try:
-                UserActivity.objects.update_or_create(
-                    user=request.user,
-                    defaults={"last_seen": now()},
-                )
-            except (OperationalError, ProgrammingError) as e:
-                # Happens on Render when table/migrations are missing
-                print("ActiveUserMiddleware skipped:", e)
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            if last_seen_buffer.touch(user.pk):
+                flush_last_seen()
 
         return response
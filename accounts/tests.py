@@ -1,5 +1,14 @@
-from django.test import TestCase
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
+from django.db import connection
+from django.urls import reverse
+from django.utils.timezone import now
+
+from .activity import flush_last_seen, last_seen_buffer
+from .models import UserActivity
 
 
 class AccountsTestCase(TestCase):
@@ -10,3 +19,63 @@ class AccountsTestCase(TestCase):
             password="testpass123"
         )
         self.assertEqual(user.username, "testuser")
+
+
+@override_settings(
+    STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage"
+)
+class LastSeenTestCase(TestCase):
+
+    def setUp(self):
+        last_seen_buffer.clear()
+        self.addCleanup(last_seen_buffer.clear)
+        self.user = User.objects.create_user(username="seen", password="pass12345")
+        UserActivity.objects.filter(user=self.user).update(
+            last_seen=now() - timedelta(hours=1)
+        )
+        self.client.force_login(self.user)
+
+    def _activity_queries(self, path):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(path)
+        return [q for q in ctx.captured_queries if "accounts_useractivity" in q["sql"]]
+
+    def test_requests_only_buffer(self):
+        for _ in range(3):
+            self.assertEqual(self._activity_queries(reverse("transactions:chart_data")), [])
+
+        self.assertEqual(flush_last_seen(), 1)
+        activity = UserActivity.objects.get(user=self.user)
+        self.assertGreater(activity.last_seen, now() - timedelta(minutes=1))
+        # Nothing new to write until the throttle window passes
+        self.assertEqual(flush_last_seen(), 0)
+
+    def test_flush_never_moves_last_seen_back(self):
+        last_seen_buffer.touch(self.user.pk)
+        pending = last_seen_buffer.take()
+        later = now() + timedelta(minutes=1)
+        UserActivity.objects.filter(user=self.user).update(last_seen=later)
+
+        last_seen_buffer.restore(pending)
+        flush_last_seen()
+        self.assertEqual(UserActivity.objects.get(user=self.user).last_seen, later)
+
+    def test_flush_skips_users_deleted_since_their_request(self):
+        gone = User.objects.create_user(username="gone")
+        last_seen_buffer.touch(gone.pk)
+        last_seen_buffer.touch(self.user.pk)
+        gone.delete()
+
+        flush_last_seen()
+        connection.check_constraints()
+        activity = UserActivity.objects.get(user=self.user)
+        self.assertGreater(activity.last_seen, now() - timedelta(minutes=1))
+        self.assertFalse(UserActivity.objects.filter(user_id=gone.pk).exists())
+
+    def test_admin_dashboard_counts_buffered_users(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.client.get(reverse("transactions:chart_data"))
+
+        response = self.client.get(reverse("transactions:admin_dashboard"))
+        self.assertEqual(response.context["online_users"], 1)
@@ -13,4 +13,8 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ai_finance_tracker.settings')
 
+# Sync code runs on a fresh thread per request under ASGI, so persistent
+# (per-thread) connections would pile up instead of being reused
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
+
 application = get_asgi_application()
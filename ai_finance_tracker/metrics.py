@@ -0,0 +1,249 @@
+# ai_finance_tracker/metrics.py
+"""
+Process-local counters and histograms, exported in Prometheus text format
+at /metrics/.
+
+Each worker process keeps its own counts (scrape every worker, or sum
+after scraping); counters only ever go up, so rates graph correctly across
+restarts.
+
+RequestMetricsMiddleware times every request and counts its SQL queries
+and database time per resolved URL name. Queries are seen through an
+execute wrapper installed once on each database connection, which adds a
+contextvar lookup and two clock reads per query, so it stays on in
+production. It works for sync and async views alike, since the per-request
+tally travels in a contextvar into sync_to_async threads.
+"""
+import hmac
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from threading import Lock
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.utils.decorators import sync_and_async_middleware
+
+# Prometheus' default latency buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+_counters = defaultdict(float)
+# key -> [per-bucket counts (last one is +Inf), sum]
+_histograms = {}
+_buckets = {}
+_help = {}
+_lock = Lock()
+
+
+def describe(name, help_text, buckets=None):
+    """Document a metric; passing `buckets` makes it a histogram."""
+    _help[name] = help_text
+    if buckets is not None:
+        _buckets[name] = tuple(sorted(buckets))
+
+
+def inc(name, amount=1, **labels):
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] += amount
+
+
+def observe(name, amount, **labels):
+    """Record one sample in the histogram `name` (see describe)."""
+    buckets = _buckets.get(name, DEFAULT_BUCKETS)
+    slot = bisect_left(buckets, amount)
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        entry = _histograms.get(key)
+        if entry is None:
+            entry = _histograms[key] = [[0] * (len(buckets) + 1), 0.0]
+        entry[0][slot] += 1
+        entry[1] += amount
+
+
+def value(name, **labels):
+    """A counter's value, or a histogram's sample count."""
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        if key in _histograms:
+            return sum(_histograms[key][0])
+        return _counters.get(key, 0)
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def _escape(label_value):
+    return str(label_value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _series(name, labels, extra=()):
+    label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in (*labels, *extra))
+    return f"{name}{{{label_text}}}" if label_text else name
+
+
+def render():
+    with _lock:
+        items = [(key, "counter", count) for key, count in _counters.items()]
+        items += [
+            (key, "histogram", (list(counts), total))
+            for key, (counts, total) in _histograms.items()
+        ]
+    items.sort(key=lambda item: item[0])
+
+    lines = []
+    current = None
+    for (name, labels), kind, data in items:
+        if name != current:
+            current = name
+            if name in _help:
+                lines.append(f"# HELP {name} {_help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        if kind == "counter":
+            lines.append(f"{_series(name, labels)} {data:g}")
+            continue
+
+        counts, total = data
+        cumulative = 0
+        for bound, count in zip((*_buckets.get(name, DEFAULT_BUCKETS), "+Inf"), counts):
+            cumulative += count
+            le = bound if bound == "+Inf" else f"{bound:g}"
+            lines.append(f"{_series(name + '_bucket', labels, [('le', le)])} {cumulative}")
+        lines.append(f"{_series(name + '_sum', labels)} {total:g}")
+        lines.append(f"{_series(name + '_count', labels)} {cumulative}")
+
+    return "\n".join(lines) + "\n"
+
+
+# ======================================================
+# SQL INSTRUMENTATION
+# ======================================================
+class QueryTally:
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+_tally = ContextVar("metrics_query_tally", default=None)
+
+
+def _count_queries(execute, sql, params, many, context):
+    tally = _tally.get()
+    if tally is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        tally.count += 1
+        tally.seconds += time.perf_counter() - started
+
+
+def instrument(connection, **kwargs):
+    if _count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_queries)
+
+
+def _instrument_open_connections():
+    # New connections are covered by the signal; these predate it
+    for connection in connections.all(initialized_only=True):
+        instrument(connection)
+
+
+# ======================================================
+# REQUEST MIDDLEWARE
+# ======================================================
+describe(
+    "http_request_duration_seconds",
+    "Time to produce a response (streamed bodies excluded), by URL name",
+    DEFAULT_BUCKETS,
+)
+describe("http_requests_total", "Responses by URL name and status class")
+describe("http_request_db_queries", "SQL queries per request, by URL name", QUERY_BUCKETS)
+describe(
+    "http_request_db_seconds", "Time spent in SQL per request, by URL name", DEFAULT_BUCKETS
+)
+
+
+def _record(request, response, started, tally):
+    match = getattr(request, "resolver_match", None)
+    view = match.view_name if match else "unmatched"
+    status = f"{response.status_code // 100}xx" if response is not None else "5xx"
+
+    observe("http_request_duration_seconds", time.perf_counter() - started, view=view)
+    observe("http_request_db_queries", tally.count, view=view)
+    observe("http_request_db_seconds", tally.seconds, view=view)
+    inc("http_requests_total", view=view, status=status)
+
+
+@sync_and_async_middleware
+def RequestMetricsMiddleware(get_response):
+    """Latency, query count and DB time per request (see module docstring)."""
+    if not getattr(settings, "METRICS_ENABLED", True):
+        raise MiddlewareNotUsed
+
+    connection_created.connect(instrument, dispatch_uid="metrics-instrument")
+    _instrument_open_connections()
+
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            tally = QueryTally()
+            token = _tally.set(tally)
+            started = time.perf_counter()
+            response = None
+            try:
+                response = await get_response(request)
+                return response
+            finally:
+                _record(request, response, started, tally)
+                _tally.reset(token)
+
+    else:
+
+        def middleware(request):
+            tally = QueryTally()
+            token = _tally.set(tally)
+            started = time.perf_counter()
+            response = None
+            try:
+                response = get_response(request)
+                return response
+            finally:
+                _record(request, response, started, tally)
+                _tally.reset(token)
+
+    return middleware
+
+
+# ======================================================
+# ENDPOINT
+# ======================================================
+def _metrics_response(request):
+    return HttpResponse(render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+_staff_metrics = staff_member_required(_metrics_response)
+
+
+def metrics_view(request):
+    """For staff sessions, or scrapers sending `Authorization: Bearer <METRICS_TOKEN>`."""
+    token = getattr(settings, "METRICS_TOKEN", None)
+    if token and hmac.compare_digest(
+        request.headers.get("Authorization", "").encode(), f"Bearer {token}".encode()
+    ):
+        return _metrics_response(request)
+    return _staff_metrics(request)
@@ -63,6 +63,8 @@ SITE_ID = int(os.getenv("SITE_ID", 1))
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    # Latency / SQL metrics for /metrics/ (static files excluded)
+    "ai_finance_tracker.metrics.RequestMetricsMiddleware",
 
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -98,6 +100,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "ai_finance_tracker.wsgi.application"
 
+# Clears in-process write-behind buffers before the test databases go away
+TEST_RUNNER = "ai_finance_tracker.test_runner.TestRunner"
+
 # =================================================
 # DATABASE
 # =================================================
@@ -113,6 +118,71 @@ DATABASES = {
     )
 }
 
+# Exports stream through QuerySet.iterator(), which uses server-side cursors
+# on PostgreSQL. Behind PgBouncer in transaction-pooling mode they must be off.
+DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = (
+    os.getenv("DB_DISABLE_SERVER_SIDE_CURSORS", "False").lower() in {"1", "true", "yes"}
+)
+
+# Covering indexes (INCLUDE columns) only apply on PostgreSQL; SQLite
+# creates the plain key index, which is fine for local runs.
+SILENCED_SYSTEM_CHECKS = ["models.W040"]
+
+# =================================================
+# CACHE
+# =================================================
+# Insight results and chart PNGs, keyed by each user's data version, so
+# stale entries are never read and simply age out. Redis (needs the
+# `redis` package) is shared by all workers; the file cache survives
+# restarts; otherwise each process keeps a bounded in-memory cache.
+REDIS_URL = os.getenv("REDIS_URL")
+CACHE_DIR = os.getenv("CACHE_DIR")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 5000))
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+            "KEY_PREFIX": "aft",
+        }
+    }
+elif CACHE_DIR:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": CACHE_DIR,
+            "OPTIONS": {"MAX_ENTRIES": CACHE_MAX_ENTRIES, "CULL_FREQUENCY": 4},
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "aft-default",
+            # LRU; a quarter of the entries are evicted when full
+            "OPTIONS": {"MAX_ENTRIES": CACHE_MAX_ENTRIES, "CULL_FREQUENCY": 4},
+        }
+    }
+
+# AI chat replies live in their own namespace and bound, so a burst of
+# questions can't evict insights (and vice versa)
+CACHES["chat"] = {
+    **CACHES["default"],
+    "KEY_PREFIX": "aft-chat",
+    "LOCATION": (
+        REDIS_URL if REDIS_URL
+        else str(Path(CACHE_DIR) / "chat") if CACHE_DIR
+        else "aft-chat"
+    ),
+}
+if not REDIS_URL:
+    CACHES["chat"]["OPTIONS"] = {
+        "MAX_ENTRIES": int(os.getenv("CHAT_CACHE_MAX_ENTRIES", 1000)),
+        "CULL_FREQUENCY": 4,
+    }
+CHAT_CACHE_TIMEOUT = int(os.getenv("CHAT_CACHE_TIMEOUT", 60 * 60))
+
 # =================================================
 # INTERNATIONALIZATION
 # =================================================
@@ -148,6 +218,47 @@ LOGOUT_REDIRECT_URL = "accounts:login"
 # =================================================
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# =================================================
+# AI CATEGORIZER
+# =================================================
+# Versioned model artifacts written by `manage.py train_categorizer`
+CATEGORIZER_MODEL_DIR = Path(os.getenv("CATEGORIZER_MODEL_DIR", BASE_DIR / "var" / "models"))
+
+# =================================================
+# STATEMENT IMPORT
+# =================================================
+# Largest upload the import page accepts (~25k CSV rows, a few seconds);
+# larger statements go through `manage.py import_statement`
+IMPORT_MAX_UPLOAD_BYTES = int(os.getenv("IMPORT_MAX_UPLOAD_BYTES", 1024 * 1024))
+
+# =================================================
+# PDF REPORTS
+# =================================================
+# Rendered reports (see transactions/reports.py); point at shared storage
+# when several machines serve the app
+REPORT_DIR = Path(os.getenv("REPORT_DIR", BASE_DIR / "var" / "reports"))
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", 2))
+
+# =================================================
+# AI CHAT (Groq, see insights/llm.py)
+# =================================================
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+# Override to route through a proxy or a local stub server
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or None
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", 3))
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", 20))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 2))
+# Fail fast for LLM_BREAKER_RESET seconds after this many failed calls in a row
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", 5))
+LLM_BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", 30))
+
+# =================================================
+# METRICS (see ai_finance_tracker/metrics.py)
+# =================================================
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() in {"1", "true", "yes"}
+# Lets a scraper read /metrics/ with "Authorization: Bearer <token>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN") or None
+
 # =================================================
 # LOGGING (CRITICAL FOR RENDER)
 # =================================================
@@ -0,0 +1,16 @@
+# ai_finance_tracker/test_runner.py
+from django.test.runner import DiscoverRunner
+
+from accounts.activity import last_seen_buffer
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Drops last-seen entries buffered by test requests before the test
+    databases go away, so the exit-time flush can't write them into the
+    real database.
+    """
+
+    def teardown_databases(self, old_config, **kwargs):
+        last_seen_buffer.clear()
+        super().teardown_databases(old_config, **kwargs)
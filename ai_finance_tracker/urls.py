@@ -2,10 +2,15 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from .metrics import metrics_view
+
 urlpatterns = [
     # Admin
     path("admin/", admin.site.urls),
 
+    # Prometheus counters (staff only)
+    path("metrics/", metrics_view, name="metrics"),
+
     # Accounts app (register, profile, etc.)
     path("accounts/", include(("accounts.urls", "accounts"), namespace="accounts")),
 
@@ -1,22 +1,186 @@
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
+"""
+Note -> category predictor.
 
-texts = [
+The TF-IDF + LogisticRegression model is trained offline by
+`manage.py train_categorizer` and written to a versioned artifact under
+settings.CATEGORIZER_MODEL_DIR. Nothing is imported or trained at module
+import: the artifact is loaded (numpy arrays memory-mapped) on the first
+prediction. Without an artifact the tiny built-in seed model is trained
+in-process instead, once, and a message says so.
+"""
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+
+from django.conf import settings
+
+SEED_TEXTS = [
     "tea coffee hotel",
     "bus train travel",
     "rent house",
     "salary credit income",
 ]
 
-labels = ["Food", "Travel", "Rent", "Income"]
+SEED_LABELS = ["Food", "Travel", "Rent", "Income"]
+
+DEFAULT_CATEGORY = "Others"
+
+# Categories that carry no label information for training
+UNLABELED_CATEGORIES = {"", "Uncategorized", "Others"}
+
+MODEL_VERSION = 1
+
+_model = None  # {"vectorizer", "model", "source", ...}
+_model_lock = Lock()
+
+# ---- LRU memo of normalized note -> category (merchant strings repeat a lot) ----
+MEMO_SIZE = 4096
+_memo = OrderedDict()
+_memo_lock = Lock()
+
+
+# ======================================================
+# ARTIFACT
+# ======================================================
+def artifact_path(version=MODEL_VERSION):
+    model_dir = Path(getattr(settings, "CATEGORIZER_MODEL_DIR", settings.BASE_DIR / "var" / "models"))
+    return model_dir / f"categorizer-v{version}.joblib"
+
+
+def train_model(texts, labels):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+
+    vectorizer = TfidfVectorizer()
+    X = vectorizer.fit_transform(texts)
+
+    model = LogisticRegression(max_iter=1000)
+    model.fit(X, labels)
+
+    return vectorizer, model
+
+
+def save_artifact(vectorizer, model, samples, path=None):
+    """Write the artifact atomically (uncompressed so it can be mmapped)."""
+    import joblib
+
+    path = Path(path or artifact_path())
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    joblib.dump(
+        {
+            "version": MODEL_VERSION,
+            "trained_at": time.time(),
+            "samples": samples,
+            "vectorizer": vectorizer,
+            "model": model,
+        },
+        tmp,
+    )
+    os.replace(tmp, path)
+    return path
+
+
+def _load_model():
+    path = artifact_path()
+
+    if path.exists():
+        try:
+            import joblib
+
+            artifact = joblib.load(path, mmap_mode="r")
+            if artifact.get("version") == MODEL_VERSION:
+                artifact["source"] = str(path)
+                return artifact
+            print("CATEGORIZER: artifact version mismatch, ignoring", path)
+        except Exception as e:
+            print("CATEGORIZER LOAD ERROR:", e)
+
+    print("CATEGORIZER: no trained artifact, using built-in seed model "
+          "(run `manage.py train_categorizer`)")
+    vectorizer, model = train_model(SEED_TEXTS, SEED_LABELS)
+    return {
+        "version": MODEL_VERSION,
+        "samples": len(SEED_TEXTS),
+        "vectorizer": vectorizer,
+        "model": model,
+        "source": "seed",
+    }
+
+
+def get_model():
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = _load_model()
+    return _model
+
+
+def reload_model():
+    """Drop the loaded model and memo; the next prediction reloads."""
+    global _model
+    with _model_lock:
+        _model = None
+    with _memo_lock:
+        _memo.clear()
+
+
+# ======================================================
+# PREDICTION
+# ======================================================
+def normalize_note(note):
+    return " ".join(str(note or "").lower().split())
+
+
+def _memo_get(key):
+    with _memo_lock:
+        if key in _memo:
+            _memo.move_to_end(key)
+            return _memo[key]
+    return None
+
+
+def _memo_put(key, value):
+    with _memo_lock:
+        _memo[key] = value
+        _memo.move_to_end(key)
+        while len(_memo) > MEMO_SIZE:
+            _memo.popitem(last=False)
+
+
+def predict_categories(notes):
+    """
+    Batch prediction: one vectorizer.transform() / model.predict() pass over
+    every distinct note not already memoized. Returns a list aligned with
+    `notes`.
+    """
+    keys = [normalize_note(note) for note in notes]
+
+    results = {}
+    misses = []
+    for key in dict.fromkeys(keys):
+        if not key:
+            continue
+        cached = _memo_get(key)
+        if cached is None:
+            misses.append(key)
+        else:
+            results[key] = cached
+
+    if misses:
+        loaded = get_model()
+        predicted = loaded["model"].predict(loaded["vectorizer"].transform(misses))
+        for key, label in zip(misses, predicted):
+            label = str(label)
+            results[key] = label
+            _memo_put(key, label)
 
-vectorizer = TfidfVectorizer()
-X = vectorizer.fit_transform(texts)
+    return [results.get(key, DEFAULT_CATEGORY) for key in keys]
 
-model = LogisticRegression()
-model.fit(X, labels)
 
 def predict_category(note):
-    if not note:
-        return "Others"
-    return model.predict(vectorizer.transform([note]))[0]
\ No newline at end of file
+    return predict_categories([note])[0]
@@ -0,0 +1,262 @@
+# insights/benchmark.py
+"""
+Synthetic-load benchmark for the insight functions and the main views.
+
+seed() writes a configurable ledger (users x transactions over recent
+months, plus budgets); run_benchmark() times every target over randomly
+sampled users and reports latency percentiles and query counts per call.
+Insight functions are timed uncached, i.e. the cost of a cache miss;
+views are timed as served. `manage.py benchmark` runs it all against a
+throwaway test database and writes JSON that compare() can diff.
+"""
+import os
+import platform
+import random
+import subprocess
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from insights.ai_engine import predict_category
+from insights.budget_alerts import budget_alerts
+from insights.budget_progress import budget_progress
+from insights.budget_suggest import suggest_budgets
+from insights.health_score import financial_health_score
+from insights.month_compare import month_comparison
+from insights.periods import add_months
+from insights.services import monthly_summary
+from transactions.models import Budget, Transaction
+
+CATEGORIES = [
+    "Food", "Rent", "Travel", "Shopping", "Bills", "Health",
+    "Entertainment", "Education", "Groceries", "Fuel", "Gifts", "Insurance",
+]
+NOTE_WORDS = [
+    "swiggy", "zomato", "uber", "ola", "amazon", "flipkart", "rent", "electricity",
+    "pharmacy", "netflix", "petrol", "grocery", "movie", "school", "flight", "hotel",
+]
+PERCENTILES = (50, 90, 95, 99)
+USER_BATCH = 50
+
+
+def category_names(count):
+    extra = [f"Category {n}" for n in range(len(CATEGORIES) + 1, count + 1)]
+    return (CATEGORIES + extra)[:max(count, 1)]
+
+
+# ======================================================
+# SEEDING
+# ======================================================
+def seed(users=200, transactions=100, budgets=10, months=6, rng=None, progress=None):
+    """
+    Create `users` users (plus one staff user, returned last) with
+    `transactions` ledger rows each, spread over the last `months` months
+    with a monthly salary, and `budgets` budgets each.
+    """
+    rng = rng or random.Random(42)
+    today = date.today()
+    span = months * 30
+    categories = category_names(max(budgets, 8))
+    budget_categories = category_names(budgets) if budgets else []
+
+    stamp = int(time.time())
+    User.objects.bulk_create(
+        [User(username=f"bench-{stamp}-{n}", email=f"bench{n}@example.com") for n in range(users)],
+        batch_size=1000,
+    )
+    seeded = list(User.objects.filter(username__startswith=f"bench-{stamp}-").order_by("id"))
+
+    for start in range(0, len(seeded), USER_BATCH):
+        batch = seeded[start:start + USER_BATCH]
+        rows, limits = [], []
+        for user in batch:
+            for n in range(transactions):
+                if n < months:
+                    # One salary a month keeps income and savings realistic
+                    rows.append(Transaction(
+                        user=user, amount=Decimal(rng.randint(40, 120) * 1000),
+                        category="Salary", transaction_type=Transaction.INCOME,
+                        date=add_months(today.replace(day=1), -n),
+                    ))
+                    continue
+                rows.append(Transaction(
+                    user=user, amount=Decimal(rng.randint(50, 5000)),
+                    category=rng.choice(categories), transaction_type=Transaction.EXPENSE,
+                    date=today - timedelta(days=rng.randrange(span)),
+                ))
+            limits += [
+                Budget(user=user, category=category, limit=Decimal(rng.randint(20, 200) * 100))
+                for category in budget_categories
+            ]
+        Transaction.objects.bulk_create(rows, batch_size=2000)
+        Budget.objects.bulk_create(limits, batch_size=2000)
+        if progress:
+            progress(start + len(batch))
+
+    staff = User.objects.create_user(username=f"bench-{stamp}-staff", is_staff=True)
+    return seeded + [staff]
+
+
+# ======================================================
+# MEASURING
+# ======================================================
+def percentile(ordered, pct):
+    """Nearest-rank percentile of an ascending list."""
+    index = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def summarize(seconds, queries):
+    ordered = sorted(seconds)
+    result = {"n": len(ordered), "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3)}
+    for pct in PERCENTILES:
+        result[f"p{pct}_ms"] = round(percentile(ordered, pct) * 1000, 3)
+    result["max_ms"] = round(ordered[-1] * 1000, 3)
+    result["queries_mean"] = round(sum(queries) / len(queries), 2)
+    result["queries_max"] = max(queries)
+    return result
+
+
+def measure(call, iterations, prepare=None, warmup=1):
+    """
+    Time `call(i)` `iterations` times, after `warmup` untimed calls (model
+    loads, lazy imports). `prepare(i)`, if given, runs first and untimed;
+    its return value is passed to `call` instead of `i`.
+    """
+    for i in range(warmup):
+        call(prepare(i) if prepare else i)
+
+    seconds, queries = [], []
+    for i in range(iterations):
+        arg = prepare(i) if prepare else i
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            call(arg)
+            seconds.append(time.perf_counter() - started)
+        queries.append(len(captured))
+    return summarize(seconds, queries)
+
+
+def _uncached(func):
+    return getattr(func, "uncached", func)
+
+
+def targets(users, staff, rng):
+    """name -> (prepare, call) pairs, each call taking a sampled argument."""
+    pick = lambda i: rng.choice(users)  # noqa: E731
+    client = Client()
+
+    def login_as(user):
+        def prepare(i):
+            client.force_login(user(i) if callable(user) else user)
+            return client
+        return prepare
+
+    def view(name, params=None, login=pick):
+        url = reverse(name)
+        return login_as(login), lambda c: c.get(url, params or {})
+
+    def insight(func):
+        return pick, _uncached(func)
+
+    return {
+        "monthly_summary": insight(monthly_summary),
+        "budget_alerts": insight(budget_alerts),
+        "budget_progress": insight(budget_progress),
+        "financial_health_score": insight(financial_health_score),
+        "month_comparison": insight(month_comparison),
+        "suggest_budgets": insight(suggest_budgets),
+        "predict_category": (
+            lambda i: f"{rng.choice(NOTE_WORDS)} {rng.choice(NOTE_WORDS)} {rng.randrange(10**6)}",
+            predict_category,
+        ),
+        "view:dashboard": view("transactions:dashboard"),
+        "view:all_transactions": view("transactions:all_transactions"),
+        "view:chart_data": view("transactions:chart_data"),
+        "view:budgets_list": view("transactions:budgets_list"),
+        "view:admin_dashboard": view("transactions:admin_dashboard", login=staff),
+        "view:admin_users": view("transactions:admin_users", login=staff),
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "cache": settings.CACHES["default"]["BACKEND"].rsplit(".", 1)[-1],
+        "cpus": os.cpu_count(),
+    }
+
+
+def run_benchmark(
+    users=200, transactions=100, budgets=10, months=6, iterations=50,
+    only=None, rng_seed=42, progress=None,
+):
+    """
+    Seed, then measure every target (or those named in `only`);
+    `progress(name, result)` is called as each target finishes.
+    """
+    rng = random.Random(rng_seed)
+    started = time.perf_counter()
+
+    seeded = seed(users, transactions, budgets, months, rng)
+    seed_seconds = time.perf_counter() - started
+    members, staff = seeded[:-1], seeded[-1]
+
+    results = {}
+    for name, (prepare, call) in targets(members, staff, rng).items():
+        if only and name not in only:
+            continue
+        results[name] = measure(call, iterations, prepare)
+        if progress:
+            progress(name, results[name])
+
+    return {
+        "meta": {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "params": {
+                "users": users, "transactions": transactions, "budgets": budgets,
+                "months": months, "iterations": iterations, "seed": rng_seed,
+            },
+            "seed_seconds": round(seed_seconds, 2),
+            "seconds": round(time.perf_counter() - started, 2),
+            **environment(),
+        },
+        "results": results,
+    }
+
+
+def compare(before, after):
+    """
+    Rows of (target, p50 before, p50 after, p95 before, p95 after,
+    queries before, queries after) for targets present in both runs.
+    """
+    rows = []
+    for name, new in after["results"].items():
+        old = before["results"].get(name)
+        if old is None:
+            continue
+        rows.append((
+            name,
+            old["p50_ms"], new["p50_ms"],
+            old["p95_ms"], new["p95_ms"],
+            old["queries_mean"], new["queries_mean"],
+        ))
+    return rows
@@ -1,31 +1,15 @@
 # insights/budget_alerts.py
 from decimal import Decimal
-from datetime import date
-from django.db.models import Sum
-from transactions.models import Transaction, Budget
+from insights.cache import cached_insight
+from insights.snapshot import MonthSnapshot
 
 
-def budget_alerts(user):
-    today = date.today()
+@cached_insight("budget-alerts")
+def budget_alerts(user, snapshot=None):
+    snapshot = snapshot or MonthSnapshot(user)
     alerts = []
 
-    budgets = Budget.objects.filter(user=user)
-
-    for budget in budgets:
-        spent = (
-            Transaction.objects.filter(
-                user=user,
-                transaction_type="EXPENSE",
-                category__iexact=budget.category.strip(),
-                date__month=today.month,
-                date__year=today.year
-            )
-            .aggregate(total=Sum("amount"))["total"]
-        )
-
-        spent = spent if spent is not None else Decimal("0")
-        limit = budget.limit if budget.limit is not None else Decimal("0")
-
+    for budget, spent, limit in snapshot.budget_usage():
         if limit <= 0:
             continue  # skip invalid budgets
 
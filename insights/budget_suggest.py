@@ -3,8 +3,10 @@ from decimal import Decimal
 from datetime import date, timedelta
 from django.db.models import Avg
 from transactions.models import Transaction
+from insights.cache import cached_insight
 
 
+@cached_insight("budget-suggest")
 def suggest_budgets(user):
     last_3_months = date.today() - timedelta(days=90)
 
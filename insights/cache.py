@@ -0,0 +1,73 @@
+# insights/cache.py
+"""
+Versioned cache for per-user insight results.
+
+Keys embed the user's DataVersion, which every ledger/budget write bumps
+(transactions.signals.data_changed), so a write never has to find and
+delete stale entries: they simply stop being read and age out of the
+bounded cache. The day is part of the key too, because "this month" and
+"the last 90 days" move with the calendar.
+"""
+import hashlib
+from datetime import date
+from functools import wraps
+
+from django.core.cache import cache
+
+from ai_finance_tracker import metrics
+
+INSIGHT_TIMEOUT = 60 * 60 * 6
+
+metrics.describe("insight_cache_hits_total", "Insight results served from cache")
+metrics.describe("insight_cache_misses_total", "Insight results computed and cached")
+
+_MISSING = object()
+
+
+def data_version(user, snapshot=None):
+    if snapshot is not None:
+        return snapshot.data_version
+
+    from transactions.models import DataVersion
+
+    return DataVersion.current(user.pk)
+
+
+def insight_key(name, user, version, day, args=(), kwargs=None):
+    key = f"insight:{name}:{user.pk}:v{version}:{day.isoformat()}"
+    if args or kwargs:
+        raw = repr((args, sorted((kwargs or {}).items())))
+        key += ":" + hashlib.sha1(raw.encode()).hexdigest()[:12]
+    return key
+
+
+def cached_insight(name, timeout=INSIGHT_TIMEOUT):
+    """
+    Cache `func(user, *args, snapshot=None, **kwargs)` per user and data
+    version. A passed MonthSnapshot is forwarded on a miss and also
+    supplies the version, so a page computing several insights looks the
+    version up once.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(user, *args, snapshot=None, **kwargs):
+            day = snapshot.today if snapshot is not None else date.today()
+            key = insight_key(name, user, data_version(user, snapshot), day, args, kwargs)
+
+            result = cache.get(key, _MISSING)
+            if result is not _MISSING:
+                metrics.inc("insight_cache_hits_total", insight=name)
+                return result
+
+            metrics.inc("insight_cache_misses_total", insight=name)
+            if snapshot is not None:
+                kwargs["snapshot"] = snapshot
+            result = func(user, *args, **kwargs)
+            cache.set(key, result, timeout)
+            return result
+
+        wrapper.uncached = func
+        return wrapper
+
+    return decorator
@@ -1,27 +1,71 @@
-import matplotlib
-matplotlib.use("Agg")  # IMPORTANT (no GUI)
+"""
+Server-side chart rendering.
 
-import matplotlib.pyplot as plt
-from django.http import HttpResponse
-from .services import category_breakdown
-from datetime import date
+Uses matplotlib's object-oriented Figure API with an Agg canvas per call:
+no pyplot state machine and no global "current figure", so concurrent
+requests on threaded workers can't draw into each other's charts.
+matplotlib itself is imported on first render, not at startup.
+"""
+from io import BytesIO
 
-def expense_category_chart(request):
-    today = date.today()
-    df = category_breakdown(request.user, today.month, today.year)
 
-    if df.empty:
-        return HttpResponse("No data")
+def render_category_chart(rows):
+    """
+    PNG bytes of an expense-by-category bar chart.
+    rows: iterable of {"category", "total"} dicts (see category_breakdown).
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
 
-    plt.figure(figsize=(6,4))
-    plt.bar(df["category"], df["total"])
-    plt.title("Expense by Category (₹)")
-    plt.xlabel("Category")
-    plt.ylabel("Amount (₹)")
-    plt.tight_layout()
+    rows = list(rows)
+    categories = [row["category"] or "Uncategorized" for row in rows]
+    totals = [float(row["total"]) for row in rows]
 
-    response = HttpResponse(content_type="image/png")
-    plt.savefig(response, format="png")
-    plt.close()
+    fig = Figure(figsize=(6, 4))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
 
-    return response
+    ax.bar(categories, totals, color="#6F4FF2")
+    ax.set_title("Expense by Category (₹)")
+    ax.set_xlabel("Category")
+    ax.set_ylabel("Amount (₹)")
+    ax.tick_params(axis="x", labelrotation=30)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment("right")
+    fig.tight_layout()
+
+    buffer = BytesIO()
+    fig.savefig(buffer, format="png", dpi=120)
+    return buffer.getvalue()
+
+
+def render_monthly_chart(rows):
+    """
+    PNG bytes of a grouped income/expense bar chart, one group per month.
+    rows: iterable of {"month" (date), "income", "expense"} dicts.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    rows = list(rows)
+    positions = range(len(rows))
+    width = 0.4
+
+    fig = Figure(figsize=(6, 4))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+
+    ax.bar([x - width / 2 for x in positions], [float(row["income"]) for row in rows],
+           width, label="Income", color="#16a085")
+    ax.bar([x + width / 2 for x in positions], [float(row["expense"]) for row in rows],
+           width, label="Expense", color="#6F4FF2")
+    ax.set_title("Income vs Expense by Month (₹)")
+    ax.set_ylabel("Amount (₹)")
+    ax.set_xticks(list(positions), [f"{row['month']:%b %y}" for row in rows])
+    ax.tick_params(axis="x", labelrotation=30)
+    ax.legend()
+    fig.tight_layout()
+
+    buffer = BytesIO()
+    fig.savefig(buffer, format="png", dpi=120)
+    return buffer.getvalue()
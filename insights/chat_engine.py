@@ -1,53 +1,62 @@
 # insights/chat_engine.py
+"""
+Finance chat over Groq.
+
+Both entry points are coroutines: the completion is awaited (or streamed)
+through the shared client in insights.llm and the financial context comes
+from the async ORM, so under ASGI a worker holds many open chats on one
+event loop instead of one thread per chat.
 
-import os
+Replies are cached (the "chat" cache) by the normalized question plus a
+fingerprint of the financial context in the prompt, so a repeated
+question costs no model call until the user's numbers change.
+"""
+import hashlib
+import re
 from datetime import date
+
+from django.conf import settings
+from django.core.cache import caches
 from django.db.models import Sum
 from django.db.utils import OperationalError
 
-from groq import Groq
+from ai_finance_tracker import metrics
+from insights import llm
+from transactions.models import MonthlyRollup, Budget
 
-from transactions.models import Transaction, Budget
+metrics.describe("chat_cache_hits_total", "Chat replies served from the reply cache")
+metrics.describe("chat_cache_misses_total", "Chat replies that needed a model call")
 
 
 # ======================================================
-# NON-STREAMING CHAT (SAFE)
+# CONTEXT
 # ======================================================
-def finance_chat(user, message):
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
-        return "⚠️ AI service not configured."
-
-    try:
-        client = Groq(api_key=api_key)
-        today = date.today()
-
-        income = (
-            Transaction.objects.filter(
-                user=user,
-                transaction_type="INCOME",
-                date__month=today.month,
-                date__year=today.year,
-            ).aggregate(total=Sum("amount"))["total"]
-            or 0
-        )
-
-        expense = (
-            Transaction.objects.filter(
-                user=user,
-                transaction_type="EXPENSE",
-                date__month=today.month,
-                date__year=today.year,
-            ).aggregate(total=Sum("amount"))["total"]
-            or 0
-        )
-
-        budgets = list(
-            Budget.objects.filter(user=user)
-            .values("category", "limit")
-        )
-
-        prompt = f"""
+async def _finance_context(user):
+    """(income, expense, budgets) for the current month, from the rollups."""
+    today = date.today()
+
+    totals = {}
+    rows = (
+        MonthlyRollup.objects.filter(user=user, year=today.year, month=today.month)
+        .order_by()
+        .values_list("transaction_type")
+        .annotate(total=Sum("total"))
+    )
+    async for txn_type, total in rows:
+        totals[txn_type] = total
+
+    budgets = [
+        budget
+        async for budget in Budget.objects.filter(user=user)
+        .order_by("category", "id")
+        .values("category", "limit")
+    ]
+    return totals.get("INCOME") or 0, totals.get("EXPENSE") or 0, budgets
+
+
+def _prompt(context, message, closing):
+    income, expense, budgets = context
+    return f"""
 You are a personal finance assistant.
 Use ONLY the data below.
 
@@ -58,17 +67,60 @@ Budgets: {budgets}
 User question:
 {message}
 
-Answer briefly and clearly.
+{closing}
 """
 
-        res = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.4,
-            max_tokens=200,
-        )
 
-        return res.choices[0].message.content.strip()
+# ======================================================
+# REPLY CACHE
+# ======================================================
+def normalize_question(message):
+    """'  How much did I SPEND?? ' -> 'how much did i spend'"""
+    return " ".join(re.findall(r"\w+", (message or "").lower()))
+
+
+def reply_cache_key(mode, message, context):
+    question = hashlib.sha256(normalize_question(message).encode()).hexdigest()[:24]
+    fingerprint = hashlib.sha256(repr(context).encode()).hexdigest()[:24]
+    return f"chat:{mode}:{question}:{fingerprint}"
+
+
+async def _cached_reply(key, mode):
+    reply = await caches["chat"].aget(key)
+    outcome = "hits" if reply is not None else "misses"
+    metrics.inc(f"chat_cache_{outcome}_total", mode=mode)
+    return reply
+
+
+async def _remember_reply(key, reply):
+    await caches["chat"].aset(key, reply, getattr(settings, "CHAT_CACHE_TIMEOUT", 3600))
+
+
+async def _replay(reply):
+    # Word by word, so the client renders it like a live stream
+    for token in re.findall(r"\s*\S+\s*", reply):
+        yield token
+
+
+# ======================================================
+# NON-STREAMING CHAT (SAFE)
+# ======================================================
+async def afinance_chat(user, message):
+    if not llm.configured():
+        return "⚠️ AI service not configured."
+
+    try:
+        context = await _finance_context(user)
+        key = reply_cache_key("chat", message, context)
+        reply = await _cached_reply(key, "chat")
+        if reply is not None:
+            return reply
+
+        prompt = _prompt(context, message, "Answer briefly and clearly.")
+        reply = (await llm.complete(prompt, temperature=0.4, max_tokens=200)).strip()
+        if reply:
+            await _remember_reply(key, reply)
+        return reply
 
     except Exception as e:
         print("GROQ ERROR:", e)
@@ -78,70 +130,30 @@ Answer briefly and clearly.
 # ======================================================
 # STREAMING CHAT (SAFE FOR RENDER)
 # ======================================================
-def finance_chat_stream(user, message):
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
+async def afinance_chat_stream(user, message):
+    if not llm.configured():
         yield "⚠️ AI service not configured."
         return
 
     try:
-        client = Groq(api_key=api_key)
-        today = date.today()
+        context = await _finance_context(user)
+        key = reply_cache_key("stream", message, context)
+        cached = await _cached_reply(key, "stream")
 
-        income = (
-            Transaction.objects.filter(
-                user=user,
-                transaction_type="INCOME",
-                date__month=today.month,
-                date__year=today.year,
-            ).aggregate(total=Sum("amount"))["total"]
-            or 0
-        )
-
-        expense = (
-            Transaction.objects.filter(
-                user=user,
-                transaction_type="EXPENSE",
-                date__month=today.month,
-                date__year=today.year,
-            ).aggregate(total=Sum("amount"))["total"]
-            or 0
-        )
-
-        budgets = list(
-            Budget.objects.filter(user=user)
-            .values("category", "limit")
-        )
-
-        prompt = f"""
-You are a personal finance assistant.
-Use ONLY this data.
-
-Income: ₹{income}
-Expense: ₹{expense}
-Budgets: {budgets}
-
-User question:
-{message}
-
-Give short, clear advice.
-"""
-
-        stream = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.4,
-            max_tokens=200,
-            stream=True,
-        )
+        if cached is not None:
+            tokens = _replay(cached)
+        else:
+            prompt = _prompt(context, message, "Give short, clear advice.")
+            tokens = llm.stream(prompt, temperature=0.4, max_tokens=200)
 
         full_reply = ""
 
-        for chunk in stream:
-            token = chunk.choices[0].delta.content
-            if token:
-                full_reply += token
-                yield token
+        async for token in tokens:
+            full_reply += token
+            yield token
+
+        if cached is None and full_reply.strip():
+            await _remember_reply(key, full_reply)
 
         # --------------------------------------------------
         # SAVE INSIGHT (FAIL-SAFE)
@@ -149,9 +161,9 @@ Give short, clear advice.
         try:
             from insights.models import Insight
 
-            Insight.objects.get_or_create(
+            await Insight.objects.aget_or_create(
                 user=user,
-                date=today,
+                date=date.today(),
                 defaults={"text": full_reply.strip()},
             )
         except OperationalError:
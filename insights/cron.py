@@ -1,21 +1,130 @@
+# insights/cron.py
+"""
+Nightly insight generation for every active user.
+
+Users are walked in id order in chunks. Each chunk costs a fixed handful
+of queries (user ids, data versions, rollups, budgets, one bulk insert)
+whatever its size or the number of budgets, and the per-user work is
+pure Python over MonthSnapshot.for_users. The id range can be split into
+shards and run in parallel processes (or on separate machines).
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import date
+from multiprocessing import get_context
+
+from django.contrib.auth.models import User
+from django.db import connections
+from django.db.models import Max, Min
+
 from insights.budget_alerts import budget_alerts
 from insights.health_score import financial_health_score
-from django.contrib.auth.models import User
-from insights.models import Insight  # create this model
+from insights.models import Insight
+from insights.snapshot import MonthSnapshot
+
+CHUNK_SIZE = 1000
+
+
+def user_messages(user, snapshot):
+    # Uncached: one-off nightly results would only crowd out live ones
+    alerts = budget_alerts.uncached(user, snapshot=snapshot)
+    health = financial_health_score.uncached(user, snapshot=snapshot)
+    return alerts + health.get("messages", [])
+
+
+def id_shards(shards, first_id=None, last_id=None):
+    """Split the active users' id range into `shards` (lo, hi] ranges."""
+    if first_id is None or last_id is None:
+        bounds = User.objects.filter(is_active=True).aggregate(lo=Min("id"), hi=Max("id"))
+        first_id, last_id = bounds["lo"], bounds["hi"]
+    if first_id is None:
+        return []
+
+    lo = first_id - 1
+    span = last_id - lo
+    return [
+        (lo + span * i // shards, lo + span * (i + 1) // shards)
+        for i in range(shards)
+    ]
+
+
+def generate_daily_insights(
+    id_range=None, chunk_size=CHUNK_SIZE, today=None, progress=None
+):
+    """
+    Write today's insight for every active user with something to say,
+    optionally only users with lo < id <= hi. Existing insights for the
+    day are left alone. Returns {"users", "insights", "seconds"}.
+    """
+    today = today or date.today()
+    started = time.perf_counter()
+    stats = {"users": 0, "insights": 0, "seconds": 0.0}
+
+    users = User.objects.filter(is_active=True).only("id").order_by("id")
+    last_id = None
+    if id_range:
+        last_id, hi = id_range
+        users = users.filter(id__lte=hi)
+
+    while True:
+        chunk = users.filter(id__gt=last_id) if last_id is not None else users
+        chunk = list(chunk[:chunk_size])
+        if not chunk:
+            break
+        last_id = chunk[-1].pk
+
+        snapshots = MonthSnapshot.for_users(chunk, today)
+        rows = []
+        for user in chunk:
+            try:
+                messages = user_messages(user, snapshots[user.pk])
+            except Exception as e:
+                print("DAILY INSIGHT ERROR:", user.pk, e)
+                continue
+            if messages:
+                # One insight per user per day (unique constraint)
+                rows.append(Insight(user=user, date=today, text="\n".join(messages)))
+
+        Insight.objects.bulk_create(rows, ignore_conflicts=True)
+
+        stats["users"] += len(chunk)
+        stats["insights"] += len(rows)
+        stats["seconds"] = time.perf_counter() - started
+        if progress:
+            progress(stats)
+
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+def _run_shard(id_range, chunk_size, today):
+    return generate_daily_insights(id_range, chunk_size, today)
 
-def generate_daily_insights():
-    today = date.today()
 
-    for user in User.objects.filter(is_active=True):
-        alerts = budget_alerts(user)
-        health = financial_health_score(user)
+def generate_daily_insights_parallel(workers, chunk_size=CHUNK_SIZE, today=None, progress=None):
+    """
+    Run one shard per worker process; returns the combined stats.
+    `progress(stats)` is called with the running totals as each shard
+    finishes.
+    """
+    today = today or date.today()
+    started = time.perf_counter()
+    shards = id_shards(workers)
+    stats = {"users": 0, "insights": 0, "seconds": 0.0, "shards": len(shards), "done": 0}
 
-        messages = alerts + health.get("messages", [])
+    with ProcessPoolExecutor(len(shards) or 1, mp_context=get_context("fork")) as pool:
+        # Workers fork on the first submit; they must not share the
+        # parent's database sockets
+        connections.close_all()
+        futures = [pool.submit(_run_shard, shard, chunk_size, today) for shard in shards]
+        for future in as_completed(futures):
+            result = future.result()
+            stats["users"] += result["users"]
+            stats["insights"] += result["insights"]
+            stats["done"] += 1
+            stats["seconds"] = time.perf_counter() - started
+            if progress:
+                progress(stats)
 
-        for msg in messages:
-            Insight.objects.get_or_create(
-                user=user,
-                date=today,
-                text=msg
-            )
+    stats["seconds"] = time.perf_counter() - started
+    return stats
@@ -1,23 +1,12 @@
-from django.db.models import Sum
-from datetime import date
-from transactions.models import Transaction, Budget
+from insights.cache import cached_insight
+from insights.snapshot import MonthSnapshot
 
-def financial_health_score(user):
-    today = date.today()
+@cached_insight("health")
+def financial_health_score(user, snapshot=None):
+    snapshot = snapshot or MonthSnapshot(user)
 
-    income = Transaction.objects.filter(
-        user=user,
-        transaction_type="INCOME",
-        date__month=today.month,
-        date__year=today.year
-    ).aggregate(total=Sum("amount"))["total"] or 0
-
-    expense = Transaction.objects.filter(
-        user=user,
-        transaction_type="EXPENSE",
-        date__month=today.month,
-        date__year=today.year
-    ).aggregate(total=Sum("amount"))["total"] or 0
+    income = snapshot.income
+    expense = snapshot.expense
 
     # ---- Savings Rate (40 pts) ----
     savings_rate = 0
@@ -31,19 +20,10 @@ def financial_health_score(user):
     expense_score = max(30 - (expense_ratio * 30), 0)
 
     # ---- Budget Discipline (20 pts) ----
-    budgets = Budget.objects.filter(user=user)
     violations = 0
 
-    for b in budgets:
-        spent = Transaction.objects.filter(
-            user=user,
-            category=b.category,
-            transaction_type="EXPENSE",
-            date__month=today.month,
-            date__year=today.year
-        ).aggregate(total=Sum("amount"))["total"] or 0
-
-        if spent > b.limit:
+    for b, spent, limit in snapshot.budget_usage():
+        if spent > limit:
             violations += 1
 
     budget_score = max(20 - (violations * 5), 0)
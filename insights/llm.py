@@ -0,0 +1,230 @@
+# insights/llm.py
+"""
+Shared Groq client for the chat engine.
+
+- One AsyncGroq per event loop (in practice one per worker), so HTTP
+  connections and TLS sessions are kept alive and reused across messages.
+- Connect/read timeouts on every call.
+- Retries of transient failures (connection errors, timeouts, 429, 5xx)
+  with exponential backoff and full jitter, bounded by LLM_MAX_RETRIES.
+- A circuit breaker: after LLM_BREAKER_THRESHOLD consecutive failed calls
+  it fails fast for LLM_BREAKER_RESET seconds, then lets one trial call
+  through.
+
+GROQ_BASE_URL points the client elsewhere (a proxy or a local stub).
+"""
+import asyncio
+import random
+import time
+import weakref
+from threading import Lock
+
+import groq
+import httpx
+from groq import AsyncGroq
+from django.conf import settings
+
+from ai_finance_tracker import metrics
+
+DEFAULT_MODEL = "llama-3.1-8b-instant"
+
+# Worth retrying, and a sign the upstream is unhealthy
+TRANSIENT_ERRORS = (
+    groq.APIConnectionError,  # includes APITimeoutError
+    groq.RateLimitError,
+    groq.InternalServerError,
+)
+
+# Raised while reading an open stream: a stalled or dropped connection
+# (httpx, not wrapped by the SDK) or an error event from the upstream
+STREAM_ERRORS = (groq.APIError, httpx.TransportError)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class CircuitOpen(Exception):
+    """The upstream is failing; calls are refused until the breaker resets."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a half-open trial call."""
+
+    def __init__(self, threshold, reset_after):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self._trial_at = None
+        self._lock = Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, clock):
+        if self.opened_at is None:
+            return "closed"
+        if clock - self.opened_at >= self.reset_after:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        clock = time.monotonic()
+        with self._lock:
+            state = self._state(clock)
+            # One trial at a time; a trial that never reported (cancelled)
+            # stops blocking others after reset_after
+            trial_running = self._trial_at is not None and clock - self._trial_at < self.reset_after
+            if state == "open" or (state == "half-open" and trial_running):
+                raise CircuitOpen("LLM upstream unavailable")
+            if state == "half-open":
+                self._trial_at = clock
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_at = None
+            if self.opened_at is not None or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+    def reset(self):
+        self.record_success()
+
+
+breaker = CircuitBreaker(
+    threshold=_setting("LLM_BREAKER_THRESHOLD", 5),
+    reset_after=_setting("LLM_BREAKER_RESET", 30),
+)
+
+metrics.describe(
+    "llm_request_duration_seconds", "Groq API attempts by call and outcome", metrics.DEFAULT_BUCKETS
+)
+metrics.describe(
+    "llm_stream_duration_seconds", "Streamed replies, first request to last token",
+    (0.5, 1, 2.5, 5, 10, 20, 30, 60),
+)
+metrics.describe("llm_breaker_rejections_total", "Calls refused while the circuit was open")
+
+# ======================================================
+# CLIENT
+# ======================================================
+# httpx pools are bound to the loop that opened them
+_clients = weakref.WeakKeyDictionary()
+
+
+def configured():
+    return bool(_setting("GROQ_API_KEY", None))
+
+
+def get_client():
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        timeout = httpx.Timeout(
+            _setting("LLM_READ_TIMEOUT", 20.0),
+            connect=_setting("LLM_CONNECT_TIMEOUT", 3.0),
+        )
+        client = AsyncGroq(
+            api_key=_setting("GROQ_API_KEY", None),
+            base_url=_setting("GROQ_BASE_URL", None),
+            timeout=timeout,
+            max_retries=0,  # retried below, where the breaker can see it
+            http_client=groq.DefaultAsyncHttpxClient(
+                timeout=timeout,
+                limits=httpx.Limits(
+                    max_connections=100, max_keepalive_connections=20, keepalive_expiry=60
+                ),
+            ),
+        )
+        _clients[loop] = client
+    return client
+
+
+def reset_clients():
+    """Forget pooled clients (after changing settings, e.g. in tests)."""
+    _clients.clear()
+    breaker.reset()
+
+
+def backoff(attempt):
+    """Full-jitter exponential backoff, in seconds."""
+    base = _setting("LLM_RETRY_BACKOFF", 0.5)
+    return random.uniform(0, base * 2 ** attempt)
+
+
+async def _create(**kwargs):
+    """chat.completions.create with breaker and bounded retries."""
+    try:
+        breaker.before_call()
+    except CircuitOpen:
+        metrics.inc("llm_breaker_rejections_total")
+        raise
+    retries = _setting("LLM_MAX_RETRIES", 2)
+    call = "stream" if kwargs.get("stream") else "complete"
+
+    for attempt in range(retries + 1):
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            res = await get_client().chat.completions.create(**kwargs)
+            breaker.record_success()
+            return res
+        except TRANSIENT_ERRORS:
+            outcome = "transient"
+            if attempt == retries:
+                breaker.record_failure()
+                raise
+        except Exception:
+            # Our request was refused (auth, validation): the upstream is fine
+            outcome = "error"
+            breaker.record_success()
+            raise
+        finally:
+            # For streams this is the time to the response headers
+            metrics.observe(
+                "llm_request_duration_seconds", time.perf_counter() - started,
+                call=call, outcome=outcome,
+            )
+        await asyncio.sleep(backoff(attempt))
+
+
+# ======================================================
+# CALLS
+# ======================================================
+async def complete(prompt, model=DEFAULT_MODEL, **options):
+    res = await _create(
+        model=model, messages=[{"role": "user", "content": prompt}], **options
+    )
+    return res.choices[0].message.content
+
+
+async def stream(prompt, model=DEFAULT_MODEL, **options):
+    """
+    Yield reply tokens. Only opening the stream is retried; a failure
+    mid-reply ends it (already-sent tokens can't be taken back) and
+    counts against the breaker.
+    """
+    started = time.perf_counter()
+    chunks = await _create(
+        model=model, messages=[{"role": "user", "content": prompt}], stream=True, **options
+    )
+    try:
+        async for chunk in chunks:
+            if chunk.choices:
+                token = chunk.choices[0].delta.content
+                if token:
+                    yield token
+    except STREAM_ERRORS:
+        breaker.record_failure()
+        raise
+    finally:
+        metrics.observe("llm_stream_duration_seconds", time.perf_counter() - started)
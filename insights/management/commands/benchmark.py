@@ -0,0 +1,97 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from accounts.activity import last_seen_buffer
+from insights.benchmark import compare, run_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic ledger into a throwaway test database and record "
+        "latency percentiles and query counts of insights and views as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--transactions", type=int, default=100, help="Per user")
+        parser.add_argument("--budgets", type=int, default=10, help="Per user")
+        parser.add_argument("--months", type=int, default=6, help="History to spread rows over")
+        parser.add_argument("--iterations", type=int, default=50, help="Samples per target")
+        parser.add_argument("--only", help="Comma-separated target names")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed")
+        parser.add_argument("--output", help="JSON file (default var/benchmarks/<time>.json)")
+        parser.add_argument("--compare", help="Earlier JSON result to diff against")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["compare"]:
+            try:
+                baseline = json.loads(Path(options["compare"]).read_text())
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read --compare file: {e}")
+
+        only = {name.strip() for name in (options["only"] or "").split(",") if name.strip()}
+
+        # Never seed into the real database
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            result = run_benchmark(
+                users=max(options["users"], 1),
+                transactions=max(options["transactions"], 0),
+                budgets=max(options["budgets"], 0),
+                months=max(options["months"], 1),
+                iterations=max(options["iterations"], 1),
+                only=only or None,
+                rng_seed=options["seed"],
+                progress=self.report_progress,
+            )
+        finally:
+            # Benchmark users' last-seen times must not reach the real database
+            last_seen_buffer.clear()
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        output = Path(
+            options["output"]
+            or Path(settings.BASE_DIR) / "var" / "benchmarks"
+            / f"benchmark-{result['meta']['started'][:19].replace(':', '')}.json"
+        )
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(result, indent=2))
+
+        meta = result["meta"]
+        self.stdout.write(
+            f"✅ Benchmark done in {meta['seconds']:.1f}s "
+            f"(seeding {meta['seed_seconds']:.1f}s), results in {output}"
+        )
+
+        if baseline:
+            self.stdout.write(
+                f"\n{'target':<28}{'p50 ms':>22}{'p95 ms':>22}{'queries':>16}"
+            )
+            for name, p50_old, p50_new, p95_old, p95_new, q_old, q_new in compare(baseline, result):
+                self.stdout.write(
+                    f"{name:<28}{self.change(p50_old, p50_new):>22}"
+                    f"{self.change(p95_old, p95_new):>22}{f'{q_old:g} → {q_new:g}':>16}"
+                )
+
+    def report_progress(self, name, result):
+        self.stdout.write(
+            f"… {name:<28} p50 {result['p50_ms']:>9.2f} ms  p95 {result['p95_ms']:>9.2f} ms  "
+            f"{result['queries_mean']:g} queries"
+        )
+
+    @staticmethod
+    def change(before, after):
+        pct = f" ({(after - before) / before:+.0%})" if before else ""
+        return f"{before:.1f} → {after:.1f}{pct}"
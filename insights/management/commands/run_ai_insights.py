@@ -1,9 +1,71 @@
-from django.core.management.base import BaseCommand
-from insights.cron import generate_daily_insights
+from django.core.management.base import BaseCommand, CommandError
+
+from insights.cron import (
+    CHUNK_SIZE,
+    generate_daily_insights,
+    generate_daily_insights_parallel,
+    id_shards,
+)
+
 
 class Command(BaseCommand):
     help = "Generate daily AI insights"
 
-    def handle(self, *args, **kwargs):
-        generate_daily_insights()
-        self.stdout.write("✅ AI insights generated")
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Split users by id range across this many processes",
+        )
+        parser.add_argument(
+            "--shard",
+            help="Only run shard K of N (e.g. 2/4), to spread the job over machines",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = max(options["chunk_size"], 1)
+
+        if options["shard"]:
+            try:
+                index, count = (int(part) for part in options["shard"].split("/"))
+                if not 1 <= index <= count:
+                    raise ValueError
+            except ValueError:
+                raise CommandError("--shard must look like K/N with 1 <= K <= N")
+            shards = id_shards(count)
+            if not shards:
+                self.stdout.write("✅ No active users")
+                return
+            stats = generate_daily_insights(
+                shards[index - 1], chunk_size, progress=self.report_progress
+            )
+        elif options["workers"] > 1:
+            stats = generate_daily_insights_parallel(
+                options["workers"], chunk_size, progress=self.report_shard
+            )
+        else:
+            stats = generate_daily_insights(chunk_size=chunk_size, progress=self.report_progress)
+
+        self.stdout.write(
+            f"✅ AI insights generated: {stats['insights']} insights for "
+            f"{stats['users']} users in {stats['seconds']:.1f}s "
+            f"({self.rate(stats):.0f} users/s)"
+        )
+
+    def report_progress(self, stats):
+        self.stdout.write(
+            f"… {stats['users']} users, {stats['insights']} insights "
+            f"({self.rate(stats):.0f} users/s)"
+        )
+
+    def report_shard(self, stats):
+        self.stdout.write(
+            f"… shard {stats['done']}/{stats['shards']} done: {stats['users']} users, "
+            f"{stats['insights']} insights ({self.rate(stats):.0f} users/s)"
+        )
+
+    @staticmethod
+    def rate(stats):
+        return stats["users"] / stats["seconds"] if stats["seconds"] else 0
@@ -0,0 +1,79 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from insights import ai_engine, personal_models
+from transactions.models import Transaction
+
+
+class Command(BaseCommand):
+    help = "Train the note categorizer and write a versioned model artifact"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=200_000,
+            help="Maximum number of labeled transactions to train on",
+        )
+        parser.add_argument(
+            "--seed-only",
+            action="store_true",
+            help="Train on the built-in seed examples only",
+        )
+        parser.add_argument(
+            "--per-user",
+            action="store_true",
+            help="Also train personal models for users with enough labels",
+        )
+        parser.add_argument(
+            "--output",
+            help="Artifact path (defaults to CATEGORIZER_MODEL_DIR)",
+        )
+
+    def handle(self, *args, **options):
+        texts = list(ai_engine.SEED_TEXTS)
+        labels = list(ai_engine.SEED_LABELS)
+
+        if not options["seed_only"]:
+            rows = (
+                Transaction.objects.user_labeled()
+                .order_by("-id")
+                .values_list("note", "category")[: options["limit"]]
+            )
+            for note, category in rows.iterator(chunk_size=5000):
+                texts.append(ai_engine.normalize_note(note))
+                labels.append(category)
+
+        if len(set(labels)) < 2:
+            self.stderr.write("❌ Need at least two categories to train")
+            return
+
+        vectorizer, model = ai_engine.train_model(texts, labels)
+        path = ai_engine.save_artifact(vectorizer, model, len(texts), options["output"])
+
+        self.stdout.write(
+            f"✅ Categorizer v{ai_engine.MODEL_VERSION} trained on {len(texts)} "
+            f"samples ({len(set(labels))} categories) → {path}"
+        )
+
+        if options["per_user"]:
+            self.train_personal_models()
+
+    def train_personal_models(self):
+        min_labels = personal_models._setting("PERSONAL_MODEL_MIN_LABELS", 20)
+        user_ids = (
+            Transaction.objects.user_labeled()
+            .order_by()
+            .values("user_id")
+            .annotate(labels=Count("id"))
+            .filter(labels__gte=min_labels)
+            .values_list("user_id", flat=True)
+        )
+
+        trained = 0
+        for user_id in user_ids:
+            entry = personal_models.train_user_model(user_id)
+            if entry and entry["model"] is not None:
+                trained += 1
+
+        self.stdout.write(f"✅ Trained {trained} personal categorizers")
@@ -1,27 +1,13 @@
-from django.db.models import Sum
-from transactions.models import Transaction
-from datetime import date
+from insights.cache import cached_insight
+from insights.snapshot import MonthSnapshot
 
 
-def month_comparison(user):
-    today = date.today()
-    curr_month = today.month
-    prev_month = curr_month - 1 or 12
-    prev_year = today.year if curr_month != 1 else today.year - 1
+@cached_insight("month-compare")
+def month_comparison(user, snapshot=None):
+    snapshot = snapshot or MonthSnapshot(user)
 
-    curr_exp = Transaction.objects.filter(
-        user=user,
-        transaction_type="EXPENSE",
-        date__month=curr_month,
-        date__year=today.year
-    ).aggregate(total=Sum("amount"))["total"] or 0
-
-    prev_exp = Transaction.objects.filter(
-        user=user,
-        transaction_type="EXPENSE",
-        date__month=prev_month,
-        date__year=prev_year
-    ).aggregate(total=Sum("amount"))["total"] or 0
+    curr_exp = snapshot.expense
+    prev_exp = snapshot.prev_expense
 
     if prev_exp == 0:
         return {
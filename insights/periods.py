@@ -0,0 +1,32 @@
+# insights/periods.py
+"""
+Half-open date windows for month-based queries.
+
+Filtering with date__gte/date__lt keeps the date column bare so the
+(user, date) and (user, transaction_type, date) indexes can be range-scanned;
+date__month/date__year compile to EXTRACT(...) on PostgreSQL and can't.
+"""
+from datetime import date
+
+
+def month_start(day=None):
+    return (day or date.today()).replace(day=1)
+
+
+def add_months(day, months):
+    """First day of the month `months` away from `day`'s month."""
+    index = day.year * 12 + (day.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_window(year=None, month=None):
+    """(start, end) of a calendar month, end exclusive."""
+    today = date.today()
+    start = date(year or today.year, month or today.month, 1)
+    return start, add_months(start, 1)
+
+
+def month_filter(year=None, month=None, field="date"):
+    """Queryset kwargs selecting one calendar month of `field`."""
+    start, end = month_window(year, month)
+    return {f"{field}__gte": start, f"{field}__lt": end}
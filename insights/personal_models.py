@@ -0,0 +1,223 @@
+"""
+Per-user categorizers trained on each user's own labeled transactions.
+
+Models live in a bounded in-process LRU (evicted by estimated memory, not
+entry count) backed by per-user artifacts next to the global one. The save
+path only ever does a dict lookup: missing models are loaded from disk or
+trained on a background thread, and users without enough labels fall back
+to the global model in insights.ai_engine.
+"""
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from threading import Lock
+
+from django.conf import settings
+
+from insights import ai_engine
+
+# Re-check disk for users without a model at most this often (seconds)
+NEGATIVE_TTL = 300
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def user_artifact_path(user_id):
+    return (
+        Path(ai_engine.artifact_path()).parent
+        / "users"
+        / f"user-{user_id}-v{ai_engine.MODEL_VERSION}.joblib"
+    )
+
+
+def estimate_bytes(vectorizer, model):
+    """Rough resident size of a fitted TF-IDF + linear model pair."""
+    size = 0
+    for array in (
+        getattr(model, "coef_", None),
+        getattr(model, "intercept_", None),
+        getattr(vectorizer, "idf_", None),
+    ):
+        size += getattr(array, "nbytes", 0)
+    # vocabulary_ is a plain dict of term -> column
+    size += len(getattr(vectorizer, "vocabulary_", {})) * 100
+    return size
+
+
+class ModelCache:
+    """LRU of user_id -> entry, bounded by the sum of entry sizes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or (entry["model"] is None and entry["expires"] < time.monotonic()):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry
+
+    def put(self, user_id, vectorizer=None, model=None):
+        size = estimate_bytes(vectorizer, model) if model is not None else 64
+        entry = {
+            "vectorizer": vectorizer,
+            "model": model,
+            "bytes": size,
+            "expires": time.monotonic() + NEGATIVE_TTL,
+        }
+        with self._lock:
+            old = self._entries.pop(user_id, None)
+            if old:
+                self.total_bytes -= old["bytes"]
+            self._entries[user_id] = entry
+            self.total_bytes += size
+
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= evicted["bytes"]
+                self.evictions += 1
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+model_cache = ModelCache(_setting("PERSONAL_MODEL_CACHE_BYTES", 64 * 1024 * 1024))
+
+# New labels seen per user since their model was last (re)trained
+_new_labels = Counter()
+_pending = set()
+_state_lock = Lock()
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="personal-model")
+
+
+# ======================================================
+# TRAINING
+# ======================================================
+def train_user_model(user_id):
+    """
+    Train and persist one user's model and return its cache entry. Users
+    without enough labeled history get a negative entry (model=None).
+    """
+    from transactions.models import Transaction
+
+    rows = list(
+        Transaction.objects.filter(user_id=user_id)
+        .user_labeled()
+        .order_by("-id")
+        .values_list("note", "category")[: _setting("PERSONAL_MODEL_MAX_SAMPLES", 20_000)]
+    )
+
+    texts = [ai_engine.normalize_note(note) for note, _ in rows]
+    labels = [category for _, category in rows]
+
+    if len(rows) < _setting("PERSONAL_MODEL_MIN_LABELS", 20) or len(set(labels)) < 2:
+        return model_cache.put(user_id)
+
+    vectorizer, model = ai_engine.train_model(texts, labels)
+    ai_engine.save_artifact(vectorizer, model, len(texts), user_artifact_path(user_id))
+
+    with _state_lock:
+        _new_labels.pop(user_id, None)
+    return model_cache.put(user_id, vectorizer, model)
+
+
+def _train_in_background(user_id):
+    from django.db import connection
+
+    try:
+        train_user_model(user_id)
+    except Exception as e:
+        print("PERSONAL MODEL TRAIN ERROR:", user_id, e)
+    finally:
+        with _state_lock:
+            _pending.discard(user_id)
+        connection.close()
+
+
+def schedule_training(user_id):
+    """Queue a background (re)train once the current DB transaction commits."""
+    from django.db import transaction
+
+    def submit():
+        with _state_lock:
+            if user_id in _pending:
+                return
+            _pending.add(user_id)
+        _executor.submit(_train_in_background, user_id)
+
+    transaction.on_commit(submit)
+
+
+def record_labels(user_id, count=1):
+    """Called when a user sets categories themselves; retrains when enough pile up."""
+    with _state_lock:
+        _new_labels[user_id] += count
+        due = _new_labels[user_id] >= _setting("PERSONAL_MODEL_RETRAIN_AFTER", 25)
+    if due:
+        schedule_training(user_id)
+
+
+# ======================================================
+# PREDICTION
+# ======================================================
+def _load_user_model(user_id):
+    path = user_artifact_path(user_id)
+    if path.exists():
+        try:
+            import joblib
+
+            artifact = joblib.load(path, mmap_mode="r")
+            if artifact.get("version") == ai_engine.MODEL_VERSION:
+                return model_cache.put(user_id, artifact["vectorizer"], artifact["model"])
+        except Exception as e:
+            print("PERSONAL MODEL LOAD ERROR:", user_id, e)
+
+    # Nothing usable on disk: fall back for now, train off the request path
+    schedule_training(user_id)
+    return model_cache.put(user_id)
+
+
+def predict_categories_for_user(user_id, notes):
+    entry = model_cache.get(user_id) if user_id else None
+    if entry is None and user_id:
+        entry = _load_user_model(user_id)
+
+    if not entry or entry["model"] is None:
+        return ai_engine.predict_categories(notes)
+
+    keys = [ai_engine.normalize_note(note) for note in notes]
+    distinct = [key for key in dict.fromkeys(keys) if key]
+    if not distinct:
+        return [ai_engine.DEFAULT_CATEGORY] * len(keys)
+
+    predicted = dict(zip(
+        distinct,
+        entry["model"].predict(entry["vectorizer"].transform(distinct)),
+    ))
+    return [str(predicted[key]) if key else ai_engine.DEFAULT_CATEGORY for key in keys]
@@ -6,6 +6,9 @@ from django.db.models import Sum
 # Import Insight and budget_alerts at module level (these are local to insights)
 from .models import Insight
 from .budget_alerts import budget_alerts
+from .cache import cached_insight
+from .snapshot import MonthSnapshot
+from .periods import month_filter
 
 
 def _safe_aggregate(queryset, field="amount"):
@@ -20,34 +23,23 @@ def _safe_aggregate(queryset, field="amount"):
         return 0
 
 
-def monthly_summary(user, month=None, year=None):
+@cached_insight("monthly-summary")
+def monthly_summary(user, month=None, year=None, snapshot=None):
     """
     Basic monthly finance summary (₹ INR)
     Returns a dict with income, expense, savings and insights.
+    Pass a MonthSnapshot for the same month to reuse its totals.
     """
     today = date.today()
     month = month or today.month
     year = year or today.year
 
-    try:
-        # import Transaction here to avoid potential circular imports
-        from transactions.models import Transaction
-
-        income_qs = Transaction.objects.filter(
-            user=user,
-            transaction_type="INCOME",
-            date__month=month,
-            date__year=year,
-        )
-        expense_qs = Transaction.objects.filter(
-            user=user,
-            transaction_type="EXPENSE",
-            date__month=month,
-            date__year=year,
-        )
+    if snapshot is None or (snapshot.month, snapshot.year) != (month, year):
+        snapshot = MonthSnapshot(user, date(year, month, 1))
 
-        income = _safe_aggregate(income_qs)
-        expense = _safe_aggregate(expense_qs)
+    try:
+        income = snapshot.income
+        expense = snapshot.expense
 
     except Exception as e:
         print("MONTHLY_SUMMARY DB ERROR:", e)
@@ -86,17 +78,16 @@ def category_breakdown(user, month=None, year=None):
     year = year or today.year
 
     try:
-        from transactions.models import Transaction
+        from transactions.models import MonthlyRollup
 
         return (
-            Transaction.objects.filter(
+            MonthlyRollup.objects.filter(
                 user=user,
                 transaction_type="EXPENSE",
-                date__month=month,
-                date__year=year,
+                year=year,
+                month=month,
             )
-            .values("category")
-            .annotate(total=Sum("amount"))
+            .values("category", "total")
         )
     except Exception as e:
         print("CATEGORY_BREAKDOWN ERROR:", e)
@@ -118,16 +109,14 @@ def advanced_monthly_insights(user):
             Transaction.objects.filter(
                 user=user,
                 transaction_type="INCOME",
-                date__month=curr_month,
-                date__year=curr_year,
+                **month_filter(curr_year, curr_month),
             )
         )
         expense = _safe_aggregate(
             Transaction.objects.filter(
                 user=user,
                 transaction_type="EXPENSE",
-                date__month=curr_month,
-                date__year=curr_year,
+                **month_filter(curr_year, curr_month),
             )
         )
     except Exception as e:
@@ -0,0 +1,177 @@
+# insights/snapshot.py
+from decimal import Decimal
+from datetime import date
+from django.db.models import Q
+
+from insights.periods import add_months, month_start
+
+
+ZERO = Decimal("0")
+
+
+def _category_key(category):
+    # Budgets are matched case-insensitively (category__iexact) everywhere
+    return (category or "").strip().lower()
+
+
+class MonthSnapshot:
+    """
+    Per-request view of a user's ledger for one month and the month before it.
+
+    All transaction totals come from a single query over the user's
+    MonthlyRollup rows (O(categories), independent of ledger size);
+    budgets from one more query.
+    Both are loaded lazily on first access, so the dashboard pays a fixed
+    number of queries no matter how many budgets the user has.
+
+    `data_version` is read before either, so results cached under it
+    (insights.cache) are never older than the version they claim.
+    """
+
+    def __init__(self, user, today=None):
+        self.user = user
+        self.today = today or date.today()
+
+        self.month_start = month_start(self.today)
+        self.next_month_start = add_months(self.month_start, 1)
+        self.prev_month_start = add_months(self.month_start, -1)
+
+        self._totals = None
+        self._budgets = None
+        self._data_version = None
+
+    @property
+    def month(self):
+        return self.month_start.month
+
+    @property
+    def year(self):
+        return self.month_start.year
+
+    @property
+    def data_version(self):
+        return self._ensure_version()
+
+    def _ensure_version(self):
+        """Read the data version once; loaders call this before querying."""
+        if self._data_version is None:
+            from transactions.models import DataVersion
+
+            self._data_version = DataVersion.current(self.user.pk)
+        return self._data_version
+
+    # --------------------------------------------------
+    # LOADERS
+    # --------------------------------------------------
+    def _rollup_rows(self, users):
+        from transactions.models import MonthlyRollup
+
+        prev, curr = self.prev_month_start, self.month_start
+        return (
+            MonthlyRollup.objects.filter(user__in=users)
+            .filter(
+                Q(year=curr.year, month=curr.month)
+                | Q(year=prev.year, month=prev.month)
+            )
+            .values_list("user_id", "year", "month", "transaction_type", "category", "total")
+        )
+
+    def _add_total(self, totals, year, month, txn_type, category, total):
+        curr = self.month_start
+        period = "current" if (year, month) == (curr.year, curr.month) else "previous"
+        bucket = totals.setdefault(
+            (txn_type, _category_key(category)), {"current": ZERO, "previous": ZERO}
+        )
+        bucket[period] += total or ZERO
+
+    def _load_totals(self):
+        self._ensure_version()
+
+        totals = {}
+        for _, *row in self._rollup_rows([self.user]):
+            self._add_total(totals, *row)
+        return totals
+
+    @classmethod
+    def for_users(cls, users, today=None):
+        """
+        {user_id: MonthSnapshot} for many users, fully loaded with three
+        grouped queries (versions, rollups, budgets) instead of three each.
+        """
+        from transactions.models import Budget, DataVersion
+
+        snapshots = {user.pk: cls(user, today) for user in users}
+        if not snapshots:
+            return snapshots
+        ids = list(snapshots)
+
+        versions = dict(
+            DataVersion.objects.filter(user_id__in=ids).values_list("user_id", "version")
+        )
+        for user_id, snapshot in snapshots.items():
+            snapshot._data_version = versions.get(user_id, 0)
+            snapshot._totals = {}
+            snapshot._budgets = []
+
+        sample = next(iter(snapshots.values()))
+        for user_id, *row in sample._rollup_rows(ids):
+            snapshot = snapshots[user_id]
+            snapshot._add_total(snapshot._totals, *row)
+
+        for budget in Budget.objects.filter(user_id__in=ids).order_by("user_id", "id"):
+            snapshots[budget.user_id]._budgets.append(budget)
+
+        return snapshots
+
+    @property
+    def totals(self):
+        if self._totals is None:
+            self._totals = self._load_totals()
+        return self._totals
+
+    @property
+    def budgets(self):
+        if self._budgets is None:
+            from transactions.models import Budget
+
+            self._ensure_version()
+            self._budgets = list(Budget.objects.filter(user=self.user))
+        return self._budgets
+
+    # --------------------------------------------------
+    # ACCESSORS
+    # --------------------------------------------------
+    def total(self, transaction_type, previous=False):
+        period = "previous" if previous else "current"
+        return sum(
+            (
+                bucket[period]
+                for (txn_type, _), bucket in self.totals.items()
+                if txn_type == transaction_type
+            ),
+            ZERO,
+        )
+
+    def spent(self, category, previous=False):
+        """Expense total for one category (case-insensitive)."""
+        period = "previous" if previous else "current"
+        bucket = self.totals.get(("EXPENSE", _category_key(category)))
+        return bucket[period] if bucket else ZERO
+
+    @property
+    def income(self):
+        return self.total("INCOME")
+
+    @property
+    def expense(self):
+        return self.total("EXPENSE")
+
+    @property
+    def prev_expense(self):
+        return self.total("EXPENSE", previous=True)
+
+    def budget_usage(self):
+        """Yields (budget, spent, limit) for every budget of the user."""
+        for budget in self.budgets:
+            limit = budget.limit if budget.limit is not None else ZERO
+            yield budget, self.spent(budget.category), limit
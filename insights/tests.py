@@ -0,0 +1,531 @@
+import json
+import tempfile
+import threading
+import time
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from decimal import Decimal
+
+import groq
+import httpx
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ai_finance_tracker import metrics
+from transactions.models import Transaction, Budget
+from insights.snapshot import MonthSnapshot
+from insights.services import monthly_summary
+from insights.budget_alerts import budget_alerts
+from insights.budget_progress import budget_progress
+from insights.health_score import financial_health_score
+from insights.month_compare import month_comparison
+
+
+class MonthSnapshotTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(username="snap", password="pass12345")
+        self.today = date(2026, 3, 15)
+
+        for category, amount, day in [
+            ("Food", "300.00", date(2026, 3, 2)),
+            ("food", "50.00", date(2026, 3, 9)),
+            ("Travel", "120.00", date(2026, 2, 20)),
+        ]:
+            Transaction.objects.create(
+                user=self.user, amount=Decimal(amount), category=category,
+                transaction_type="EXPENSE", date=day,
+            )
+        Transaction.objects.create(
+            user=self.user, amount=Decimal("1000.00"), category="Salary",
+            transaction_type="INCOME", date=date(2026, 3, 1),
+        )
+
+    def test_totals_for_current_and_previous_month(self):
+        snapshot = MonthSnapshot(self.user, self.today)
+
+        self.assertEqual(snapshot.income, Decimal("1000.00"))
+        self.assertEqual(snapshot.expense, Decimal("350.00"))
+        self.assertEqual(snapshot.prev_expense, Decimal("120.00"))
+        self.assertEqual(snapshot.spent(" FOOD "), Decimal("350.00"))
+
+    def test_insights_share_one_snapshot(self):
+        for i in range(20):
+            Budget.objects.create(user=self.user, category=f"Cat {i}", limit=Decimal("100"))
+
+        snapshot = MonthSnapshot(self.user, self.today)
+        # data version, rollups, budgets
+        with self.assertNumQueries(3):
+            monthly_summary(self.user, 3, 2026, snapshot=snapshot)
+            budget_alerts(self.user, snapshot=snapshot)
+            financial_health_score(self.user, snapshot=snapshot)
+            month_comparison(self.user, snapshot=snapshot)
+            budget_progress(self.user, snapshot=snapshot)
+
+
+class InsightCacheTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        metrics.reset()
+        self.user = User.objects.create_user(username="cached", password="pass12345")
+        self.today = date(2026, 3, 15)
+        Transaction.objects.create(
+            user=self.user, amount=Decimal("1000.00"), category="Salary",
+            transaction_type="INCOME", date=date(2026, 3, 1),
+        )
+        Budget.objects.create(user=self.user, category="Food", limit=Decimal("100"))
+
+    def _insights(self):
+        snapshot = MonthSnapshot(self.user, self.today)
+        return (
+            budget_alerts(self.user, snapshot=snapshot),
+            financial_health_score(self.user, snapshot=snapshot),
+            budget_progress(self.user, snapshot=snapshot),
+        )
+
+    def test_hits_cost_only_the_version_lookup(self):
+        first = self._insights()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self._insights(), first)
+
+        self.assertEqual(metrics.value("insight_cache_misses_total", insight="health"), 1)
+        self.assertEqual(metrics.value("insight_cache_hits_total", insight="health"), 1)
+        self.assertIn('insight_cache_hits_total{insight="health"} 1', metrics.render())
+
+    def test_writes_invalidate(self):
+        alerts, _, _ = self._insights()
+        self.assertEqual(alerts, [])
+
+        Transaction.objects.create(
+            user=self.user, amount=Decimal("90.00"), category="Food",
+            transaction_type="EXPENSE", date=date(2026, 3, 5),
+        )
+        alerts, _, progress = self._insights()
+        self.assertEqual(len(alerts), 1)
+        self.assertEqual(progress[0]["percent"], 90)
+
+        budget = Budget.objects.get(user=self.user)
+        budget.limit = Decimal("1000")
+        budget.save()
+        self.assertEqual(self._insights()[0], [])
+
+    def test_cache_is_per_user(self):
+        other = User.objects.create_user(username="other", password="pass12345")
+        self._insights()
+        self.assertEqual(budget_progress(other, snapshot=MonthSnapshot(other, self.today)), [])
+
+
+@override_settings(
+    STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage"
+)
+class DashboardQueryCountTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(username="dash", password="pass12345")
+        self.client.force_login(self.user)
+
+    def _dashboard_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("transactions:dashboard"))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_budgets(self):
+        Budget.objects.create(user=self.user, category="Food", limit=Decimal("100"))
+        baseline = self._dashboard_queries()
+
+        for i in range(20):
+            Budget.objects.create(user=self.user, category=f"Cat {i}", limit=Decimal("100"))
+
+        self.assertEqual(self._dashboard_queries(), baseline)
+
+
+class PredictCategoriesTestCase(TestCase):
+
+    def setUp(self):
+        # No artifact in an empty model dir -> built-in seed model
+        from insights import ai_engine
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        overrides = self.settings(CATEGORIZER_MODEL_DIR=tmp.name)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        ai_engine.reload_model()
+        self.addCleanup(ai_engine.reload_model)
+
+    def test_batch_is_aligned_and_memoized(self):
+        from unittest import mock
+        from insights import ai_engine
+
+        notes = ["Tea coffee", "", "  tea   COFFEE ", "bus to office"]
+        self.assertEqual(
+            ai_engine.predict_categories(notes),
+            ["Food", ai_engine.DEFAULT_CATEGORY, "Food", "Travel"],
+        )
+
+        # Every normalized note is memoized – no second vectorizer pass
+        vectorizer = ai_engine.get_model()["vectorizer"]
+        with mock.patch.object(vectorizer, "transform") as transform:
+            self.assertEqual(ai_engine.predict_category("TEA coffee"), "Food")
+            transform.assert_not_called()
+
+    def test_trained_artifact_is_loaded_lazily(self):
+        from django.core.management import call_command
+        from io import StringIO
+        from insights import ai_engine
+
+        call_command("train_categorizer", "--seed-only", stdout=StringIO())
+        ai_engine.reload_model()
+
+        self.assertEqual(ai_engine.predict_category("train ticket"), "Travel")
+        self.assertEqual(ai_engine.get_model()["source"], str(ai_engine.artifact_path()))
+
+
+class PersonalModelTestCase(TestCase):
+
+    def setUp(self):
+        from insights import ai_engine, personal_models
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        overrides = self.settings(CATEGORIZER_MODEL_DIR=tmp.name)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        ai_engine.reload_model()
+        personal_models.model_cache.clear()
+        self.addCleanup(personal_models.model_cache.clear)
+
+        self.user = User.objects.create_user(username="personal", password="pass12345")
+
+    def test_user_model_overrides_global_model(self):
+        from insights import personal_models
+
+        for i in range(15):
+            Transaction.objects.create(
+                user=self.user, amount=Decimal("5"), category="Coffee Shop",
+                transaction_type="EXPENSE", note=f"blue tokai coffee {i}",
+            )
+            Transaction.objects.create(
+                user=self.user, amount=Decimal("50"), category="Commute",
+                transaction_type="EXPENSE", note=f"metro card topup {i}",
+            )
+
+        # Sparse/unknown users fall back to the global model
+        self.assertEqual(
+            personal_models.predict_categories_for_user(self.user.pk, ["tea coffee"]),
+            ["Food"],
+        )
+
+        entry = personal_models.train_user_model(self.user.pk)
+        self.assertIsNotNone(entry["model"])
+        self.assertEqual(
+            personal_models.predict_categories_for_user(self.user.pk, ["Blue Tokai coffee"]),
+            ["Coffee Shop"],
+        )
+
+    def test_cache_evicts_by_memory(self):
+        from insights.personal_models import ModelCache, estimate_bytes
+        from insights.ai_engine import train_model
+
+        vectorizer, model = train_model(["rent house", "bus train"], ["Rent", "Travel"])
+        size = estimate_bytes(vectorizer, model)
+
+        cache = ModelCache(max_bytes=size * 2)
+        for user_id in range(1, 4):
+            cache.put(user_id, vectorizer, model)
+
+        self.assertIsNone(cache.get(1))
+        self.assertIsNotNone(cache.get(3))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_predicted_categories_are_not_training_labels(self):
+        from insights import personal_models
+
+        txn = Transaction.objects.create(
+            user=self.user, amount=Decimal("5"), transaction_type="EXPENSE",
+            note="tea coffee",
+        )
+        self.assertTrue(txn.category_predicted)
+
+        # Re-saving untouched keeps the flag; a user edit clears it
+        txn.amount = Decimal("6")
+        txn.save()
+        txn.refresh_from_db()
+        self.assertTrue(txn.category_predicted)
+
+        # Also when loaded without the rollup fields
+        partial = Transaction.objects.only("user", "category", "amount", "note").get(pk=txn.pk)
+        partial.amount = Decimal("7")
+        partial.save()
+        txn.refresh_from_db()
+        self.assertTrue(txn.category_predicted)
+
+        txn.category = "Snacks"
+        txn.save()
+        txn.refresh_from_db()
+        self.assertFalse(txn.category_predicted)
+
+        for i in range(25):
+            Transaction.objects.create(
+                user=self.user, amount=Decimal("5"), transaction_type="EXPENSE",
+                note=f"bus ride {i}",
+            )
+        entry = personal_models.train_user_model(self.user.pk)
+        self.assertIsNone(entry["model"])
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    """OpenAI-style chat endpoint replaying `script` (one entry per request)."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive
+    script = []
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        type(self).requests.append(self.client_address)
+        action = type(self).script.pop(0) if type(self).script else "ok"
+
+        if action == "slow":
+            time.sleep(1)
+        if action == "error":
+            return self._send(500, "application/json", b'{"error": {"message": "boom"}}')
+
+        if body.get("stream"):
+            events = [
+                "data: " + json.dumps({
+                    "id": "1", "object": "chat.completion.chunk", "created": 0, "model": "m",
+                    "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+                }) + "\n\n"
+                for token in ["Save", " more"]
+            ] + ["data: [DONE]\n\n"]
+            payload = "".join(events).encode()
+            if action == "stall":
+                # First token, then nothing until the client gives up
+                return self._send(200, "text/event-stream", payload, stall_after=len(events[0]))
+            return self._send(200, "text/event-stream", payload)
+
+        reply = {
+            "id": "1", "object": "chat.completion", "created": 0, "model": "m",
+            "choices": [{
+                "index": 0, "finish_reason": "stop",
+                "message": {"role": "assistant", "content": "Save more"},
+            }],
+        }
+        self._send(200, "application/json", json.dumps(reply).encode())
+
+    def _send(self, status, content_type, payload, stall_after=None):
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            if stall_after is not None:
+                self.wfile.write(payload[:stall_after])
+                self.wfile.flush()
+                time.sleep(1)
+                payload = payload[stall_after:]
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client timed out and hung up (the "slow"/"stall" actions)
+            self.close_connection = True
+
+
+class LLMClientTestCase(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubLLMHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        from insights import llm
+
+        self.llm = llm
+        StubLLMHandler.script = []
+        StubLLMHandler.requests = []
+
+        settings = override_settings(
+            GROQ_API_KEY="test",
+            GROQ_BASE_URL=f"http://127.0.0.1:{self.server.server_port}",
+            LLM_READ_TIMEOUT=0.3,
+            LLM_MAX_RETRIES=2,
+            LLM_RETRY_BACKOFF=0.01,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        llm.reset_clients()
+        self.addCleanup(llm.reset_clients)
+
+    async def test_connections_are_reused(self):
+        for _ in range(3):
+            self.assertEqual(await self.llm.complete("hi"), "Save more")
+        tokens = [token async for token in self.llm.stream("hi")]
+        self.assertEqual(tokens, ["Save", " more"])
+        # Every request came over the same keep-alive connection
+        self.assertEqual(len(set(StubLLMHandler.requests)), 1)
+
+    async def test_transient_failures_are_retried(self):
+        metrics.reset()
+        StubLLMHandler.script = ["error", "slow"]
+        self.assertEqual(await self.llm.complete("hi"), "Save more")
+        self.assertEqual(len(StubLLMHandler.requests), 3)
+        # Every attempt is timed
+        attempts = {
+            outcome: metrics.value("llm_request_duration_seconds", call="complete", outcome=outcome)
+            for outcome in ("ok", "transient")
+        }
+        self.assertEqual(attempts, {"ok": 1, "transient": 2})
+
+        StubLLMHandler.script = ["error"] * 3
+        with self.assertRaises(groq.InternalServerError):
+            await self.llm.complete("hi")
+        self.assertEqual(len(StubLLMHandler.requests), 6)
+
+    async def test_breaker_fails_fast_then_recovers(self):
+        breaker = self.llm.breaker
+        StubLLMHandler.script = ["error"] * 3 * breaker.threshold
+        for _ in range(breaker.threshold):
+            with self.assertRaises(groq.InternalServerError):
+                await self.llm.complete("hi")
+        sent = len(StubLLMHandler.requests)
+
+        with self.assertRaises(self.llm.CircuitOpen):
+            await self.llm.complete("hi")
+        self.assertEqual(len(StubLLMHandler.requests), sent)
+
+        # After the reset window one trial call goes through and closes it
+        breaker.opened_at -= breaker.reset_after
+        self.assertEqual(await self.llm.complete("hi"), "Save more")
+        self.assertEqual(breaker.state, "closed")
+
+    async def test_stream_failing_mid_reply_counts_against_breaker(self):
+        StubLLMHandler.script = ["stall"]
+        tokens = []
+        with self.assertRaises(httpx.ReadTimeout):
+            async for token in self.llm.stream("hi"):
+                tokens.append(token)
+        self.assertEqual(tokens, ["Save"])
+        self.assertEqual(self.llm.breaker.failures, 1)
+
+
+class DailyInsightsTestCase(TestCase):
+
+    def setUp(self):
+        self.today = date(2026, 3, 15)
+
+    def _user_over_budget(self, name, budgets=2):
+        user = User.objects.create_user(username=name)
+        for i in range(budgets):
+            Budget.objects.create(user=user, category=f"Cat {i}", limit=Decimal("100"))
+            Transaction.objects.create(
+                user=user, amount=Decimal("95.00"), category=f"cat {i}",
+                transaction_type="EXPENSE", date=date(2026, 3, 2),
+            )
+        return user
+
+    def test_batch_snapshots_match_single_user_snapshots(self):
+        from insights.cron import user_messages
+
+        users = [self._user_over_budget(f"u{i}", budgets=i) for i in range(3)]
+        for user in users:
+            Transaction.objects.create(
+                user=user, amount=Decimal("500.00"), category="Salary",
+                transaction_type="INCOME", date=date(2026, 2, 1),
+            )
+
+        batch = MonthSnapshot.for_users(users, self.today)
+        for user in users:
+            single = MonthSnapshot(user, self.today)
+            self.assertEqual(batch[user.pk].totals, single.totals)
+            self.assertEqual(batch[user.pk].budgets, single.budgets)
+            self.assertEqual(batch[user.pk].data_version, single.data_version)
+            self.assertEqual(
+                user_messages(user, batch[user.pk]), budget_alerts.uncached(user, snapshot=single)
+            )
+
+    def test_query_count_is_per_chunk_not_per_user(self):
+        from insights.cron import generate_daily_insights
+        from insights.models import Insight
+
+        for i in range(3):
+            self._user_over_budget(f"few{i}")
+        with CaptureQueriesContext(connection) as few:
+            generate_daily_insights(today=self.today)
+
+        Insight.objects.all().delete()
+        for i in range(20):
+            self._user_over_budget(f"many{i}", budgets=4)
+        with CaptureQueriesContext(connection) as many:
+            stats = generate_daily_insights(today=self.today)
+
+        self.assertEqual(len(many.captured_queries), len(few.captured_queries))
+        self.assertEqual(stats["users"], 23)
+        self.assertEqual(Insight.objects.count(), 23)
+
+        text = Insight.objects.get(user__username="many0").text
+        self.assertEqual(len(text.splitlines()), 4)
+
+    def test_shards_cover_every_user_once_and_reruns_are_harmless(self):
+        from insights.cron import generate_daily_insights, id_shards
+        from insights.models import Insight
+
+        for i in range(7):
+            self._user_over_budget(f"s{i}", budgets=1)
+
+        shards = id_shards(3)
+        totals = [generate_daily_insights(shard, chunk_size=2, today=self.today) for shard in shards]
+        self.assertEqual(sum(stats["users"] for stats in totals), 7)
+
+        generate_daily_insights(today=self.today)
+        self.assertEqual(Insight.objects.filter(date=self.today).count(), 7)
+
+
+@override_settings(
+    STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage"
+)
+class BenchmarkTestCase(TestCase):
+
+    def test_seeds_and_reports_every_target(self):
+        from transactions.models import Budget, Transaction
+        from .benchmark import compare, percentile, run_benchmark
+
+        result = run_benchmark(users=3, transactions=8, budgets=2, iterations=3)
+
+        self.assertEqual(Transaction.objects.count(), 24)
+        self.assertEqual(Budget.objects.count(), 6)
+        self.assertIn("view:admin_users", result["results"])
+        for name, stats in result["results"].items():
+            self.assertEqual(stats["n"], 3, name)
+            self.assertLessEqual(stats["p50_ms"], stats["p99_ms"], name)
+            self.assertLessEqual(stats["p99_ms"], stats["max_ms"], name)
+        self.assertEqual(result["results"]["predict_category"]["queries_max"], 0)
+        self.assertEqual(result["meta"]["params"]["users"], 3)
+
+        self.assertEqual(percentile([1, 2, 3, 4], 50), 2)
+        self.assertEqual(percentile([1, 2, 3, 4], 99), 4)
+
+        rows = compare(result, {"results": {"budget_alerts": result["results"]["budget_alerts"]}})
+        self.assertEqual([row[0] for row in rows], ["budget_alerts"])
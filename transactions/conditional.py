@@ -0,0 +1,62 @@
+# transactions/conditional.py
+"""
+Conditional GET for per-user data endpoints.
+
+ETag and Last-Modified come from the user's DataVersion (one primary-key
+lookup), so a poll with nothing new is answered 304 Not Modified before
+the view runs any aggregation.
+"""
+import hashlib
+from datetime import date, datetime, time
+
+from django.utils import timezone
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from .models import DataVersion
+
+
+def _month_began():
+    began = datetime.combine(date.today().replace(day=1), time.min)
+    return timezone.make_aware(began) if timezone.is_aware(timezone.now()) else began
+
+
+def data_etag(request, scope, vary_on_query=False):
+    """'<scope>-<user>-<YYYY-MM>-v<version>[-<query hash>]'"""
+    parts = [
+        scope,
+        str(request.user.pk),
+        f"{date.today():%Y-%m}",
+        f"v{DataVersion.for_request(request)}",
+    ]
+    if vary_on_query:
+        parts.append(hashlib.sha1(request.GET.urlencode().encode()).hexdigest()[:12])
+    return "-".join(parts)
+
+
+def user_data_condition(scope, vary_on_query=False):
+    """
+    Decorator for GET views whose output depends only on the user's data
+    (and the current month). Put it under @login_required.
+    """
+
+    def etag_func(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return None
+        return data_etag(request, scope, vary_on_query)
+
+    def last_modified_func(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return None
+        updated_at = DataVersion.state_for_request(request)[1]
+        if updated_at is None:
+            return None
+        # Month-scoped output changes at the rollover even without writes
+        return max(updated_at, _month_began())
+
+    def decorator(view):
+        view = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view)
+        # Clients may keep responses but must revalidate (a cheap 304)
+        return cache_control(private=True, no_cache=True)(view)
+
+    return decorator
@@ -0,0 +1,38 @@
+# transactions/decorators.py
+"""
+Async counterparts of login_required / require_POST.
+
+Django 4.2's versions wrap views in sync functions, which would turn an
+async view back into a thread-bound one (Django 5.0 makes them
+async-aware; drop these after upgrading).
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.http import HttpResponseNotAllowed
+
+
+def _load_user(request):
+    # Evaluates the lazy request.user (a session + user lookup)
+    return request.user.is_authenticated
+
+
+def async_login_required(view):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if not await sync_to_async(_load_user)(request):
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+def async_require_POST(view):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != "POST":
+            return HttpResponseNotAllowed(["POST"])
+        return await view(request, *args, **kwargs)
+
+    return wrapper
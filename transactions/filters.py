@@ -0,0 +1,51 @@
+# transactions/filters.py
+"""
+Query-string filters shared by the transaction list and the exports, so
+an export always contains exactly what the filtered list shows.
+"""
+from urllib.parse import urlencode
+
+from django.utils.dateparse import parse_date
+
+from .models import Transaction
+from .search import search_transactions
+
+FILTER_PARAMS = ("q", "start", "end", "type")
+
+
+def transaction_filters(params):
+    """Cleaned filter values from request.GET; invalid dates/types are dropped."""
+    filters = {name: (params.get(name) or "").strip() for name in FILTER_PARAMS}
+
+    for name in ("start", "end"):
+        try:
+            valid = parse_date(filters[name]) is not None
+        except ValueError:
+            valid = False
+        if not valid:
+            filters[name] = ""
+
+    filters["type"] = filters["type"].upper()
+    if filters["type"] not in dict(Transaction.TYPE_CHOICES):
+        filters["type"] = ""
+
+    return filters
+
+
+def filter_transactions(queryset, filters):
+    if filters.get("q"):
+        queryset = search_transactions(queryset, filters["q"])
+
+    if filters.get("start"):
+        queryset = queryset.filter(date__gte=filters["start"])
+    if filters.get("end"):
+        queryset = queryset.filter(date__lte=filters["end"])
+    if filters.get("type"):
+        queryset = queryset.filter(transaction_type=filters["type"])
+
+    return queryset
+
+
+def filter_querystring(filters):
+    """The active filters as a query string, for pagination/export links."""
+    return urlencode({name: value for name, value in filters.items() if value})
@@ -1,6 +1,8 @@
 from decimal import Decimal
 from django import forms
+from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.template.defaultfilters import filesizeformat
 from django.utils import timezone
 
 from .models import Transaction, Budget
@@ -73,3 +75,38 @@ class BudgetForm(forms.ModelForm):
     def clean_category(self):
         cat = self.cleaned_data.get("category") or ""
         return cat.strip().title()
+
+
+# ============================
+# STATEMENT IMPORT FORM
+# ============================
+class StatementImportForm(forms.Form):
+    FORMAT_CHOICES = [
+        ("", "Detect automatically"),
+        ("csv", "CSV"),
+        ("ofx", "OFX / QFX"),
+    ]
+
+    statement = forms.FileField(
+        widget=forms.ClearableFileInput(attrs={
+            "class": "form-control",
+            "accept": ".csv,.ofx,.qfx,text/csv",
+        })
+    )
+    file_format = forms.ChoiceField(
+        choices=FORMAT_CHOICES,
+        required=False,
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
+
+    def clean_statement(self):
+        # Imports run inside the request; bigger files would outlive the
+        # worker timeout and belong to `manage.py import_statement`
+        statement = self.cleaned_data.get("statement")
+        limit = getattr(settings, "IMPORT_MAX_UPLOAD_BYTES", 1024 * 1024)
+        if statement and statement.size > limit:
+            raise ValidationError(
+                f"Statements up to {filesizeformat(limit)} can be uploaded here. "
+                "Split the file, or ask an admin to import it for you."
+            )
+        return statement
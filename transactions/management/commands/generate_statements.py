@@ -0,0 +1,51 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.reports import parse_month
+from transactions.statements import CHUNK_SIZE, generate_statements
+
+
+class Command(BaseCommand):
+    help = "Render every user's PDF statement for a month; re-run to resume"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--month", required=True, help="Statement month, YYYY-MM")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Rendering processes (default: one per CPU)",
+        )
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        month = parse_month(options["month"], None)
+        if month is None:
+            raise CommandError(f"Invalid --month {options['month']!r}, expected YYYY-MM")
+
+        stats = generate_statements(
+            month,
+            workers=max(options["workers"], 1),
+            chunk_size=max(options["chunk_size"], 1),
+            progress=self.report_progress,
+        )
+
+        self.stdout.write(
+            f"✅ {month:%B %Y} statements: {stats['written']} written, "
+            f"{stats['skipped']} already done, {stats['empty']} without activity; "
+            f"{stats['pages']} pages in {stats['seconds']:.1f}s "
+            f"({self.rate(stats):.1f} pages/s)"
+        )
+        for pid, peak in sorted(stats["peak_memory"].items()):
+            self.stdout.write(f"   worker {pid}: peak {peak / 2**20:.0f} MB")
+
+    def report_progress(self, stats):
+        self.stdout.write(
+            f"… {stats['users']} users, {stats['written']} written "
+            f"({self.rate(stats):.1f} pages/s)"
+        )
+
+    @staticmethod
+    def rate(stats):
+        return stats["pages"] / stats["seconds"] if stats["seconds"] else 0
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+
+from transactions.importers import CHUNK_SIZE, UNREADABLE_ERRORS, ImportRowError, import_statement
+
+
+class Command(BaseCommand):
+    help = "Import a CSV/OFX bank statement for a user"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Statement file (.csv, .ofx, .qfx)")
+        parser.add_argument("--user", required=True, help="Username to import for")
+        parser.add_argument("--format", choices=["csv", "ofx"], help="Override format detection")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"Unknown user {options['user']!r}")
+
+        started = time.perf_counter()
+        try:
+            with open(options["path"], "rb") as stream:
+                stats = import_statement(
+                    user,
+                    stream,
+                    name=options["path"],
+                    fmt=options["format"],
+                    chunk_size=max(options["chunk_size"], 1),
+                )
+        except (OSError, ImportRowError, *UNREADABLE_ERRORS) as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+
+        for error in stats["errors"]:
+            self.stderr.write(f"⚠️ {error}")
+
+        self.stdout.write(
+            f"✅ {stats['created']} added, {stats['skipped']} already imported, "
+            f"{stats['rows']} rows in {elapsed:.1f}s "
+            f"({stats['rows'] / elapsed if elapsed else 0:.0f} rows/s)"
+        )
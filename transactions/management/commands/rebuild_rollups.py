@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from transactions.models import MonthlyRollup, Transaction
+from transactions.rollups import rollups_from
+
+
+class Command(BaseCommand):
+    help = "Rebuild MonthlyRollup totals from the transaction ledger"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Number of users rebuilt per database transaction",
+        )
+        parser.add_argument(
+            "--user",
+            help="Only rebuild the rollups of this username",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = max(options["chunk_size"], 1)
+
+        users = User.objects.order_by("pk")
+        if options["user"]:
+            users = users.filter(username=options["user"])
+        user_ids = list(users.values_list("pk", flat=True))
+
+        rebuilt = 0
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+
+            with transaction.atomic():
+                MonthlyRollup.objects.filter(user_id__in=chunk).delete()
+                rows = MonthlyRollup.objects.bulk_create(
+                    rollups_from(Transaction.objects.filter(user_id__in=chunk)),
+                    batch_size=1000,
+                )
+
+            rebuilt += len(rows)
+            self.stdout.write(
+                f"… {start + len(chunk)}/{len(user_ids)} users, {rebuilt} rollup rows"
+            )
+
+        self.stdout.write(f"✅ Rebuilt {rebuilt} rollup rows for {len(user_ids)} users")
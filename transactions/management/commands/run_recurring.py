@@ -1,18 +1,31 @@
-from django.core.management.base import BaseCommand
+import time
 from datetime import date
-from transactions.models import RecurringTransaction, Transaction
+
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.recurring import CHUNK_SIZE, run_recurring
+
 
 class Command(BaseCommand):
-    def handle(self, *args, **kwargs):
-        today = date.today()
-        recs = RecurringTransaction.objects.filter(day_of_month=today.day)
-
-        for r in recs:
-            Transaction.objects.create(
-                user=r.user,
-                amount=r.amount,
-                category=r.category,
-                transaction_type=r.transaction_type,
-                date=today,
-                note="Auto recurring entry"
-            )
+    help = "Add due (and missed) recurring transactions; safe to re-run"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+        parser.add_argument("--date", help="Run as of this date (YYYY-MM-DD), default today")
+
+    def handle(self, *args, **options):
+        today = None
+        if options["date"]:
+            try:
+                today = date.fromisoformat(options["date"])
+            except ValueError:
+                raise CommandError(f"Invalid --date {options['date']!r}, expected YYYY-MM-DD")
+
+        started = time.perf_counter()
+        stats = run_recurring(today, chunk_size=max(options["chunk_size"], 1))
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"✅ {stats['rows']} recurring entries due across "
+            f"{stats['schedules']} schedules in {elapsed:.1f}s"
+        )
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:15
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('transactions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('transaction_type', models.CharField(choices=[('EXPENSE', 'Expense'), ('INCOME', 'Income')], max_length=10)),
+                ('category', models.CharField(blank=True, max_length=50)),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'date'], name='transaction_user_id_8af7f1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'transaction_type'], name='transaction_user_id_98a6b3_idx'),
+        ),
+        migrations.AddField(
+            model_name='monthlyrollup',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='monthlyrollup',
+            constraint=models.UniqueConstraint(fields=('user', 'year', 'month', 'transaction_type', 'category'), name='unique_monthly_rollup'),
+        ),
+    ]
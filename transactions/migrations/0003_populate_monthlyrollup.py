@@ -0,0 +1,46 @@
+from django.db import migrations
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def populate_rollups(apps, schema_editor):
+    Transaction = apps.get_model("transactions", "Transaction")
+    MonthlyRollup = apps.get_model("transactions", "MonthlyRollup")
+
+    rows = (
+        Transaction.objects.order_by()
+        .annotate(period=TruncMonth("date"))
+        .values("user_id", "period", "transaction_type", "category")
+        .annotate(total=Sum("amount"), count=Count("id"))
+    )
+
+    MonthlyRollup.objects.bulk_create(
+        (
+            MonthlyRollup(
+                user_id=row["user_id"],
+                year=row["period"].year,
+                month=row["period"].month,
+                transaction_type=row["transaction_type"],
+                category=row["category"] or "",
+                total=row["total"] or 0,
+                count=row["count"],
+            )
+            for row in rows.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+def clear_rollups(apps, schema_editor):
+    apps.get_model("transactions", "MonthlyRollup").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("transactions", "0002_monthlyrollup"),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_rollups, clear_rollups),
+    ]
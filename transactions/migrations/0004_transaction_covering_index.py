@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0003_populate_monthlyrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'transaction_type', 'date'], include=('category', 'amount'), name='txn_user_type_date_cov'),
+        ),
+    ]
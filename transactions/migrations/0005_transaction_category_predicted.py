@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0004_transaction_covering_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='category_predicted',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0005_transaction_category_predicted'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='fingerprint',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+        migrations.AddConstraint(
+            model_name='transaction',
+            constraint=models.UniqueConstraint(condition=models.Q(('fingerprint', ''), _negated=True), fields=('user', 'fingerprint'), name='unique_txn_fingerprint_per_user'),
+        ),
+    ]
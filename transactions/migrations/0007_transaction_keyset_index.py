@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0006_transaction_fingerprint'),
+    ]
+
+    operations = [
+        # Build the replacement before dropping the prefix index
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'date', 'id'], name='txn_user_date_id'),
+        ),
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='transaction_user_id_8af7f1_idx',
+        ),
+    ]
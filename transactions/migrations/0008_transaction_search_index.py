@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def install(apps, schema_editor):
+    from transactions.search import install_search_index
+
+    install_search_index(schema_editor.connection)
+
+
+def uninstall(apps, schema_editor):
+    from transactions.search import uninstall_search_index
+
+    uninstall_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+    # Lets PostgreSQL build the GIN indexes CONCURRENTLY
+    atomic = False
+
+    dependencies = [
+        ('transactions', '0007_transaction_keyset_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0009_dataversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recurringtransaction',
+            name='last_run_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:43
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0010_recurringtransaction_last_run_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlatformStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Day'), ('month', 'Month')], max_length=5)),
+                ('start', models.DateField()),
+                ('signups', models.PositiveIntegerField(default=0)),
+                ('active_users', models.PositiveIntegerField(default=0)),
+                ('transactions', models.PositiveIntegerField(default=0)),
+                ('income', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('expense', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+            ],
+            options={
+                'ordering': ['period', 'start'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PlatformTotals',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('users', models.PositiveIntegerField(default=0)),
+                ('transactions', models.PositiveBigIntegerField(default=0)),
+                ('income', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=18)),
+                ('expense', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=18)),
+                ('refreshed_at', models.DateTimeField(null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'platform totals',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['date'], name='txn_date'),
+        ),
+        migrations.AddConstraint(
+            model_name='platformstat',
+            constraint=models.UniqueConstraint(fields=('period', 'start'), name='unique_platform_stat'),
+        ),
+    ]
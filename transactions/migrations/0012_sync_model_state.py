@@ -0,0 +1,97 @@
+# Brings the migration state in line with models that predate the
+# migration history (options, validators, related names, the one-budget-
+# per-category rule). Duplicate budgets are merged first, keeping the most
+# recently created one, so the unique constraint can be added.
+import datetime
+from decimal import Decimal
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def merge_duplicate_budgets(apps, schema_editor):
+    Budget = apps.get_model("transactions", "Budget")
+    duplicates = (
+        Budget.objects.order_by()
+        .values("user_id", "category")
+        .annotate(keep=models.Max("id"), copies=models.Count("id"))
+        .filter(copies__gt=1)
+    )
+    for row in duplicates.iterator():
+        Budget.objects.filter(user_id=row["user_id"], category=row["category"]).exclude(
+            pk=row["keep"]
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('transactions', '0011_platform_stats'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='budget',
+            options={'ordering': ['category']},
+        ),
+        migrations.AlterModelOptions(
+            name='recurringtransaction',
+            options={'ordering': ['user', 'day_of_month']},
+        ),
+        migrations.AlterModelOptions(
+            name='transaction',
+            options={'ordering': ['-date', '-id']},
+        ),
+        migrations.AlterField(
+            model_name='budget',
+            name='limit',
+            field=models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))]),
+        ),
+        migrations.AlterField(
+            model_name='budget',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='budgets', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='recurringtransaction',
+            name='amount',
+            field=models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))]),
+        ),
+        migrations.AlterField(
+            model_name='recurringtransaction',
+            name='day_of_month',
+            field=models.IntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(31)]),
+        ),
+        migrations.AlterField(
+            model_name='recurringtransaction',
+            name='transaction_type',
+            field=models.CharField(choices=[('EXPENSE', 'Expense'), ('INCOME', 'Income')], max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='recurringtransaction',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recurring_transactions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='amount',
+            field=models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))]),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='date',
+            field=models.DateField(default=datetime.date.today),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transactions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(merge_duplicate_budgets, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='budget',
+            unique_together={('user', 'category')},
+        ),
+    ]
@@ -1,8 +1,9 @@
 # transactions/models.py
+from collections import Counter, defaultdict
 from decimal import Decimal
 from datetime import date
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.conf import settings
 from django.utils import timezone
 from django.contrib.auth import get_user_model
@@ -11,11 +12,150 @@ User = get_user_model()
 
 # Try to import the AI category predictor; fall back to a safe stub if unavailable.
 try:
-    from insights.ai_engine import predict_category  # may raise ImportError in some environments
+    # may raise ImportError in some environments
+    from insights.personal_models import predict_categories_for_user, record_labels
+    from insights.ai_engine import UNLABELED_CATEGORIES
 except Exception:
-    def predict_category(text: str) -> str:
+    UNLABELED_CATEGORIES = {"", "Uncategorized", "Others"}
+
+    def predict_categories_for_user(user_id, notes):
         # Safe fallback: don't raise during model save
-        return "Uncategorized"
+        return ["Uncategorized"] * len(notes)
+
+    def record_labels(user_id, count=1):
+        pass
+
+from . import rollups
+from .signals import data_changed
+
+# Fingerprint prefix of rows generated from recurring schedules (see
+# recurring.py): same note every time, so never training data
+RECURRING_FINGERPRINT_PREFIX = "recurring:"
+
+
+def fill_categories(txns):
+    """
+    - Predict categories for every transaction without one, in one batch
+      per user (personal model, or the global one as fallback).
+    - Count user-chosen (new or changed) categories as training labels;
+      predicted ones are flagged so models never train on their own output,
+      and rows generated from recurring schedules aren't labels at all.
+    - Normalize category to Title Case and strip whitespace.
+    - Never raises: predictor failures fall back to "Uncategorized".
+    """
+    missing = defaultdict(list)
+    labeled = Counter()
+    for txn in txns:
+        if not txn.category:
+            missing[txn.user_id].append(txn)
+            continue
+
+        category = str(txn.category).strip().title()
+        if getattr(txn, "_loaded_category", None) == category:
+            continue  # category untouched since it was loaded
+
+        txn.category_predicted = False
+        if txn.fingerprint.startswith(RECURRING_FINGERPRINT_PREFIX):
+            continue
+        if txn.note and category not in UNLABELED_CATEGORIES:
+            labeled[txn.user_id] += 1
+
+    for user_id, user_txns in missing.items():
+        try:
+            predicted = predict_categories_for_user(
+                user_id, [txn.note or "" for txn in user_txns]
+            )
+        except Exception:
+            # If the predictor fails for any reason, fall back safely
+            predicted = [None] * len(user_txns)
+
+        for txn, category in zip(user_txns, predicted):
+            # Ensure we have a non-empty string
+            txn.category = str(category) if category else "Uncategorized"
+            txn.category_predicted = bool(category)
+
+    for user_id, count in labeled.items():
+        try:
+            record_labels(user_id, count)
+        except Exception as e:
+            print("RECORD LABELS ERROR:", e)
+
+    # Normalize category for consistent matching with budgets
+    for txn in txns:
+        try:
+            txn.category = txn.category.strip().title()
+        except Exception:
+            # Defensive fallback if category is not a string
+            txn.category = "Uncategorized"
+
+
+class TransactionQuerySet(models.QuerySet):
+    """
+    Bulk write paths bypass save()/delete(), so they keep MonthlyRollup in
+    sync here, inside the same database transaction.
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        fill_categories(objs)
+        with transaction.atomic(using=self.db):
+            created = super().bulk_create(objs, *args, **kwargs)
+
+            if kwargs.get("ignore_conflicts") or kwargs.get("update_conflicts"):
+                # Inserted rows are unknown – recompute the touched months
+                rollups.rebuild_months({
+                    (txn.user_id, rollups._as_date(txn.date).replace(day=1))
+                    for txn in created
+                })
+            else:
+                rollups.apply_deltas(rollups.deltas_for(
+                    added=[(rollups.bucket_for(txn), txn.amount) for txn in created]
+                ))
+                for txn in created:
+                    txn._rollup_state = (rollups.bucket_for(txn), txn.amount)
+                    txn._loaded_category = txn.category
+
+            data_changed.send(sender=self.model, user_ids={txn.user_id for txn in created})
+
+        return created
+
+    def user_labeled(self):
+        """Rows whose category a user chose for a note: categorizer training data."""
+        return (
+            self.filter(category_predicted=False)
+            .exclude(note="")
+            .exclude(category__in=UNLABELED_CATEGORIES)
+            .exclude(fingerprint__startswith=RECURRING_FINGERPRINT_PREFIX)
+        )
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            deltas = rollups.grouped_deltas(self, sign=-1)
+            result = super().delete()
+            rollups.apply_deltas(deltas)
+            data_changed.send(sender=self.model, user_ids={key[0] for key in deltas})
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def update(self, **kwargs):
+        with transaction.atomic(using=self.db):
+            if not set(kwargs) & {"user", "user_id", "amount", "date", "category", "transaction_type"}:
+                user_ids = set(self.order_by().values_list("user_id", flat=True).distinct())
+                result = super().update(**kwargs)
+            else:
+                pks = list(self.values_list("pk", flat=True))
+                months = rollups.affected_months(self)
+                result = super().update(**kwargs)
+                months |= rollups.affected_months(self.model.objects.filter(pk__in=pks))
+                rollups.rebuild_months(months)
+                user_ids = {user_id for user_id, _ in months}
+
+            data_changed.send(sender=self.model, user_ids=user_ids)
+        return result
+
+    update.alters_data = True
 
 
 class Transaction(models.Model):
@@ -33,50 +173,250 @@ class Transaction(models.Model):
     transaction_type = models.CharField(max_length=10, choices=TYPE_CHOICES)
     date = models.DateField(default=date.today)
     note = models.CharField(max_length=255, blank=True)
+    # True when the category came from the AI predictor, not the user
+    category_predicted = models.BooleanField(default=False)
+    # Set on imported rows so re-importing a statement skips them
+    fingerprint = models.CharField(max_length=40, blank=True, default="")
+
+    objects = TransactionQuerySet.as_manager()
+
+    _ROLLUP_FIELDS = {"user_id", "date", "transaction_type", "category", "amount"}
 
     class Meta:
         ordering = ["-date", "-id"]
         indexes = [
-            models.Index(fields=["user", "date"]),
+            # Keyset pagination walks (user, date, id) backwards
+            models.Index(fields=["user", "date", "id"], name="txn_user_date_id"),
             models.Index(fields=["user", "transaction_type"]),
+            # Covers month-window sums: range scan on date, no heap lookups
+            # for category/amount (INCLUDE is PostgreSQL-only)
+            models.Index(
+                fields=["user", "transaction_type", "date"],
+                include=["category", "amount"],
+                name="txn_user_type_date_cov",
+            ),
+            # Platform stats recount recent days across all users
+            models.Index(fields=["date"], name="txn_date"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "fingerprint"],
+                condition=~models.Q(fingerprint=""),
+                name="unique_txn_fingerprint_per_user",
+            ),
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember which rollup bucket this row currently counts towards
+        # (deferred loads skip this and are looked up again on save)
+        if cls._ROLLUP_FIELDS <= set(field_names):
+            instance._rollup_state = (rollups.bucket_for(instance), instance.amount)
+        # fill_categories only counts a category as a label when it changes
+        if "category" in field_names:
+            instance._loaded_category = instance.category
+        return instance
+
+    def _stored_rollup_state(self):
+        state = getattr(self, "_rollup_state", None)
+        if state is not None or self.pk is None:
+            return state
+
+        row = (
+            Transaction.objects.filter(pk=self.pk)
+            .values("user_id", "date", "transaction_type", "category", "amount")
+            .first()
+        )
+        if row is None:
+            return None
+        key = (
+            row["user_id"], row["date"].year, row["date"].month,
+            row["transaction_type"], row["category"] or "",
+        )
+        return key, row["amount"]
+
     def save(self, *args, **kwargs):
         """
-        - If category is empty, attempt to predict it from the note.
+        - If category is empty, predict it from the note (see fill_categories).
         - Normalize category to Title Case and strip whitespace.
-        - Wrap AI call in try/except to avoid raising during save.
         """
-        # Only attempt prediction if category is empty and note has content
-        if not self.category:
-            try:
-                predicted = predict_category(self.note or "")
-                # Ensure we have a non-empty string
-                if predicted:
-                    self.category = str(predicted)
-                else:
-                    self.category = "Uncategorized"
-            except Exception:
-                # If the predictor fails for any reason, fall back safely
-                self.category = "Uncategorized"
-
-        # Normalize category for consistent matching with budgets
-        try:
-            self.category = self.category.strip().title()
-        except Exception:
-            # Defensive fallback if category is not a string
-            self.category = "Uncategorized"
+        fill_categories([self])
 
         # Ensure amount is non-negative (validator will enforce on full_clean/migrate)
         if self.amount is None:
             self.amount = Decimal("0.00")
 
-        super().save(*args, **kwargs)
+        # Keep MonthlyRollup in sync within the same DB transaction
+        with transaction.atomic():
+            old_state = self._stored_rollup_state()
+            super().save(*args, **kwargs)
+
+            new_state = (rollups.bucket_for(self), self.amount)
+            rollups.apply_deltas(rollups.deltas_for(
+                added=[new_state],
+                removed=[old_state] if old_state else [],
+            ))
+            self._rollup_state = new_state
+            self._loaded_category = self.category
+
+            user_ids = {self.user_id, old_state[0][0]} if old_state else {self.user_id}
+            data_changed.send(sender=Transaction, user_ids=user_ids)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            old_state = self._stored_rollup_state()
+            result = super().delete(*args, **kwargs)
+            if old_state:
+                rollups.apply_deltas(rollups.deltas_for(removed=[old_state]))
+            self._rollup_state = None
+            data_changed.send(sender=Transaction, user_ids={self.user_id})
+        return result
 
     def __str__(self):
         return f"{self.transaction_type} ₹{self.amount} — {self.category}"
 
 
+class MonthlyRollup(models.Model):
+    """
+    Running per-user monthly totals by (transaction_type, category).
+    Maintained by Transaction writes; rebuild with `manage.py rebuild_rollups`.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="monthly_rollups")
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    transaction_type = models.CharField(max_length=10, choices=Transaction.TYPE_CHOICES)
+    category = models.CharField(max_length=50, blank=True)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "year", "month", "transaction_type", "category"],
+                name="unique_monthly_rollup",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.year}-{self.month:02d} {self.transaction_type} {self.category}: ₹{self.total}"
+
+
+class DataVersion(models.Model):
+    """
+    Per-user counter bumped (in the writing transaction) whenever the
+    user's ledger or budgets change. Cache keys and ETags include it, so
+    cached renders go stale exactly when the data does.
+    """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="data_version"
+    )
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def state(cls, user_id):
+        """(version, updated_at); (0, None) before the user's first write."""
+        row = cls.objects.filter(user_id=user_id).values_list("version", "updated_at").first()
+        return row or (0, None)
+
+    @classmethod
+    def current(cls, user_id):
+        return cls.state(user_id)[0]
+
+    @classmethod
+    def state_for_request(cls, request):
+        """state() for request.user, looked up once per request."""
+        if not hasattr(request, "_data_version"):
+            request._data_version = cls.state(request.user.pk)
+        return request._data_version
+
+    @classmethod
+    def for_request(cls, request):
+        return cls.state_for_request(request)[0]
+
+    @classmethod
+    def bump(cls, user_ids):
+        user_ids = {user_id for user_id in user_ids if user_id}
+        if not user_ids:
+            return
+
+        bumped = models.F("version") + 1
+        with transaction.atomic():
+            rows = cls.objects.filter(user_id__in=user_ids)
+            existing = set(rows.values_list("user_id", flat=True))
+            rows.update(version=bumped, updated_at=timezone.now())
+
+            for user_id in user_ids - existing:
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(user_id=user_id, version=1)
+                except IntegrityError:
+                    # Created concurrently – count this write on top of it
+                    cls.objects.filter(user_id=user_id).update(
+                        version=bumped, updated_at=timezone.now()
+                    )
+
+    def __str__(self):
+        return f"{self.user_id} v{self.version}"
+
+
+class PlatformStat(models.Model):
+    """
+    Platform-wide activity for one day or month, written by
+    `manage.py refresh_platform_stats` (transactions.platform_stats) so
+    the admin dashboard reads a handful of rows instead of the ledger.
+    Active users are users who recorded a transaction in the period.
+    """
+
+    DAY = "day"
+    MONTH = "month"
+
+    PERIOD_CHOICES = [
+        (DAY, "Day"),
+        (MONTH, "Month"),
+    ]
+
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    start = models.DateField()
+    signups = models.PositiveIntegerField(default=0)
+    active_users = models.PositiveIntegerField(default=0)
+    transactions = models.PositiveIntegerField(default=0)
+    income = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal("0.00"))
+    expense = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        ordering = ["period", "start"]
+        constraints = [
+            models.UniqueConstraint(fields=["period", "start"], name="unique_platform_stat"),
+        ]
+
+    @property
+    def volume(self):
+        return self.income + self.expense
+
+    def __str__(self):
+        return f"{self.period} {self.start}: {self.transactions} txns, {self.active_users} active"
+
+
+class PlatformTotals(models.Model):
+    """All-time totals, a single row refreshed along with PlatformStat."""
+
+    users = models.PositiveIntegerField(default=0)
+    transactions = models.PositiveBigIntegerField(default=0)
+    income = models.DecimalField(max_digits=18, decimal_places=2, default=Decimal("0.00"))
+    expense = models.DecimalField(max_digits=18, decimal_places=2, default=Decimal("0.00"))
+    refreshed_at = models.DateTimeField(null=True)
+
+    class Meta:
+        verbose_name_plural = "platform totals"
+
+    def __str__(self):
+        return f"{self.users} users, {self.transactions} txns @ {self.refreshed_at}"
+
+
 class Budget(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="budgets")
     category = models.CharField(max_length=50)
@@ -104,6 +444,8 @@ class RecurringTransaction(models.Model):
     category = models.CharField(max_length=50)
     transaction_type = models.CharField(max_length=10, choices=Transaction.TYPE_CHOICES)
     day_of_month = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(31)])
+    # Latest date run_recurring has materialized up to (see transactions.recurring)
+    last_run_date = models.DateField(null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ["user", "day_of_month"]
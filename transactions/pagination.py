@@ -0,0 +1,132 @@
+# transactions/pagination.py
+"""
+Keyset (cursor) pagination, by default over the (-date, -id) ledger ordering.
+
+Pages are fetched with `WHERE (date, id) < cursor ORDER BY date DESC, id
+DESC LIMIT n+1` instead of OFFSET, so page 500 costs the same index range
+scan as page 1, and no COUNT(*) is issued. Cursors are opaque URL-safe
+tokens; a malformed or tampered token just yields the first page.
+
+Any other non-null sort key works the same way: pass `field` (a model
+field or annotation), `parse` to turn its string form back into a value,
+and `descending`. The primary key breaks ties.
+"""
+import base64
+import json
+from datetime import date
+
+from django.db.models import Q
+
+
+def encode_token(value, pk, backwards=False):
+    raw = json.dumps([str(value), pk, int(backwards)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_token(token, parse=date.fromisoformat):
+    """(value, pk, backwards) or None."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        value, pk, backwards = json.loads(raw)
+        return parse(value), int(pk), bool(backwards)
+    except (ValueError, TypeError, ArithmeticError):
+        return None
+
+
+class KeysetPage:
+    """
+    One page of a queryset. Evaluated lazily on first access, so building
+    a page that is never rendered costs no query.
+    """
+
+    def __init__(
+        self, queryset, token=None, per_page=15, total=None,
+        field="date", parse=date.fromisoformat, descending=True,
+    ):
+        self.queryset = queryset
+        self.field = field
+        self.descending = descending
+        self.cursor = decode_token(token, parse)
+        self.per_page = per_page
+        # Optional, supplied by the caller when it can be had cheaply
+        self.total = total
+        self._rows = None
+
+    def _after(self, value, pk, ascending):
+        """Rows strictly after (value, pk) in the given direction."""
+        op = "gt" if ascending else "lt"
+        # The redundant inclusive bound keeps it an index range scan
+        return (
+            Q(**{f"{self.field}__{op}e": value}),
+            Q(**{f"{self.field}__{op}": value}) | Q(**{f"pk__{op}": pk}),
+        )
+
+    def _fetch(self):
+        if self._rows is not None:
+            return
+
+        qs = self.queryset
+        backwards = False
+        if self.cursor:
+            value, pk, backwards = self.cursor
+            # Walking backwards flips the direction of the ordering
+            qs = qs.filter(*self._after(value, pk, ascending=self.descending == backwards))
+
+        ascending = self.descending == backwards
+        prefix = "" if ascending else "-"
+        rows = list(qs.order_by(f"{prefix}{self.field}", f"{prefix}pk")[: self.per_page + 1])
+
+        more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+
+        if backwards:
+            rows.reverse()
+            self._has_previous, self._has_next = more, True
+        else:
+            self._has_previous, self._has_next = self.cursor is not None, more
+        self._rows = rows
+
+    def _token(self, row, backwards=False):
+        value = getattr(row, self.field)
+        if isinstance(value, date):
+            value = value.isoformat()
+        return encode_token(value, row.pk, backwards)
+
+    @property
+    def object_list(self):
+        self._fetch()
+        return self._rows
+
+    def has_next(self):
+        self._fetch()
+        return self._has_next and bool(self._rows)
+
+    def has_previous(self):
+        self._fetch()
+        return self._has_previous and bool(self._rows)
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_token(self):
+        if not self.has_next():
+            return None
+        return self._token(self._rows[-1])
+
+    @property
+    def previous_token(self):
+        if not self.has_previous():
+            return None
+        return self._token(self._rows[0], backwards=True)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
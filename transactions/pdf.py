@@ -1,121 +1,77 @@
-from django.http import HttpResponse
-from datetime import date
-
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from django.contrib.auth.decorators import login_required
+from django.http import FileResponse
+from django.shortcuts import redirect, render
+from django.urls import reverse
+
+from .conditional import user_data_condition
+from .models import DataVersion
+from .reports import (
+    failure_path,
+    report_filename,
+    report_path,
+    report_period,
+    schedule_report,
 )
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER
-from reportlab.lib import colors
 
-from insights.services import monthly_summary
+# Seconds the "being prepared" page waits before asking again
+REPORT_RETRY_AFTER = 2
 
 
+@login_required
 def monthly_pdf(request):
-    today = date.today()
-    data = monthly_summary(request.user, today.month, today.year)
-
-    response = HttpResponse(content_type="application/pdf")
-    response["Content-Disposition"] = (
-        f'attachment; filename="Finance_Report_{today.month}_{today.year}.pdf"'
-    )
-
-    # ---------------- DOCUMENT ----------------
-    doc = SimpleDocTemplate(
-        response,
-        pagesize=A4,
-        rightMargin=40,
-        leftMargin=40,
-        topMargin=50,
-        bottomMargin=40,
+    """
+    Financial report for ?start=YYYY-MM&end=YYYY-MM (default: this month).
+
+    A stored render for the current data version is sent straight from
+    disk. Otherwise one is queued in the background and a 202 page polls
+    until it is ready, so the request never waits on ReportLab. A failed
+    render is reported once and only retried on request (?retry=1).
+    """
+    start, end = report_period(request.GET)
+    version = DataVersion.for_request(request)
+    path = report_path(request.user.pk, start, end, version)
+
+    if path.exists():
+        return _stored_report(request, path, start, end)
+
+    failed = failure_path(path)
+    if failed.exists():
+        if not request.GET.get("retry"):
+            return _report_status(request, start, end, failed=True)
+        failed.unlink(missing_ok=True)
+
+    schedule_report(request.user.pk, start, end, version)
+    if request.GET.get("retry"):
+        # Poll without the flag, so a second failure is reported, not retried
+        return redirect(f"{reverse('transactions:monthly_pdf')}?{_period_query(start, end)}")
+    return _report_status(request, start, end)
+
+
+def _period_query(start, end):
+    return f"start={start:%Y-%m}&end={end:%Y-%m}"
+
+
+# Only the finished file carries the data-version validators; the pending
+# and failed pages must never be answered with a 304
+@user_data_condition("report", vary_on_query=True)
+def _stored_report(request, path, start, end):
+    return FileResponse(
+        open(path, "rb"), as_attachment=True, filename=report_filename(start, end),
     )
 
-    styles = getSampleStyleSheet()
-    story = []
 
-    # ---------------- TITLE ----------------
-    title_style = ParagraphStyle(
-        name="TitleStyle",
-        fontSize=20,
-        alignment=TA_CENTER,
-        spaceAfter=20,
-        textColor=colors.HexColor("#2563eb"),
+def _report_status(request, start, end, failed=False):
+    response = render(
+        request,
+        "report_pending.html",
+        {
+            "start": start, "end": end, "failed": failed,
+            "retry_after": REPORT_RETRY_AFTER,
+            "retry_query": f"{_period_query(start, end)}&retry=1",
+        },
+        status=500 if failed else 202,
     )
-
-    story.append(Paragraph("AI Finance Tracker", title_style))
-    story.append(Paragraph(
-        f"Monthly Financial Report – {today.strftime('%B %Y')}",
-        ParagraphStyle(
-            name="SubTitle",
-            alignment=TA_CENTER,
-            fontSize=11,
-            textColor=colors.grey,
-            spaceAfter=30,
-        )
-    ))
-
-    # ---------------- SUMMARY TABLE ----------------
-    table_data = [
-        ["Metric", "Amount (₹)"],
-        ["Total Income", f"₹ {data['income']:,}"],
-        ["Total Expense", f"₹ {data['expense']:,}"],
-        ["Savings", f"₹ {data['savings']:,}"],
-    ]
-
-    summary_table = Table(table_data, colWidths=[250, 200])
-    summary_table.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1f2937")),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-        ("ALIGN", (1, 1), (-1, -1), "RIGHT"),
-        ("FONT", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("FONT", (0, 1), (-1, -1), "Helvetica"),
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-        ("BOTTOMPADDING", (0, 0), (-1, 0), 10),
-        ("TOPPADDING", (0, 0), (-1, 0), 10),
-    ]))
-
-    story.append(summary_table)
-    story.append(Spacer(1, 25))
-
-    # ---------------- AI INSIGHTS ----------------
-    story.append(Paragraph(
-        "AI Insights",
-        ParagraphStyle(
-            name="SectionHeader",
-            fontSize=14,
-            spaceAfter=12,
-            textColor=colors.HexColor("#16a085"),
-        )
-    ))
-
-    if data.get("insights"):
-        for insight in data["insights"]:
-            story.append(Paragraph(
-                f"• {insight}",
-                styles["Normal"]
-            ))
-            story.append(Spacer(1, 6))
-    else:
-        story.append(Paragraph(
-            "No insights available for this month.",
-            styles["Normal"]
-        ))
-
-    story.append(Spacer(1, 30))
-
-    # ---------------- FOOTER ----------------
-    story.append(Paragraph(
-        "Generated automatically by AI Finance Tracker",
-        ParagraphStyle(
-            name="Footer",
-            alignment=TA_CENTER,
-            fontSize=9,
-            textColor=colors.grey,
-        )
-    ))
-
-    # ---------------- BUILD PDF ----------------
-    doc.build(story)
-
+    if not failed:
+        response["Retry-After"] = str(REPORT_RETRY_AFTER)
+    response["Cache-Control"] = "no-store"
     return response
@@ -0,0 +1,163 @@
+# transactions/platform_stats.py
+"""
+Precomputed platform-wide statistics for the admin dashboard.
+
+refresh_platform_stats() recounts a recent window of days (range scans
+on Transaction.date and User.date_joined), re-derives the monthly rows
+and all-time totals from MonthlyRollup, and upserts everything into
+PlatformStat / PlatformTotals. The dashboard then reads one totals row
+and a few dozen series rows however large the ledger grows. Run
+`manage.py refresh_platform_stats` from cron; --full backfills history.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db.models import Count, DateField, Min, Q, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from insights.periods import add_months
+
+from .models import MonthlyRollup, PlatformStat, PlatformTotals, Transaction
+
+# Days recounted on each refresh: catches edits to recent history
+DAYS = 35
+
+ZERO = Decimal("0")
+STAT_FIELDS = ["signups", "active_users", "transactions", "income", "expense"]
+
+
+def _type_sums(field):
+    return {
+        "income": Sum(field, filter=Q(transaction_type=Transaction.INCOME)),
+        "expense": Sum(field, filter=Q(transaction_type=Transaction.EXPENSE)),
+    }
+
+
+def _set_row(stat, row):
+    for field in ("active_users", "transactions"):
+        setattr(stat, field, row[field] or 0)
+    stat.income = row["income"] or ZERO
+    stat.expense = row["expense"] or ZERO
+
+
+def _daily_stats(since, today):
+    days = [since + timedelta(days=offset) for offset in range((today - since).days + 1)]
+    stats = {day: PlatformStat(period=PlatformStat.DAY, start=day) for day in days}
+
+    ledger = (
+        Transaction.objects.filter(date__gte=since, date__lte=today)
+        .order_by()
+        .values("date")
+        .annotate(
+            transactions=Count("id"),
+            active_users=Count("user", distinct=True),
+            **_type_sums("amount"),
+        )
+    )
+    for row in ledger:
+        _set_row(stats[row["date"]], row)
+
+    signups = (
+        User.objects.filter(date_joined__date__gte=since, date_joined__date__lte=today)
+        .annotate(day=TruncDate("date_joined"))
+        .order_by()
+        .values("day")
+        .annotate(signups=Count("id"))
+    )
+    for row in signups:
+        stats[row["day"]].signups = row["signups"]
+
+    return list(stats.values())
+
+
+def _monthly_stats(since, today):
+    first = since.replace(day=1)
+    stats = {}
+    month = first
+    while month <= today:
+        stats[month] = PlatformStat(period=PlatformStat.MONTH, start=month)
+        month = add_months(month, 1)
+
+    ledger = (
+        MonthlyRollup.objects.filter(
+            Q(year__gt=first.year) | Q(year=first.year, month__gte=first.month), count__gt=0,
+        )
+        .order_by()
+        .values("year", "month")
+        .annotate(
+            transactions=Sum("count"),
+            active_users=Count("user", distinct=True),
+            **_type_sums("total"),
+        )
+    )
+    for row in ledger:
+        stat = stats.get(date(row["year"], row["month"], 1))
+        if stat is not None:  # future-dated entries are left out
+            _set_row(stat, row)
+
+    signups = (
+        User.objects.filter(date_joined__date__gte=first, date_joined__date__lte=today)
+        .annotate(period=TruncMonth("date_joined", output_field=DateField()))
+        .order_by()
+        .values("period")
+        .annotate(signups=Count("id"))
+    )
+    for row in signups:
+        stats[row["period"]].signups = row["signups"]
+
+    return list(stats.values())
+
+
+def _history_start(today):
+    first_txn = Transaction.objects.aggregate(first=Min("date"))["first"]
+    first_user = User.objects.aggregate(first=Min("date_joined"))["first"]
+    starts = [today, first_txn, first_user and timezone.localdate(first_user)]
+    return min(start for start in starts if start)
+
+
+def refresh_platform_stats(days=DAYS, full=False, today=None):
+    """
+    Recount the last `days` days (all history with `full`), the months
+    they fall in, and the all-time totals. Returns the PlatformTotals row.
+    """
+    today = today or timezone.localdate()
+    since = _history_start(today) if full else today - timedelta(days=max(days, 1) - 1)
+
+    PlatformStat.objects.bulk_create(
+        _daily_stats(since, today) + _monthly_stats(since, today),
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=["period", "start"],
+        update_fields=STAT_FIELDS,
+    )
+
+    # One conditional aggregate over the rollups instead of the ledger
+    totals = MonthlyRollup.objects.aggregate(transactions=Sum("count"), **_type_sums("total"))
+    row, _ = PlatformTotals.objects.update_or_create(
+        pk=1,
+        defaults={
+            "users": User.objects.count(),
+            "transactions": totals["transactions"] or 0,
+            "income": totals["income"] or ZERO,
+            "expense": totals["expense"] or ZERO,
+            "refreshed_at": timezone.now(),
+        },
+    )
+    return row
+
+
+def platform_totals():
+    """The stored totals; computed on the spot only before the first refresh."""
+    return PlatformTotals.objects.filter(pk=1).first() or refresh_platform_stats()
+
+
+def platform_series(period, count, today=None):
+    """The latest `count` days or months, oldest first."""
+    today = today or timezone.localdate()
+    if period == PlatformStat.DAY:
+        since = today - timedelta(days=count - 1)
+    else:
+        since = add_months(today.replace(day=1), 1 - count)
+    return list(PlatformStat.objects.filter(period=period, start__gte=since, start__lte=today))
@@ -0,0 +1,98 @@
+# transactions/recurring.py
+"""
+Materializes RecurringTransaction schedules into ledger rows.
+
+Each schedule remembers the last date it was materialized up to
+(last_run_date), and a run fills in every occurrence after that up to
+today, so days the job didn't run are caught up. Days past the end of a
+month fall on its last day (31 -> 30 Apr, 28/29 Feb).
+
+Every generated row carries the fingerprint 'recurring:<id>:<date>', which
+the partial unique index on (user, fingerprint) makes impossible to insert
+twice: repeated or concurrent runs add nothing new.
+"""
+import calendar
+from datetime import date, timedelta
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import RECURRING_FINGERPRINT_PREFIX, RecurringTransaction, Transaction
+
+CHUNK_SIZE = 500
+NOTE = "Auto recurring entry"
+
+
+def occurrence_in_month(day_of_month, year, month):
+    """The schedule's date in a month, clamped to the month's last day."""
+    return date(year, month, min(day_of_month, calendar.monthrange(year, month)[1]))
+
+
+def occurrences(day_of_month, after, until):
+    """Occurrence dates d with after < d <= until, oldest first."""
+    year, month = after.year, after.month
+    while (year, month) <= (until.year, until.month):
+        day = occurrence_in_month(day_of_month, year, month)
+        if after < day <= until:
+            yield day
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def recurring_fingerprint(schedule_id, day):
+    return f"{RECURRING_FINGERPRINT_PREFIX}{schedule_id}:{day.isoformat()}"
+
+
+def _materialize(schedules, today):
+    rows = []
+    for schedule in schedules:
+        # Never run before: start with today's occurrence (if due), not history
+        after = schedule.last_run_date or today - timedelta(days=1)
+        for day in occurrences(schedule.day_of_month, after, today):
+            rows.append(Transaction(
+                user_id=schedule.user_id,
+                amount=schedule.amount,
+                category=schedule.category,
+                transaction_type=schedule.transaction_type,
+                date=day,
+                note=NOTE,
+                fingerprint=recurring_fingerprint(schedule.pk, day),
+            ))
+    return rows
+
+
+def run_recurring(today=None, chunk_size=CHUNK_SIZE):
+    """
+    Catch every schedule up to `today`. Returns {"schedules", "rows"}:
+    schedules advanced and occurrences due (rows already present, e.g.
+    from a concurrent run, are skipped by the insert).
+    """
+    today = today or date.today()
+    stats = {"schedules": 0, "rows": 0}
+
+    pending = RecurringTransaction.objects.filter(
+        Q(last_run_date__isnull=True) | Q(last_run_date__lt=today)
+    ).order_by("pk")
+
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            batch = pending.filter(pk__gt=last_pk)
+            if connection.features.has_select_for_update_skip_locked:
+                # Concurrent runners split the work instead of queueing on it
+                batch = batch.select_for_update(skip_locked=True)
+            schedules = list(batch[:chunk_size])
+            if not schedules:
+                break
+            last_pk = schedules[-1].pk
+
+            rows = _materialize(schedules, today)
+            if rows:
+                Transaction.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+            pending.filter(pk__in=[schedule.pk for schedule in schedules]).update(
+                last_run_date=today
+            )
+
+        stats["schedules"] += len(schedules)
+        stats["rows"] += len(rows)
+
+    return stats
@@ -0,0 +1,339 @@
+# transactions/reports.py
+"""
+PDF financial reports over a range of months.
+
+Reports are rendered on a background thread and stored under REPORT_DIR
+as <user>/<first month>_<last month>-v<data version>.pdf. Any ledger or
+budget write bumps the data version, so a stored file is valid for as
+long as its name says and a repeat download is a plain file send.
+
+A render that fails leaves a .failed marker in place of the file, so the
+view reports the error instead of queueing the same render again. Queued
+renders live in this process only: after a restart the next request for
+a missing report simply queues it again.
+"""
+import os
+import tempfile
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+from io import BytesIO
+from pathlib import Path
+from threading import Lock
+
+from django.conf import settings
+from django.db.models import Q
+
+from insights.periods import add_months
+
+from .models import MonthlyRollup
+
+# Longest range a single report may cover
+MAX_REPORT_MONTHS = 24
+
+ZERO = Decimal("0")
+
+_pending = set()
+_state_lock = Lock()
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, "REPORT_WORKERS", 2), thread_name_prefix="pdf-report"
+)
+
+
+# ======================================================
+# PERIODS & STORAGE
+# ======================================================
+def parse_month(value, default):
+    """'2026-03' -> date(2026, 3, 1); `default` when missing or malformed."""
+    try:
+        year, month = (int(part) for part in (value or "").split("-"))
+        return date(year, month, 1)
+    except ValueError:
+        return default
+
+
+def report_period(params, today=None):
+    """(first month, last month) from ?start=YYYY-MM&end=YYYY-MM."""
+    current = (today or date.today()).replace(day=1)
+    start = parse_month(params.get("start"), current)
+    end = parse_month(params.get("end"), start)
+    if end < start:
+        start, end = end, start
+    return max(start, add_months(end, 1 - MAX_REPORT_MONTHS)), end
+
+
+def report_dir():
+    return Path(getattr(settings, "REPORT_DIR", Path(settings.BASE_DIR) / "var" / "reports"))
+
+
+def report_path(user_id, start, end, version):
+    return report_dir() / str(user_id) / f"{start:%Y-%m}_{end:%Y-%m}-v{version}.pdf"
+
+
+def failure_path(path):
+    """Marker left next to `path` when its render failed."""
+    return Path(path).with_suffix(".failed")
+
+
+def report_filename(start, end):
+    period = f"{start:%Y_%m}" if start == end else f"{start:%Y_%m}-{end:%Y_%m}"
+    return f"Finance_Report_{period}.pdf"
+
+
+# ======================================================
+# DATA
+# ======================================================
+def reports_data(user_ids, start, end):
+    """
+    {user_id: {"months", "categories"}} for every id in `user_ids`, from
+    one rollup query: per-month income/expense and per-category expense.
+    """
+    in_range = (
+        (Q(year__gt=start.year) | Q(year=start.year, month__gte=start.month))
+        & (Q(year__lt=end.year) | Q(year=end.year, month__lte=end.month))
+    )
+    rows = MonthlyRollup.objects.filter(in_range, user_id__in=user_ids).values_list(
+        "user_id", "year", "month", "transaction_type", "category", "total"
+    )
+
+    period = []
+    month = start
+    while month <= end:
+        period.append(month)
+        month = add_months(month, 1)
+
+    months = {
+        user_id: {month: {"INCOME": ZERO, "EXPENSE": ZERO} for month in period}
+        for user_id in user_ids
+    }
+    categories = {user_id: defaultdict(lambda: ZERO) for user_id in user_ids}
+    for user_id, year, month, txn_type, category, total in rows:
+        months[user_id][date(year, month, 1)][txn_type] += total or ZERO
+        if txn_type == "EXPENSE":
+            categories[user_id][category or "Uncategorized"] += total or ZERO
+
+    return {
+        user_id: {
+            "months": [
+                {"month": month, "income": totals["INCOME"], "expense": totals["EXPENSE"]}
+                for month, totals in months[user_id].items()
+            ],
+            "categories": sorted(
+                (
+                    {"category": name, "total": total}
+                    for name, total in categories[user_id].items()
+                ),
+                key=lambda row: row["total"],
+                reverse=True,
+            ),
+        }
+        for user_id in user_ids
+    }
+
+
+def report_data(user_id, start, end):
+    return reports_data([user_id], start, end)[user_id]
+
+
+# ======================================================
+# RENDERING
+# ======================================================
+def render_report(data, start, end, output):
+    """
+    Write the PDF for `report_data` output to a binary file object.
+    Returns the number of pages.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.platypus import (
+        Image, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+    )
+
+    from insights.charts import render_category_chart, render_monthly_chart
+
+    doc = SimpleDocTemplate(
+        output, pagesize=A4, rightMargin=40, leftMargin=40, topMargin=50, bottomMargin=40,
+    )
+    styles = getSampleStyleSheet()
+    section = ParagraphStyle(
+        name="SectionHeader", fontSize=14, spaceAfter=12, textColor=colors.HexColor("#16a085"),
+    )
+    table_style = TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1f2937")),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("ALIGN", (1, 1), (-1, -1), "RIGHT"),
+        ("FONT", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("FONT", (0, 1), (-1, -1), "Helvetica"),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+        ("BOTTOMPADDING", (0, 0), (-1, 0), 10),
+        ("TOPPADDING", (0, 0), (-1, 0), 10),
+    ])
+
+    def money(value):
+        return f"₹ {value:,.2f}"
+
+    def chart(png):
+        return Image(BytesIO(png), width=450, height=300)
+
+    period = f"{start:%B %Y}" if start == end else f"{start:%B %Y} – {end:%B %Y}"
+    months = data["months"]
+    income = sum((row["income"] for row in months), ZERO)
+    expense = sum((row["expense"] for row in months), ZERO)
+
+    # ---------------- TITLE ----------------
+    story = [
+        Paragraph("AI Finance Tracker", ParagraphStyle(
+            name="TitleStyle", fontSize=20, alignment=TA_CENTER, spaceAfter=20,
+            textColor=colors.HexColor("#2563eb"),
+        )),
+        Paragraph(f"Financial Report – {period}", ParagraphStyle(
+            name="SubTitle", alignment=TA_CENTER, fontSize=11, textColor=colors.grey,
+            spaceAfter=30,
+        )),
+    ]
+
+    # ---------------- SUMMARY ----------------
+    summary = Table([
+        ["Metric", "Amount (₹)"],
+        ["Total Income", money(income)],
+        ["Total Expense", money(expense)],
+        ["Savings", money(income - expense)],
+    ], colWidths=[250, 200])
+    summary.setStyle(table_style)
+    story += [summary, Spacer(1, 25)]
+
+    # ---------------- INSIGHTS ----------------
+    story.append(Paragraph("AI Insights", section))
+    for row in months:
+        label = "this month" if len(months) == 1 else f"in {row['month']:%B %Y}"
+        if row["expense"] > row["income"]:
+            text = f"Warning: You spent ₹{row['expense'] - row['income']} more than your income {label}."
+        else:
+            text = f"You saved ₹{row['income'] - row['expense']} {label}."
+        story += [Paragraph(f"• {text}", styles["Normal"]), Spacer(1, 6)]
+    story.append(Spacer(1, 25))
+
+    # ---------------- MONTH BY MONTH ----------------
+    if len(months) > 1:
+        by_month = Table(
+            [["Month", "Income", "Expense", "Savings"]] + [
+                [f"{row['month']:%b %Y}", money(row["income"]), money(row["expense"]),
+                 money(row["income"] - row["expense"])]
+                for row in months
+            ],
+            colWidths=[120, 110, 110, 110],
+            repeatRows=1,
+        )
+        by_month.setStyle(table_style)
+        story += [
+            Paragraph("Month by Month", section),
+            by_month,
+            Spacer(1, 15),
+            chart(render_monthly_chart(months)),
+            Spacer(1, 25),
+        ]
+
+    # ---------------- CATEGORIES ----------------
+    story.append(Paragraph("Expenses by Category", section))
+    if data["categories"]:
+        categories = Table(
+            [["Category", "Spent", "Share"]] + [
+                [row["category"], money(row["total"]),
+                 f"{row['total'] / expense:.0%}" if expense else "–"]
+                for row in data["categories"]
+            ],
+            colWidths=[200, 150, 100],
+            repeatRows=1,
+        )
+        categories.setStyle(table_style)
+        story += [
+            categories,
+            Spacer(1, 15),
+            chart(render_category_chart(data["categories"][:12])),
+        ]
+    else:
+        story.append(Paragraph("No expenses in this period.", styles["Normal"]))
+
+    # ---------------- FOOTER ----------------
+    story += [
+        Spacer(1, 30),
+        Paragraph("Generated automatically by AI Finance Tracker", ParagraphStyle(
+            name="Footer", alignment=TA_CENTER, fontSize=9, textColor=colors.grey,
+        )),
+    ]
+
+    doc.build(story)
+    return doc.page
+
+
+def write_report(path, data, start, end):
+    """
+    Render `data` to `path`, removing older versions of the same report.
+    Returns the number of pages.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Written under a temporary name and renamed, so readers (and resumed
+    # bulk runs) never see a half-written file
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as output:
+            pages = render_report(data, start, end, output)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+    # Older renders, and failure markers, of the same period
+    for stale in path.parent.glob(f"{start:%Y-%m}_{end:%Y-%m}-v*"):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+    return pages
+
+
+def build_report(user_id, start, end, version):
+    """Render and store one report from the database."""
+    path = report_path(user_id, start, end, version)
+    write_report(path, report_data(user_id, start, end), start, end)
+    return path
+
+
+# ======================================================
+# BACKGROUND
+# ======================================================
+def record_failure(path, error):
+    """Leave a .failed marker so the view stops re-queueing this render."""
+    marker = failure_path(path)
+    try:
+        marker.parent.mkdir(parents=True, exist_ok=True)
+        marker.write_text(f"{type(error).__name__}: {error}\n")
+    except OSError as e:
+        print("PDF REPORT ERROR:", marker, e)
+
+
+def _build_in_background(key):
+    from django.db import connection
+
+    try:
+        build_report(*key)
+    except Exception as e:
+        print("PDF REPORT ERROR:", key, e)
+        record_failure(report_path(*key), e)
+    finally:
+        with _state_lock:
+            _pending.discard(key)
+        connection.close()
+
+
+def schedule_report(user_id, start, end, version):
+    """Queue a render unless the same report is already being built."""
+    key = (user_id, start, end, version)
+    with _state_lock:
+        if key in _pending:
+            return
+        _pending.add(key)
+    _executor.submit(_build_in_background, key)
@@ -0,0 +1,251 @@
+# transactions/rollups.py
+"""
+Incrementally maintained per-user monthly totals.
+
+Every write to the ledger (Transaction.save/delete and the bulk queryset
+paths) applies a delta to MonthlyRollup inside the same database transaction,
+so readers can sum O(categories) rollup rows instead of scanning the ledger.
+"""
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from insights.periods import month_filter
+
+
+def _as_date(value):
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value))
+
+
+def bucket_for(txn):
+    """Rollup key of a Transaction instance."""
+    txn_date = _as_date(txn.date)
+    return (
+        txn.user_id,
+        txn_date.year,
+        txn_date.month,
+        txn.transaction_type,
+        txn.category or "",
+    )
+
+
+def _bucket_filter(key):
+    user_id, year, month, txn_type, category = key
+    return {
+        "user_id": user_id,
+        "year": year,
+        "month": month,
+        "transaction_type": txn_type,
+        "category": category,
+    }
+
+
+# Above this many buckets, rows are read once and written back in bulk
+BULK_THRESHOLD = 8
+
+# Bounds on one OR-ed filter: SQLite rejects expression trees deeper than
+# 1000 terms and, on older versions, more than 32766 parameters
+MAX_FILTER_MONTHS = 200
+MAX_FILTER_USERS = 5000
+
+
+def month_filters(user_months, make_q):
+    """
+    Q objects that together cover the (user_id, year, month) triples,
+    one OR term per calendar month: make_q(year, month, user_ids).
+    """
+    by_month = defaultdict(set)
+    for user_id, year, month in user_months:
+        by_month[(year, month)].add(user_id)
+
+    query, terms, users = Q(), 0, 0
+    for (year, month), user_ids in sorted(by_month.items()):
+        if terms and (terms >= MAX_FILTER_MONTHS or users + len(user_ids) > MAX_FILTER_USERS):
+            yield query
+            query, terms, users = Q(), 0, 0
+        query |= make_q(year, month, sorted(user_ids))
+        terms += 1
+        users += len(user_ids)
+    if terms:
+        yield query
+
+
+def _rollup_month_q(year, month, user_ids):
+    return Q(user_id__in=user_ids, year=year, month=month)
+
+
+def _ledger_month_q(year, month, user_ids):
+    return Q(user_id__in=user_ids, **month_filter(year, month))
+
+
+def apply_deltas(deltas):
+    """
+    deltas: {bucket: (amount_delta, count_delta)}
+    Must run inside the same atomic block as the ledger write.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if delta[0] or delta[1]}
+
+    if len(deltas) > BULK_THRESHOLD:
+        _apply_bulk(deltas)
+    else:
+        for key, (amount, count) in deltas.items():
+            _apply_one(key, amount, count)
+
+
+def _apply_one(key, amount, count):
+    from .models import MonthlyRollup
+
+    rows = MonthlyRollup.objects.filter(**_bucket_filter(key))
+    updated = rows.update(total=F("total") + amount, count=F("count") + count)
+
+    if not updated:
+        try:
+            with transaction.atomic():
+                MonthlyRollup.objects.create(
+                    **_bucket_filter(key), total=amount, count=count
+                )
+        except IntegrityError:
+            # Created concurrently by another writer – add on top of it
+            rows.update(total=F("total") + amount, count=F("count") + count)
+
+    if count < 0:
+        rows.filter(count__lte=0).delete()
+
+
+def _apply_bulk(deltas):
+    """
+    Same as applying each delta, in a constant number of queries: lock the
+    touched months' rows, update them with bulk_update and insert the
+    missing buckets with one bulk_create.
+    """
+    from .models import MonthlyRollup
+
+    existing = {}
+    for months in month_filters({key[:3] for key in deltas}, _rollup_month_q):
+        for row in MonthlyRollup.objects.select_for_update().filter(months):
+            existing[(row.user_id, row.year, row.month, row.transaction_type, row.category)] = row
+
+    changed, missing, emptied = [], {}, []
+    for key, (amount, count) in deltas.items():
+        row = existing.get(key)
+        if row is None:
+            missing[key] = (amount, count)
+            continue
+        row.total += amount
+        row.count += count
+        (changed if row.count > 0 else emptied).append(row)
+
+    MonthlyRollup.objects.bulk_update(changed, ["total", "count"], batch_size=1000)
+    if emptied:
+        MonthlyRollup.objects.filter(pk__in=[row.pk for row in emptied]).delete()
+
+    created = [
+        MonthlyRollup(**_bucket_filter(key), total=amount, count=count)
+        for key, (amount, count) in missing.items()
+        if count > 0
+    ]
+    try:
+        with transaction.atomic():
+            MonthlyRollup.objects.bulk_create(created, batch_size=1000)
+    except IntegrityError:
+        # Some bucket was created concurrently – fall back to per-row deltas
+        for key, (amount, count) in missing.items():
+            _apply_one(key, amount, count)
+
+
+def deltas_for(added=(), removed=()):
+    """
+    Build a delta map from (bucket, amount) pairs added to / removed from
+    the ledger.
+    """
+    deltas = defaultdict(lambda: (Decimal("0"), 0))
+
+    for key, amount in added:
+        total, count = deltas[key]
+        deltas[key] = (total + Decimal(amount or 0), count + 1)
+
+    for key, amount in removed:
+        total, count = deltas[key]
+        deltas[key] = (total - Decimal(amount or 0), count - 1)
+
+    return deltas
+
+
+def grouped_deltas(queryset, sign=1):
+    """
+    Delta map for every row of a Transaction queryset, computed in one
+    grouped query (used before bulk deletes).
+    """
+    rows = (
+        queryset.order_by()
+        .annotate(period=TruncMonth("date"))
+        .values("user_id", "period", "transaction_type", "category")
+        .annotate(total=Sum("amount"), count=Count("id"))
+    )
+
+    return {
+        (
+            row["user_id"],
+            row["period"].year,
+            row["period"].month,
+            row["transaction_type"],
+            row["category"] or "",
+        ): (sign * (row["total"] or Decimal("0")), sign * row["count"])
+        for row in rows
+    }
+
+
+def affected_months(queryset):
+    """Distinct (user_id, month_start) pairs touched by a queryset."""
+    return {
+        (row["user_id"], row["period"])
+        for row in (
+            queryset.order_by()
+            .annotate(period=TruncMonth("date"))
+            .values("user_id", "period")
+            .distinct()
+        )
+    }
+
+
+def rebuild_months(months):
+    """
+    Recompute the rollup rows of the given (user_id, month_start) pairs
+    straight from the ledger. Used when exact deltas aren't known
+    (queryset.update, bulk_create with ignore_conflicts).
+    """
+    from .models import MonthlyRollup, Transaction
+
+    if not months:
+        return
+
+    user_months = set()
+    for user_id, month_start in months:
+        month_start = _as_date(month_start)
+        user_months.add((user_id, month_start.year, month_start.month))
+
+    with transaction.atomic():
+        for rollup_filter in month_filters(user_months, _rollup_month_q):
+            MonthlyRollup.objects.filter(rollup_filter).delete()
+        for ledger_filter in month_filters(user_months, _ledger_month_q):
+            MonthlyRollup.objects.bulk_create(
+                rollups_from(Transaction.objects.filter(ledger_filter)),
+                batch_size=1000,
+            )
+
+
+def rollups_from(queryset):
+    """Unsaved MonthlyRollup rows aggregated from a Transaction queryset."""
+    from .models import MonthlyRollup
+
+    return [
+        MonthlyRollup(**_bucket_filter(key), total=total, count=count)
+        for key, (total, count) in grouped_deltas(queryset).items()
+        if count
+    ]
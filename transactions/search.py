@@ -0,0 +1,246 @@
+# transactions/search.py
+"""
+Indexed full-text search over transaction notes and categories.
+
+- PostgreSQL: a GIN index on a 'simple' tsvector of note + category for
+  word/prefix matches, plus a pg_trgm GIN index on note for fuzzy
+  merchant matches ("swigy" -> "Swiggy").
+- SQLite: an external-content FTS5 table kept in sync by triggers.
+- Anything else: icontains per word.
+
+Every query word is a prefix match and all words must match. Words naming
+a transaction type ("income", "expense") filter on the type instead.
+"""
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+TABLE = "transactions_transaction"
+FTS_TABLE = "transactions_transaction_fts"
+TYPE_WORDS = {"income": "INCOME", "expense": "EXPENSE"}
+MAX_TERMS = 8
+
+
+def _tsvector(prefix=""):
+    # Must stay identical to the indexed expression for the index to be used
+    return (
+        f"to_tsvector('simple', coalesce({prefix}note, '') || ' ' || "
+        f"coalesce({prefix}category, ''))"
+    )
+
+
+def search_terms(query):
+    """(lower-cased words, transaction types) from a free-text query."""
+    words = re.findall(r"\w+", (query or "").lower())
+    types = {TYPE_WORDS[word] for word in words if word in TYPE_WORDS}
+    terms = [word for word in words if word not in TYPE_WORDS]
+    return terms[:MAX_TERMS], types
+
+
+# ======================================================
+# QUERYING
+# ======================================================
+# On SQLite, ranked searches score at most this many of the caller's
+# matches with bm25; broader ones come back newest first, unscored.
+SQLITE_SPARSE_LIMIT = 1000
+
+
+def search_transactions(queryset, query):
+    """Narrow a Transaction queryset to rows matching `query`."""
+    terms, types = search_terms(query)
+    if types:
+        queryset = queryset.filter(transaction_type__in=types)
+    if not terms:
+        return queryset
+
+    vendor = connections[queryset.db].vendor
+    if vendor == "postgresql":
+        return queryset.filter(_postgres_match(terms))
+
+    if vendor == "sqlite":
+        return queryset.filter(pk__in=_sqlite_match(terms))
+
+    return queryset.filter(_substring_match(terms))
+
+
+def ranked_search(queryset, query, limit=20):
+    """
+    Best matches first, as a list of Transactions with a `rank` attribute
+    (higher is better). Very broad queries on SQLite come back newest
+    first with rank 0.
+    """
+    terms, types = search_terms(query)
+    if types:
+        queryset = queryset.filter(transaction_type__in=types)
+
+    vendor = connections[queryset.db].vendor
+    if terms and vendor == "postgresql":
+        return list(
+            queryset.filter(_postgres_match(terms))
+            .annotate(rank=_postgres_rank(terms))
+            .order_by("-rank", "-date", "-id")[:limit]
+        )
+
+    if terms and vendor == "sqlite":
+        matches = queryset.filter(pk__in=_sqlite_match(terms))
+        scores = _sqlite_scores(matches, terms)
+        if scores is not None:
+            rows = list(queryset.filter(pk__in=list(scores)))
+            for txn in rows:
+                txn.rank = scores[txn.pk]
+            rows.sort(key=lambda txn: (txn.rank, txn.date, txn.pk), reverse=True)
+            return rows[:limit]
+        queryset = matches
+    elif terms:
+        queryset = queryset.filter(_substring_match(terms))
+    rows = list(queryset.order_by("-date", "-id")[:limit])
+    for txn in rows:
+        txn.rank = 0.0
+    return rows
+
+
+def _postgres_match(terms):
+    column = f'"{TABLE}".'
+    return RawSQL(
+        f"({_tsvector(column)} @@ to_tsquery('simple', %s) OR {column}note %% %s)",
+        [_tsquery(terms), " ".join(terms)],
+        output_field=BooleanField(),
+    )
+
+
+def _postgres_rank(terms):
+    column = f'"{TABLE}".'
+    return RawSQL(
+        f"(ts_rank({_tsvector(column)}, to_tsquery('simple', %s)) + similarity({column}note, %s))",
+        [_tsquery(terms), " ".join(terms)],
+        output_field=FloatField(),
+    )
+
+
+def _tsquery(terms):
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+def _fts_query(terms):
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def _sqlite_match(terms):
+    # Ids of every FTS5 match; SQLite intersects them with the caller's rows
+    return RawSQL(
+        f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [_fts_query(terms)]
+    )
+
+
+def _sqlite_scores(matches, terms):
+    """
+    {id: bm25 score} for the `matches` queryset, or None when it holds
+    more than SQLITE_SPARSE_LIMIT rows. Only the caller's own matches
+    count, so other users' data never changes the outcome.
+    """
+    ids = list(matches.order_by().values_list("pk", flat=True)[: SQLITE_SPARSE_LIMIT + 1])
+    if len(ids) > SQLITE_SPARSE_LIMIT:
+        return None
+    if not ids:
+        return {}
+
+    # The unary + keeps SQLite from re-running the MATCH once per listed id
+    placeholders = ", ".join(["%s"] * len(ids))
+    with connections[matches.db].cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, -bm25({FTS_TABLE}) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND +rowid IN ({placeholders})",
+            [_fts_query(terms), *ids],
+        )
+        return dict(cursor.fetchall())
+
+
+def _substring_match(terms):
+    match = Q()
+    for term in terms:
+        match &= Q(note__icontains=term) | Q(category__icontains=term)
+    return match
+
+
+# ======================================================
+# INDEX MAINTENANCE (called from migrations and post_migrate)
+# ======================================================
+SQLITE_TRIGGERS = {
+    f"{FTS_TABLE}_ai": f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, note, category)
+            VALUES (new.id, new.note, new.category);
+        END""",
+    f"{FTS_TABLE}_ad": f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, note, category)
+            VALUES ('delete', old.id, old.note, old.category);
+        END""",
+    f"{FTS_TABLE}_au": f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF note, category ON {TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, note, category)
+            VALUES ('delete', old.id, old.note, old.category);
+            INSERT INTO {FTS_TABLE}(rowid, note, category)
+            VALUES (new.id, new.note, new.category);
+        END""",
+}
+
+
+def install_search_index(connection):
+    """Create the vendor's search index if missing. Safe to call repeatedly."""
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            # Don't block ledger writes while a large table is indexed
+            create = "CREATE INDEX" if connection.in_atomic_block else "CREATE INDEX CONCURRENTLY"
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            cursor.execute(
+                f"{create} IF NOT EXISTS txn_search_tsv ON {TABLE} "
+                f"USING gin (({_tsvector()}))"
+            )
+            cursor.execute(
+                f"{create} IF NOT EXISTS txn_note_trgm ON {TABLE} "
+                f"USING gin (note gin_trgm_ops)"
+            )
+
+        elif connection.vendor == "sqlite":
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s",
+                [TABLE],
+            )
+            existing = {row[0] for row in cursor.fetchall()}
+
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                f"note, category, content='{TABLE}', content_rowid='id', "
+                f"tokenize='unicode61 remove_diacritics 2')"
+            )
+            for sql in SQLITE_TRIGGERS.values():
+                cursor.execute(sql)
+
+            # Triggers vanish when a migration remakes the table on SQLite;
+            # re-index whatever changed while they were missing
+            if not set(SQLITE_TRIGGERS) <= existing:
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+                # Without statistics SQLite walks the whole (user, date) index
+                # instead of looking matched ids up by primary key
+                cursor.execute(f"ANALYZE {TABLE}")
+
+
+def uninstall_search_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("DROP INDEX IF EXISTS txn_note_trgm")
+            cursor.execute("DROP INDEX IF EXISTS txn_search_tsv")
+
+        elif connection.vendor == "sqlite":
+            for name in SQLITE_TRIGGERS:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def repair_search_index(connection):
+    """Put back SQLite triggers dropped when a migration remade the table."""
+    if connection.vendor == "sqlite" and FTS_TABLE in connection.introspection.table_names():
+        install_search_index(connection)
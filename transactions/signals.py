@@ -0,0 +1,28 @@
+# transactions/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+# Sent inside the writing transaction whenever ledger or budget rows change,
+# including the bulk queryset paths that bypass post_save/post_delete.
+# Receivers get `user_ids`: the users whose data changed.
+data_changed = Signal()
+
+
+@receiver(data_changed)
+def bump_data_version(sender, user_ids, **kwargs):
+    from .models import DataVersion
+
+    DataVersion.bump(user_ids)
+
+
+@receiver(post_save, sender="transactions.Budget")
+def budget_saved(sender, instance, **kwargs):
+    data_changed.send(sender=sender, user_ids={instance.user_id})
+
+
+@receiver(post_delete, sender="transactions.Budget")
+def budget_deleted(sender, instance, origin=None, **kwargs):
+    # Deleting the user cascades here too; there is nothing left to version
+    if getattr(origin, "model", type(origin)) is not sender:
+        return
+    data_changed.send(sender=sender, user_ids={instance.user_id})
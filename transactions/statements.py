@@ -0,0 +1,110 @@
+# transactions/statements.py
+"""
+Month-end PDF statements for every active user.
+
+Users are walked in id order in chunks. Each chunk costs three queries
+(user ids, data versions, rollups) whatever its size, and rendering runs
+in a pool of forked processes that never touch the database. Statements
+are written where the report view looks for them (report_path for the
+month and the user's data version), so downloads are immediate and a
+rerun skips every file already written: an interrupted run resumes.
+"""
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from django.contrib.auth.models import User
+from django.db import connections
+
+from .models import DataVersion
+from .reports import report_path, reports_data, write_report
+
+CHUNK_SIZE = 200
+
+
+def _render(job):
+    path, data, month = job
+    pages = write_report(path, data, month, month)
+    # ru_maxrss is in KiB on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return os.getpid(), pages, peak
+
+
+def _preload():
+    # Imported before forking, so workers share the loaded modules
+    import matplotlib.backends.backend_agg  # noqa: F401
+    import reportlab.platypus  # noqa: F401
+
+
+def _jobs(chunk, month):
+    versions = dict(
+        DataVersion.objects.filter(user_id__in=chunk).values_list("user_id", "version")
+    )
+    data = reports_data(chunk, month, month)
+
+    jobs, skipped, empty = [], 0, 0
+    for user_id in chunk:
+        report = data[user_id]
+        if not report["categories"] and not any(row["income"] for row in report["months"]):
+            empty += 1
+            continue
+        path = report_path(user_id, month, month, versions.get(user_id, 0))
+        if path.exists():
+            skipped += 1
+            continue
+        jobs.append((path, report, month))
+    return jobs, skipped, empty
+
+
+def generate_statements(month, workers=None, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Write `month`'s statement for every active user with activity in it.
+    Returns {"users", "written", "skipped", "empty", "pages", "seconds",
+    "peak_memory"}, the last mapping worker pid -> peak RSS in bytes.
+    """
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    stats = {
+        "users": 0, "written": 0, "skipped": 0, "empty": 0, "pages": 0,
+        "seconds": 0.0, "peak_memory": {},
+    }
+
+    _preload()
+    pool = ProcessPoolExecutor(workers, mp_context=get_context("fork")) if workers > 1 else None
+    render = pool.map if pool else map
+
+    users = User.objects.filter(is_active=True).order_by("id").values_list("id", flat=True)
+    last_id = 0
+    forked = False
+    try:
+        while True:
+            chunk = list(users.filter(id__gt=last_id)[:chunk_size])
+            if not chunk:
+                break
+            last_id = chunk[-1]
+
+            jobs, skipped, empty = _jobs(chunk, month)
+            if pool and jobs and not forked:
+                # Workers fork on the first map with work to do; they must
+                # not inherit the connection _jobs just used
+                connections.close_all()
+                forked = True
+            for pid, pages, peak in render(_render, jobs):
+                stats["pages"] += pages
+                stats["peak_memory"][pid] = max(peak, stats["peak_memory"].get(pid, 0))
+
+            stats["users"] += len(chunk)
+            stats["written"] += len(jobs)
+            stats["skipped"] += skipped
+            stats["empty"] += empty
+            stats["seconds"] = time.perf_counter() - started
+            if progress:
+                progress(stats)
+    finally:
+        if pool:
+            pool.shutdown()
+
+    stats["seconds"] = time.perf_counter() - started
+    return stats
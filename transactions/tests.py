@@ -0,0 +1,1129 @@
+from datetime import date, timedelta
+from io import StringIO
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .models import MonthlyRollup, Transaction
+
+
+def rollup_totals(user):
+    return {
+        (r.year, r.month, r.transaction_type, r.category): (r.total, r.count)
+        for r in MonthlyRollup.objects.filter(user=user)
+    }
+
+
+class MonthlyRollupTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="rollup", password="pass12345")
+
+    def _add(self, amount, category="Food", day=date(2026, 3, 5), txn_type="EXPENSE"):
+        return Transaction.objects.create(
+            user=self.user, amount=Decimal(amount), category=category,
+            transaction_type=txn_type, date=day,
+        )
+
+    def test_save_edit_and_delete_keep_rollups_in_sync(self):
+        txn = self._add("100.00")
+        self._add("50.00")
+        self.assertEqual(
+            rollup_totals(self.user),
+            {(2026, 3, "EXPENSE", "Food"): (Decimal("150.00"), 2)},
+        )
+
+        txn = Transaction.objects.get(pk=txn.pk)
+        txn.date = date(2026, 2, 10)
+        txn.category = "travel"
+        txn.save()
+        self.assertEqual(
+            rollup_totals(self.user),
+            {
+                (2026, 3, "EXPENSE", "Food"): (Decimal("50.00"), 1),
+                (2026, 2, "EXPENSE", "Travel"): (Decimal("100.00"), 1),
+            },
+        )
+
+        txn.delete()
+        self.assertEqual(
+            rollup_totals(self.user),
+            {(2026, 3, "EXPENSE", "Food"): (Decimal("50.00"), 1)},
+        )
+
+    def test_bulk_paths_match_a_full_rebuild(self):
+        Transaction.objects.bulk_create([
+            Transaction(user=self.user, amount=Decimal("10"), category="Food",
+                        transaction_type="EXPENSE", date=date(2026, 3, d))
+            for d in range(1, 11)
+        ])
+        self._add("500.00", category="Salary", txn_type="INCOME")
+
+        Transaction.objects.filter(user=self.user, date__day__lte=3).delete()
+        Transaction.objects.filter(user=self.user, date__day=4).update(category="Rent")
+
+        incremental = rollup_totals(self.user)
+        call_command("rebuild_rollups", stdout=StringIO())
+        self.assertEqual(incremental, rollup_totals(self.user))
+        self.assertEqual(incremental[(2026, 3, "EXPENSE", "Food")], (Decimal("60.00"), 6))
+
+    def test_many_buckets_use_bulk_rollup_writes(self):
+        self._add("1.00", category="Cat 0")
+
+        rows = [
+            Transaction(user=self.user, amount=Decimal("2"), category=f"Cat {i % 20}",
+                        transaction_type="EXPENSE", date=date(2026, 3, 1 + i % 28))
+            for i in range(200)
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            Transaction.objects.bulk_create(rows)
+
+        # One read, one bulk update and one bulk insert for 20 buckets
+        rollup_queries = [q for q in ctx.captured_queries if "monthlyrollup" in q["sql"]]
+        self.assertEqual(len(rollup_queries), 3)
+
+        incremental = rollup_totals(self.user)
+        call_command("rebuild_rollups", stdout=StringIO())
+        self.assertEqual(incremental, rollup_totals(self.user))
+        self.assertEqual(incremental[(2026, 3, "EXPENSE", "Cat 0")], (Decimal("21.00"), 11))
+
+
+class StatementImportTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="importer", password="pass12345")
+
+    def test_csv_import_is_idempotent(self):
+        from io import BytesIO
+        from .importers import import_statement
+
+        statement = (
+            "Date,Narration,Debit,Credit\n"
+            "05/03/2026,Tea coffee,40.00,\n"
+            "05/03/2026,Tea coffee,40.00,\n"
+            "06/03/2026,Salary credit,,50000.00\n"
+            "bad date,Oops,1.00,\n"
+            # Not grouped by date: still a third, distinct tea
+            "05/03/2026,Tea coffee,40.00,\n"
+        ).encode()
+
+        stats = import_statement(self.user, BytesIO(statement), name="march.csv", chunk_size=2)
+        self.assertEqual((stats["rows"], stats["created"], stats["skipped"]), (4, 4, 0))
+        self.assertEqual(len(stats["errors"]), 1)
+
+        stats = import_statement(self.user, BytesIO(statement), name="march.csv")
+        self.assertEqual((stats["created"], stats["skipped"]), (0, 4))
+
+        self.assertEqual(
+            rollup_totals(self.user)[(2026, 3, "EXPENSE", "Food")],
+            (Decimal("120.00"), 3),
+        )
+
+    def test_parenthesized_amounts_are_debits(self):
+        from .importers import ImportRowError, parse_amount
+
+        self.assertEqual(parse_amount("(1,234.50)"), Decimal("-1234.50"))
+        self.assertEqual(parse_amount(" ₹ 40 "), Decimal("40"))
+        with self.assertRaises(ImportRowError):
+            parse_amount("(-5.00)")
+
+    def test_concurrent_import_skips_rows_it_lost_the_race_for(self):
+        from io import BytesIO
+        from unittest import mock
+        from . import importers
+
+        statement = (
+            "Date,Narration,Debit,Credit\n"
+            "05/03/2026,Tea coffee,40.00,\n"
+            "06/03/2026,Bus pass,90.00,\n"
+        ).encode()
+        importers.import_statement(self.user, BytesIO(statement), name="march.csv")
+
+        # The other import commits between this one's lookup and its insert
+        real = importers._imported
+        lookups = []
+
+        def stale_first_lookup(user, fingerprints):
+            lookups.append(fingerprints)
+            return real(user, fingerprints) if len(lookups) > 1 else Transaction.objects.none()
+
+        with mock.patch("transactions.importers._imported", side_effect=stale_first_lookup):
+            stats = importers.import_statement(
+                self.user, BytesIO(statement + b"07/03/2026,Lunch,120.00,\n"), name="march.csv",
+            )
+
+        self.assertEqual((stats["created"], stats["skipped"]), (1, 2))
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(
+            sum(count for _, count in rollup_totals(self.user).values()), 3,
+        )
+
+    @override_settings(
+        IMPORT_MAX_UPLOAD_BYTES=40,
+        STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage",
+    )
+    def test_upload_page_rejects_large_files(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from django.urls import reverse
+
+        self.client.force_login(self.user)
+        statement = b"Date,Narration,Debit,Credit\n05/03/2026,Tea coffee,40.00,\n"
+        response = self.client.post(
+            reverse("transactions:import_transactions"),
+            {"statement": SimpleUploadedFile("big.csv", statement)},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("statement", response.context["form"].errors)
+        self.assertFalse(Transaction.objects.filter(user=self.user).exists())
+
+    @override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+    def test_upload_page_reports_unreadable_files(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from django.urls import reverse
+
+        self.client.force_login(self.user)
+        statement = b"Date,Narration,Debit\n05/03/2026," + b"x" * 200_000 + b",40.00\n"
+        response = self.client.post(
+            reverse("transactions:import_transactions"),
+            {"statement": SimpleUploadedFile("march.csv", statement)},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Couldn't read this file", response.context["form"].errors["statement"][0])
+
+        # Stray NUL bytes are dropped, not sent to the database
+        statement = b"Date,Narration,Debit\n05/03/2026,Tea\x00 coffee,40.00\n"
+        self.client.post(
+            reverse("transactions:import_transactions"),
+            {"statement": SimpleUploadedFile("march.csv", statement)},
+        )
+        self.assertEqual(Transaction.objects.get(user=self.user).note, "Tea coffee")
+
+    def test_ofx_import(self):
+        from io import BytesIO
+        from .importers import import_statement
+
+        statement = (
+            "OFXHEADER:100\nDATA:OFXSGML\n\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>"
+            "<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20260307120000[-5:EST]<TRNAMT>-120.50"
+            "<FITID>1<NAME>Bus pass</STMTTRN>"
+            "<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20260308<TRNAMT>900.00"
+            "<FITID>2<NAME>Refund</STMTTRN>"
+            "</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>"
+        ).encode()
+
+        stats = import_statement(self.user, BytesIO(statement), name="statement.ofx")
+        self.assertEqual(stats["created"], 2)
+
+        bus = Transaction.objects.get(user=self.user, note="Bus pass")
+        self.assertEqual(
+            (bus.date, bus.amount, bus.transaction_type),
+            (date(2026, 3, 7), Decimal("120.50"), "EXPENSE"),
+        )
+
+
+class ExportTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="exporter", password="pass12345")
+        other = User.objects.create_user(username="other", password="pass12345")
+        self.client.force_login(self.user)
+
+        for owner, amount, txn_type, day, note in [
+            (self.user, "40.00", "EXPENSE", date(2026, 3, 5), 'Tea, "coffee"'),
+            (self.user, "900.00", "INCOME", date(2026, 3, 6), "Refund"),
+            (self.user, "15.00", "EXPENSE", date(2026, 4, 1), "Bus"),
+            (other, "99.00", "EXPENSE", date(2026, 3, 5), "Not mine"),
+        ]:
+            Transaction.objects.create(
+                user=owner, amount=Decimal(amount), category="Misc",
+                transaction_type=txn_type, date=day, note=note,
+            )
+
+    def _download(self, name, **params):
+        from django.urls import reverse
+
+        response = self.client.get(reverse(f"transactions:{name}"), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_export_applies_list_filters(self):
+        import csv
+
+        rows = list(csv.reader(StringIO(
+            self._download("export_csv", type="expense", start="2026-03-01", end="2026-03-31")
+        )))
+        self.assertEqual(rows, [
+            ["date", "transaction_type", "category", "amount", "note"],
+            ["2026-03-05", "EXPENSE", "Misc", "40.00", 'Tea, "coffee"'],
+        ])
+
+    async def test_exports_stream_asynchronously_under_asgi(self):
+        from asgiref.sync import sync_to_async
+        from django.urls import reverse
+
+        await sync_to_async(self.async_client.force_login)(self.user)
+        response = await self.async_client.get(reverse("transactions:export_csv"))
+        # An async iterator, not a sync one Django 4.2 would read into memory
+        self.assertTrue(response.is_async)
+        body = b"".join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertEqual(len(body.splitlines()), 4)
+
+    def test_jsonl_export_streams_full_history(self):
+        import json
+
+        lines = self._download("export_jsonl", start="not-a-date").splitlines()
+        self.assertEqual(
+            [json.loads(line)["note"] for line in lines],
+            ['Tea, "coffee"', "Refund", "Bus"],
+        )
+
+
+class KeysetPaginationTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="pager", password="pass12345")
+        # Several rows share a date so the id tie-break matters
+        Transaction.objects.bulk_create([
+            Transaction(user=self.user, amount=Decimal("1"), category="Misc",
+                        transaction_type="EXPENSE", date=date(2026, 3, 1 + i // 3))
+            for i in range(10)
+        ])
+        self.qs = Transaction.objects.filter(user=self.user)
+        self.expected = list(self.qs.order_by("-date", "-id").values_list("pk", flat=True))
+
+    def test_forward_and_backward_pages(self):
+        from .pagination import KeysetPage
+
+        seen, token, pages = [], None, []
+        while True:
+            page = KeysetPage(self.qs, token, per_page=4)
+            pages.append(page)
+            seen += [txn.pk for txn in page]
+            if not page.has_next():
+                break
+            token = page.next_token
+
+        self.assertEqual(seen, self.expected)
+        self.assertEqual([len(p) for p in pages], [4, 4, 2])
+        self.assertFalse(pages[0].has_previous())
+
+        back = KeysetPage(self.qs, pages[2].previous_token, per_page=4)
+        self.assertEqual([txn.pk for txn in back], self.expected[4:8])
+        self.assertTrue(back.has_previous() and back.has_next())
+
+        first = KeysetPage(self.qs, back.previous_token, per_page=4)
+        self.assertEqual([txn.pk for txn in first], self.expected[:4])
+        self.assertFalse(first.has_previous())
+
+    def test_pages_issue_no_count_and_bad_tokens_fall_back(self):
+        from .pagination import KeysetPage
+
+        with CaptureQueriesContext(connection) as ctx:
+            list(KeysetPage(self.qs, KeysetPage(self.qs, per_page=4).next_token, per_page=4))
+        self.assertFalse(any("COUNT(" in q["sql"] for q in ctx.captured_queries))
+        self.assertFalse(any("OFFSET" in q["sql"] for q in ctx.captured_queries))
+
+        page = KeysetPage(self.qs, "not-a-token", per_page=4)
+        self.assertEqual([txn.pk for txn in page], self.expected[:4])
+
+
+class SearchTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="searcher", password="pass12345")
+        self.client.force_login(self.user)
+
+        for note, category, txn_type, day in [
+            ("Swiggy order 375", "Food", "EXPENSE", date(2026, 3, 2)),
+            ("Swiggy swiggy instamart", "Groceries", "EXPENSE", date(2026, 3, 9)),
+            ("Uber to airport", "Travel", "EXPENSE", date(2026, 2, 20)),
+            ("Salary March", "Salary", "INCOME", date(2026, 3, 1)),
+        ]:
+            Transaction.objects.create(
+                user=self.user, amount=Decimal("10"), category=category,
+                transaction_type=txn_type, date=day, note=note,
+            )
+
+    def _notes(self, query, **filters):
+        from .filters import filter_transactions
+
+        qs = filter_transactions(Transaction.objects.filter(user=self.user), {"q": query, **filters})
+        return sorted(qs.values_list("note", flat=True))
+
+    def test_prefix_terms_and_filters_combine(self):
+        self.assertEqual(self._notes("swig"), ["Swiggy order 375", "Swiggy swiggy instamart"])
+        self.assertEqual(self._notes("swig ord"), ["Swiggy order 375"])
+        self.assertEqual(self._notes("groc"), ["Swiggy swiggy instamart"])
+        self.assertEqual(self._notes("swiggy", start="2026-03-05"), ["Swiggy swiggy instamart"])
+        self.assertEqual(self._notes("income"), ["Salary March"])
+        self.assertEqual(self._notes("zomato"), [])
+
+        # Word prefixes only: no substring matches inside a word
+        self.assertEqual(self._notes("wig"), [])
+
+    def test_other_users_rows_never_change_results(self):
+        from unittest import mock
+        from .search import ranked_search
+
+        other = User.objects.create_user(username="other", password="pass12345")
+        for i in range(3):
+            Transaction.objects.create(
+                user=other, amount=Decimal("1"), category="Food",
+                transaction_type="EXPENSE", note=f"Swiggy {i}",
+            )
+
+        qs = Transaction.objects.filter(user=self.user)
+        with mock.patch("transactions.search.SQLITE_SPARSE_LIMIT", 2):
+            self.assertEqual(self._notes("swig"), ["Swiggy order 375", "Swiggy swiggy instamart"])
+            self.assertEqual(self._notes("wig"), [])
+            # Only the caller's two matches count towards the limit
+            self.assertTrue(all(txn.rank > 0 for txn in ranked_search(qs, "swiggy")))
+
+        # Past the limit, ranked search still uses the same match
+        with mock.patch("transactions.search.SQLITE_SPARSE_LIMIT", 1):
+            rows = ranked_search(qs, "swig")
+            self.assertEqual([txn.note for txn in rows], ["Swiggy swiggy instamart", "Swiggy order 375"])
+            self.assertEqual(ranked_search(qs, "wig"), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        txn = Transaction.objects.get(note="Uber to airport")
+        txn.note = "Ola to airport"
+        txn.save()
+        self.assertEqual(self._notes("uber"), [])
+        self.assertEqual(self._notes("ola"), ["Ola to airport"])
+
+        Transaction.objects.filter(note__startswith="Swiggy").delete()
+        self.assertEqual(self._notes("swiggy"), [])
+
+    def test_search_api_is_ranked(self):
+        from django.urls import reverse
+
+        # bm25 needs the term to be rare in the corpus to score it at all
+        for i in range(6):
+            Transaction.objects.create(
+                user=self.user, amount=Decimal("1"), category="Misc",
+                transaction_type="EXPENSE", note=f"Misc {i}",
+            )
+
+        response = self.client.get(reverse("transactions:search_api"), {"q": "swiggy"})
+        results = response.json()["results"]
+        self.assertEqual(
+            [r["note"] for r in results],
+            ["Swiggy swiggy instamart", "Swiggy order 375"],
+        )
+        self.assertGreater(results[0]["rank"], results[1]["rank"])
+
+
+class DataVersionTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="versioned", password="pass12345")
+
+    def _version(self):
+        from .models import DataVersion
+
+        return DataVersion.current(self.user.pk)
+
+    def test_every_write_path_bumps_the_version(self):
+        from .models import Budget
+
+        versions = [self._version()]
+        txn = Transaction.objects.create(
+            user=self.user, amount=Decimal("5"), category="Food", transaction_type="EXPENSE",
+        )
+        versions.append(self._version())
+        Transaction.objects.bulk_create([
+            Transaction(user=self.user, amount=Decimal("1"), category="Food", transaction_type="EXPENSE"),
+        ])
+        versions.append(self._version())
+        Transaction.objects.filter(pk=txn.pk).update(note="edited")
+        versions.append(self._version())
+        Transaction.objects.filter(user=self.user).delete()
+        versions.append(self._version())
+        budget = Budget.objects.create(user=self.user, category="Food", limit=Decimal("100"))
+        versions.append(self._version())
+        budget.delete()
+        versions.append(self._version())
+
+        self.assertEqual(versions, sorted(set(versions)))
+
+    def test_deleting_the_user_cascades_cleanly(self):
+        from .models import Budget, DataVersion
+
+        Budget.objects.create(user=self.user, category="Food", limit=Decimal("100"))
+        self.user.delete()
+        self.assertFalse(DataVersion.objects.exists())
+
+
+class CategoryChartTestCase(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(username="charts", password="pass12345")
+        self.client.force_login(self.user)
+
+    def _expense(self, amount):
+        Transaction.objects.create(
+            user=self.user, amount=Decimal(amount), category="Food", transaction_type="EXPENSE",
+        )
+
+    def test_renders_are_cached_and_revalidated(self):
+        from unittest import mock
+        from django.urls import reverse
+        from insights.charts import render_category_chart
+
+        url = reverse("transactions:expense_category_chart")
+        self.assertEqual(self.client.get(url).status_code, 204)
+
+        self._expense("40.00")
+        with mock.patch(
+            "transactions.views.render_category_chart", wraps=render_category_chart
+        ) as render:
+            first = self.client.get(url)
+            second = self.client.get(url)
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+            self.assertEqual(render.call_count, 1)
+
+            self._expense("10.00")
+            changed = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+            self.assertEqual(render.call_count, 2)
+
+        self.assertEqual(first["Content-Type"], "image/png")
+        self.assertTrue(first.content.startswith(b"\x89PNG"))
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], first["ETag"])
+
+
+class ConditionalGetTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="poller", password="pass12345")
+        self.client.force_login(self.user)
+        Transaction.objects.create(
+            user=self.user, amount=Decimal("40"), category="Food", transaction_type="EXPENSE",
+        )
+
+    def test_unchanged_poll_is_not_modified_without_aggregating(self):
+        from django.urls import reverse
+
+        url = reverse("transactions:chart_data")
+        first = self.client.get(url)
+        self.assertEqual(first.json()["expense"], 40.0)
+        self.assertIn("no-cache", first["Cache-Control"])
+
+        # Only the session/user and DataVersion lookups – no rollup query
+        with CaptureQueriesContext(connection) as ctx:
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(cached.status_code, 304)
+        self.assertFalse(any("monthlyrollup" in q["sql"] for q in ctx.captured_queries))
+
+        since = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual(since.status_code, 304)
+
+        Transaction.objects.create(
+            user=self.user, amount=Decimal("10"), category="Food", transaction_type="EXPENSE",
+        )
+        fresh = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(fresh.status_code, 200)
+        self.assertEqual(fresh.json()["expense"], 50.0)
+
+    def test_search_etag_varies_with_the_query(self):
+        from django.urls import reverse
+
+        url = reverse("transactions:search_api")
+        food = self.client.get(url, {"q": "food"})
+        self.assertEqual(
+            self.client.get(url, {"q": "food"}, HTTP_IF_NONE_MATCH=food["ETag"]).status_code, 304
+        )
+        self.assertEqual(
+            self.client.get(url, {"q": "rent"}, HTTP_IF_NONE_MATCH=food["ETag"]).status_code, 200
+        )
+
+
+@override_settings(GROQ_API_KEY="test")
+class AsyncChatTestCase(TestCase):
+
+    class FakeGroq:
+        prompts = []
+
+        def __init__(self, **kwargs):
+            self.chat = self.completions = self
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            pass
+
+        async def create(self, messages, stream=False, **kwargs):
+            from types import SimpleNamespace as NS
+
+            self.prompts.append(messages[0]["content"])
+            if not stream:
+                return NS(choices=[NS(message=NS(content=" Spend less. "))])
+
+            async def chunks():
+                for token in ["Spend", None, " less"]:
+                    yield NS(choices=[NS(delta=NS(content=token))])
+
+            return chunks()
+
+    def setUp(self):
+        from unittest import mock
+
+        self.user = User.objects.create_user(username="chatter", password="pass12345")
+        Transaction.objects.create(
+            user=self.user, amount=Decimal("1234.00"), category="Salary",
+            transaction_type="INCOME", date=date.today(),
+        )
+        self.async_client.force_login(self.user)
+        self.FakeGroq.prompts = []
+
+        from insights import llm
+
+        patcher = mock.patch("insights.llm.AsyncGroq", self.FakeGroq)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        llm.reset_clients()
+        self.addCleanup(llm.reset_clients)
+
+        from django.core.cache import caches
+
+        caches["chat"].clear()
+        self.addCleanup(caches["chat"].clear)
+
+    async def _post(self, name, message):
+        from django.urls import reverse
+
+        return await self.async_client.post(
+            reverse(f"transactions:{name}"),
+            data={"message": message},
+            content_type="application/json",
+        )
+
+    async def test_chat_api(self):
+        response = await self._post("chat_api", "How am I doing?")
+        self.assertEqual(response.json(), {"reply": "Spend less."})
+        self.assertIn("Income: ₹1234", self.FakeGroq.prompts[0])
+
+    async def test_chat_stream_is_async_and_saves_insight(self):
+        from insights.models import Insight
+
+        response = await self._post("chat_stream", "Tips?")
+        self.assertTrue(response.is_async)
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(body.decode(), "Spend less")
+        self.assertEqual(
+            await Insight.objects.filter(user=self.user).values_list("text", flat=True).aget(),
+            "Spend less",
+        )
+
+    async def test_repeated_questions_are_answered_from_cache(self):
+        from ai_finance_tracker import metrics
+
+        hits = metrics.value("chat_cache_hits_total", mode="chat")
+        first = await self._post("chat_api", "How much did I spend?")
+        again = await self._post("chat_api", "  how much did I SPEND ")
+        self.assertEqual(again.json(), first.json())
+        self.assertEqual(len(self.FakeGroq.prompts), 1)
+        self.assertEqual(metrics.value("chat_cache_hits_total", mode="chat"), hits + 1)
+
+        # New numbers, new prompt
+        await Transaction.objects.acreate(
+            user=self.user, amount=Decimal("10.00"), category="Food",
+            transaction_type="EXPENSE", date=date.today(),
+        )
+        await self._post("chat_api", "How much did I spend?")
+        self.assertEqual(len(self.FakeGroq.prompts), 2)
+
+    async def test_cached_stream_is_replayed(self):
+        async def stream():
+            response = await self._post("chat_stream", "Tips?")
+            self.assertTrue(response.is_async)
+            return [chunk async for chunk in response.streaming_content]
+
+        live = await stream()
+        replayed = await stream()
+        self.assertEqual(len(self.FakeGroq.prompts), 1)
+        self.assertEqual(b"".join(replayed), b"".join(live))
+        self.assertEqual(replayed, [b"Spend ", b"less"])
+
+    async def test_login_and_method_required(self):
+        from django.test import AsyncClient
+        from django.urls import reverse
+
+        url = reverse("transactions:chat_api")
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 405)
+
+        response = await AsyncClient().post(url, {}, content_type="application/json")
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.FakeGroq.prompts, [])
+
+
+class RecurringRunnerTestCase(TestCase):
+
+    def setUp(self):
+        from .models import RecurringTransaction
+
+        self.user = User.objects.create_user(username="recurring")
+        self.rent = RecurringTransaction.objects.create(
+            user=self.user, amount=Decimal("500.00"), category="rent",
+            transaction_type="EXPENSE", day_of_month=31,
+        )
+
+    def _run(self, day):
+        from .recurring import run_recurring
+
+        return run_recurring(day)
+
+    def _dates(self):
+        return list(
+            Transaction.objects.filter(user=self.user).order_by("date").values_list("date", flat=True)
+        )
+
+    def test_first_run_only_adds_an_occurrence_due_today(self):
+        self._run(date(2026, 1, 30))
+        self.assertEqual(self._dates(), [])
+        self._run(date(2026, 1, 31))
+        self.assertEqual(self._dates(), [date(2026, 1, 31)])
+
+    def test_catches_up_missed_months_with_month_end_clamping(self):
+        self._run(date(2026, 1, 31))
+        stats = self._run(date(2026, 5, 2))
+
+        self.assertEqual(stats["rows"], 3)
+        self.assertEqual(self._dates(), [
+            date(2026, 1, 31), date(2026, 2, 28), date(2026, 3, 31), date(2026, 4, 30),
+        ])
+        self.assertEqual(
+            rollup_totals(self.user)[(2026, 4, "EXPENSE", "Rent")], (Decimal("500.00"), 1)
+        )
+
+    def test_repeated_and_stale_runs_add_nothing(self):
+        self._run(date(2026, 1, 31))
+        self._run(date(2026, 1, 31))
+
+        # A runner that lost track of its progress re-materializes the same
+        # occurrences; the fingerprints keep them out
+        self.rent.__class__.objects.update(last_run_date=date(2026, 1, 1))
+        self._run(date(2026, 1, 31))
+
+        self.assertEqual(self._dates(), [date(2026, 1, 31)])
+        self.assertEqual(rollup_totals(self.user)[(2026, 1, "EXPENSE", "Rent")][1], 1)
+
+    def test_generated_rows_are_not_training_labels(self):
+        from unittest import mock
+
+        with mock.patch("transactions.models.record_labels") as record_labels:
+            self._run(date(2026, 1, 31))
+            self._run(date(2026, 4, 30))
+        self.assertEqual(len(self._dates()), 4)
+        record_labels.assert_not_called()
+        self.assertFalse(Transaction.objects.user_labeled().exists())
+
+    def test_command(self):
+        out = StringIO()
+        call_command("run_recurring", "--date", "2026-02-28", stdout=out)
+        self.assertIn("1 recurring entries due", out.getvalue())
+        self.assertEqual(self._dates(), [date(2026, 2, 28)])
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class PdfReportTestCase(TestCase):
+
+    def setUp(self):
+        import tempfile
+
+        report_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(report_dir.cleanup)
+        self.enterContext(override_settings(REPORT_DIR=report_dir.name))
+        self.report_dir = report_dir.name
+
+        self.user = User.objects.create_user(username="reports", password="pass12345")
+        self.client.force_login(self.user)
+        for day, amount, txn_type, category in [
+            (date(2026, 1, 5), "1000.00", "INCOME", "Salary"),
+            (date(2026, 1, 9), "300.00", "EXPENSE", "Food"),
+            (date(2026, 3, 2), "200.00", "EXPENSE", "Rent"),
+            (date(2026, 4, 1), "999.00", "EXPENSE", "Food"),
+        ]:
+            Transaction.objects.create(
+                user=self.user, date=day, amount=Decimal(amount),
+                transaction_type=txn_type, category=category,
+            )
+
+    def test_period_is_parsed_ordered_and_capped(self):
+        from .reports import report_period
+
+        today = date(2026, 5, 20)
+        self.assertEqual(report_period({}, today), (date(2026, 5, 1), date(2026, 5, 1)))
+        self.assertEqual(
+            report_period({"start": "2026-03", "end": "2026-01"}, today),
+            (date(2026, 1, 1), date(2026, 3, 1)),
+        )
+        self.assertEqual(
+            report_period({"start": "junk", "end": ""}, today),
+            (date(2026, 5, 1), date(2026, 5, 1)),
+        )
+        self.assertEqual(
+            report_period({"start": "2000-01", "end": "2026-12"}, today),
+            (date(2025, 1, 1), date(2026, 12, 1)),
+        )
+
+    def test_data_covers_every_month_in_range(self):
+        from .reports import report_data
+
+        with self.assertNumQueries(1):
+            data = report_data(self.user.pk, date(2026, 1, 1), date(2026, 3, 1))
+
+        self.assertEqual(
+            [(row["month"].month, row["income"], row["expense"]) for row in data["months"]],
+            [(1, Decimal("1000"), Decimal("300")), (2, 0, 0), (3, 0, Decimal("200"))],
+        )
+        self.assertEqual(
+            [(row["category"], row["total"]) for row in data["categories"]],
+            [("Food", Decimal("300")), ("Rent", Decimal("200"))],
+        )
+
+    def test_report_is_built_once_per_data_version(self):
+        from pathlib import Path
+        from unittest import mock
+        from django.urls import reverse
+        from .reports import build_report
+
+        url = reverse("transactions:monthly_pdf") + "?start=2026-01&end=2026-03"
+        # Build inline: a background thread can't see the test transaction
+        with mock.patch("transactions.pdf.schedule_report", side_effect=build_report) as schedule:
+            pending = self.client.get(url)
+            ready = self.client.get(url)
+            again = self.client.get(url)
+            self.assertEqual(schedule.call_count, 1)
+
+            Transaction.objects.create(
+                user=self.user, date=date(2026, 2, 1), amount=Decimal("50.00"),
+                transaction_type="EXPENSE", category="Food",
+            )
+            stale = self.client.get(url)
+            self.assertEqual(schedule.call_count, 2)
+
+        self.assertEqual(pending.status_code, 202)
+        self.assertEqual(pending["Cache-Control"], "no-store")
+        self.assertFalse(pending.has_header("ETag"))
+        self.assertEqual(ready.status_code, 200)
+        self.assertTrue(ready.has_header("ETag"))
+        self.assertEqual(
+            ready["Content-Disposition"], 'attachment; filename="Finance_Report_2026_01-2026_03.pdf"'
+        )
+        self.assertTrue(b"".join(ready.streaming_content).startswith(b"%PDF"))
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(stale.status_code, 202)
+        # The superseded render was removed
+        self.assertEqual(len(list(Path(self.report_dir).glob("*/*.pdf"))), 1)
+
+    def test_failed_render_is_reported_not_requeued(self):
+        from unittest import mock
+        from django.urls import reverse
+        from .reports import record_failure, report_path
+
+        def fail(user_id, start, end, version):
+            record_failure(report_path(user_id, start, end, version), RuntimeError("boom"))
+
+        url = reverse("transactions:monthly_pdf") + "?start=2026-01&end=2026-01"
+        with mock.patch("transactions.pdf.schedule_report", side_effect=fail) as schedule:
+            self.assertEqual(self.client.get(url).status_code, 202)
+            failed = self.client.get(url)
+            self.assertEqual(failed.status_code, 500)
+            self.assertContains(failed, "couldn't be generated", status_code=500)
+            self.assertEqual(self.client.get(url).status_code, 500)
+            self.assertEqual(schedule.call_count, 1)
+
+            retry = self.client.get(url + "&retry=1")
+            self.assertRedirects(retry, url, status_code=302, target_status_code=500)
+            self.assertEqual(schedule.call_count, 2)
+
+    def test_requires_login(self):
+        from django.urls import reverse
+
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse("transactions:monthly_pdf")).status_code, 302)
+
+    def test_bulk_statements_resume_and_skip_inactive_months(self):
+        from .models import DataVersion
+        from .reports import report_path
+        from .statements import generate_statements
+
+        User.objects.create_user(username="quiet")
+        month = date(2026, 1, 1)
+
+        with self.assertNumQueries(4):
+            first = generate_statements(month, workers=1, chunk_size=10)
+        again = generate_statements(month, workers=1)
+
+        self.assertEqual((first["users"], first["written"], first["empty"]), (2, 1, 1))
+        self.assertGreaterEqual(first["pages"], 1)
+        self.assertEqual((again["written"], again["skipped"]), (0, 1))
+        version = DataVersion.current(self.user.pk)
+        self.assertTrue(report_path(self.user.pk, month, month, version).exists())
+
+        # The web view serves the bulk-rendered file straight away
+        from django.urls import reverse
+        response = self.client.get(reverse("transactions:monthly_pdf") + "?start=2026-01")
+        self.assertEqual(response.status_code, 200)
+
+    def test_statements_command_validates_month(self):
+        from django.core.management.base import CommandError
+
+        with self.assertRaises(CommandError):
+            call_command("generate_statements", month="2026-13", stdout=StringIO())
+
+        out = StringIO()
+        call_command("generate_statements", month="2026-03", workers=1, stdout=out)
+        self.assertIn("1 written", out.getvalue())
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class PlatformStatsTestCase(TestCase):
+
+    def setUp(self):
+        from django.utils import timezone
+
+        self.today = timezone.localdate()
+        self.alice = User.objects.create_user(username="alice")
+        self.bob = User.objects.create_user(username="bob")
+        for user, days_ago, amount, txn_type in [
+            (self.alice, 0, "100.00", "INCOME"),
+            (self.alice, 0, "40.00", "EXPENSE"),
+            (self.bob, 0, "5.00", "EXPENSE"),
+            (self.bob, 3, "7.50", "EXPENSE"),
+            (self.bob, 400, "1.00", "EXPENSE"),
+        ]:
+            Transaction.objects.create(
+                user=user, date=self.today - timedelta(days=days_ago),
+                amount=Decimal(amount), transaction_type=txn_type, category="Misc",
+            )
+
+    def test_refresh_counts_days_months_and_totals(self):
+        from .models import PlatformStat
+        from .platform_stats import platform_series, refresh_platform_stats
+
+        totals = refresh_platform_stats(days=7)
+        self.assertEqual((totals.users, totals.transactions), (2, 5))
+        self.assertEqual((totals.income, totals.expense), (Decimal("100"), Decimal("53.5")))
+
+        days = {stat.start: stat for stat in platform_series(PlatformStat.DAY, 7)}
+        self.assertEqual(len(days), 7)
+        today = days[self.today]
+        self.assertEqual(
+            (today.signups, today.active_users, today.transactions, today.income, today.expense),
+            (2, 2, 3, Decimal("100"), Decimal("45")),
+        )
+        self.assertEqual(days[self.today - timedelta(days=3)].active_users, 1)
+        # Outside the window until a full refresh
+        self.assertFalse(PlatformStat.objects.filter(start__lt=self.today - timedelta(days=60)).exists())
+
+        refresh_platform_stats(full=True)
+        self.assertTrue(
+            PlatformStat.objects.filter(
+                period=PlatformStat.DAY, start=self.today - timedelta(days=400), transactions=1,
+            ).exists()
+        )
+
+        # A re-run updates rows in place
+        Transaction.objects.create(
+            user=self.alice, date=self.today, amount=Decimal("1.00"),
+            transaction_type="EXPENSE", category="Misc",
+        )
+        refresh_platform_stats(days=1)
+        self.assertEqual(PlatformStat.objects.get(period=PlatformStat.DAY, start=self.today).transactions, 4)
+        self.assertEqual(
+            PlatformStat.objects.filter(period=PlatformStat.DAY, start=self.today).count(), 1
+        )
+
+    def test_admin_dashboard_reads_stored_stats(self):
+        from django.urls import reverse
+
+        self.alice.is_staff = True
+        self.alice.save()
+        self.client.force_login(self.alice)
+        url = reverse("transactions:admin_dashboard")
+        call_command("refresh_platform_stats", stdout=StringIO())
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["totals"].transactions, 5)
+        self.assertEqual(len(response.context["daily_stats"]), 30)
+        ledger_reads = [
+            q["sql"] for q in queries
+            if 'FROM "transactions_transaction"' in q["sql"]
+            or 'FROM "transactions_monthlyrollup"' in q["sql"]
+        ]
+        self.assertEqual(ledger_reads, [])
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class AdminUsersTestCase(TestCase):
+
+    def setUp(self):
+        from .models import Budget
+
+        self.staff = User.objects.create_user(username="staff", is_staff=True)
+        self.client.force_login(self.staff)
+        self.users = [
+            User.objects.create_user(username=f"member{i:02d}", email=f"m{i}@example.com")
+            for i in range(12)
+        ]
+        for i, user in enumerate(self.users):
+            Transaction.objects.bulk_create([
+                Transaction(
+                    user=user, date=date(2026, 1, 1 + n), amount=Decimal("10.00"),
+                    transaction_type="EXPENSE", category="Food",
+                )
+                for n in range(i % 5)
+            ])
+        Budget.objects.create(user=self.users[3], category="Food", limit=Decimal("100"))
+
+    def _walk(self, sort, **params):
+        from unittest import mock
+        from django.urls import reverse
+
+        url = reverse("transactions:admin_users")
+        rows, cursor = [], None
+        with mock.patch("transactions.user_listing.PER_PAGE", 5):
+            while True:
+                response = self.client.get(url, {"sort": sort, "cursor": cursor or "", **params})
+                page = response.context["users"]
+                rows += list(page)
+                cursor = page.next_token
+                if not cursor:
+                    return rows
+
+    def test_rows_are_annotated_in_the_page_query(self):
+        from .user_listing import annotated_users
+
+        with self.assertNumQueries(1):
+            rows = {u.username: u for u in annotated_users()}
+        self.assertEqual(rows["member04"].txn_count, 4)
+        self.assertEqual(rows["member04"].volume, Decimal("40"))
+        self.assertEqual(rows["member03"].budget_count, 1)
+        self.assertEqual(rows["member05"].txn_count, 0)
+
+    def test_every_sort_walks_all_users_in_order(self):
+        for sort, key in [
+            ("-transactions", lambda u: u.txn_count),
+            ("volume", lambda u: u.volume),
+            ("-seen", lambda u: u.seen),
+            ("username", lambda u: u.username),
+        ]:
+            rows = self._walk(sort)
+            self.assertEqual(len(rows), 13, sort)
+            self.assertEqual(len({u.pk for u in rows}), 13, sort)
+            values = [key(u) for u in rows]
+            self.assertEqual(values, sorted(values, reverse=sort.startswith("-")), sort)
+
+    def test_search_and_page_query_count(self):
+        from django.urls import reverse
+
+        rows = self._walk("-joined", q="member1")
+        self.assertEqual({u.username for u in rows}, {"member10", "member11"})
+
+        url = reverse("transactions:admin_users")
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(url, {"q": "member1"})
+        with CaptureQueriesContext(connection) as full:
+            self.client.get(url)
+        self.assertEqual(len(small), len(full))
+
+    def test_bulk_actions_skip_superusers_and_self(self):
+        from django.urls import reverse
+
+        boss = User.objects.create_superuser(username="boss", password="x")
+        targets = [self.users[0].pk, self.users[1].pk, boss.pk, self.staff.pk]
+        url = reverse("transactions:bulk_users")
+
+        response = self.client.post(url, {"action": "ban", "user_ids": targets})
+        self.assertRedirects(response, reverse("transactions:admin_users"), fetch_redirect_response=False)
+        self.assertEqual(
+            set(User.objects.filter(is_active=False).values_list("pk", flat=True)),
+            {self.users[0].pk, self.users[1].pk},
+        )
+
+        self.client.post(url, {"action": "unban", "user_ids": targets})
+        self.assertFalse(User.objects.filter(is_active=False).exists())
+
+        self.client.post(url, {"action": "delete", "user_ids": targets, "next": "https://evil.example/"})
+        self.assertEqual(
+            set(User.objects.filter(pk__in=targets).values_list("pk", flat=True)),
+            {boss.pk, self.staff.pk},
+        )
+        self.assertFalse(MonthlyRollup.objects.filter(user_id=self.users[1].pk).exists())
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class RequestMetricsTestCase(TestCase):
+
+    def setUp(self):
+        from ai_finance_tracker import metrics
+
+        self.metrics = metrics
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+        self.user = User.objects.create_user(username="metered", is_staff=True)
+
+    def test_requests_are_timed_and_their_queries_counted(self):
+        from django.urls import reverse
+
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("transactions:budgets_list"))
+
+        view = "transactions:budgets_list"
+        self.assertEqual(self.metrics.value("http_request_duration_seconds", view=view), 1)
+        self.assertEqual(self.metrics.value("http_requests_total", view=view, status="2xx"), 1)
+        text = self.metrics.render()
+        self.assertIn("# TYPE http_request_db_queries histogram", text)
+        self.assertIn(f'http_request_db_queries_sum{{view="{view}"}} {len(queries)}', text)
+        self.assertIn(f'http_request_db_queries_count{{view="{view}"}} 1', text)
+        self.assertIn(f'http_request_duration_seconds_bucket{{view="{view}",le="+Inf"}} 1', text)
+
+    def test_async_views_count_queries_made_in_threads(self):
+        from asgiref.sync import async_to_sync, sync_to_async
+        from django.http import HttpResponse
+        from django.test import RequestFactory
+        from ai_finance_tracker.metrics import RequestMetricsMiddleware
+
+        async def view(request):
+            await sync_to_async(lambda: list(User.objects.all()))()
+            return HttpResponse()
+
+        middleware = RequestMetricsMiddleware(view)
+        async_to_sync(middleware)(RequestFactory().get("/nowhere/"))
+
+        self.assertIn('http_request_db_queries_sum{view="unmatched"} 1', self.metrics.render())
+
+    def test_endpoint_needs_staff_or_token(self):
+        from django.urls import reverse
+
+        url = reverse("metrics")
+        self.assertEqual(self.client.get(url).status_code, 302)
+        with override_settings(METRICS_TOKEN="s3cret"):
+            self.assertEqual(
+                self.client.get(url, HTTP_AUTHORIZATION="Bearer wrong").status_code, 302
+            )
+            scraped = self.client.get(url, HTTP_AUTHORIZATION="Bearer s3cret")
+        self.assertEqual(scraped.status_code, 200)
+        self.assertIn("http_requests_total", scraped.content.decode())
+
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(url).status_code, 200)
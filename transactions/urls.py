@@ -7,6 +7,8 @@ from .views import (
     edit_transaction,
     delete_transaction,
     all_transactions,
+    search_api,
+    import_transactions,
 
     # Charts / API
     chart_data,
@@ -22,6 +24,7 @@ from .views import (
     # Admin
     admin_dashboard,
     admin_users,
+    bulk_users,
     ban_user,
     unban_user,
     delete_user,
@@ -34,6 +37,7 @@ from .views import (
 )
 from .views import expense_category_chart
 from .pdf import monthly_pdf
+from .exports import export_csv, export_jsonl
 
 app_name = "transactions"
 
@@ -44,6 +48,9 @@ urlpatterns = [
     path("edit/<int:pk>/", edit_transaction, name="edit_transaction"),
     path("delete/<int:pk>/", delete_transaction, name="delete_transaction"),
     path("transactions/", all_transactions, name="all_transactions"),
+    path("import/", import_transactions, name="import_transactions"),
+    path("transactions/export.csv", export_csv, name="export_csv"),
+    path("transactions/export.jsonl", export_jsonl, name="export_jsonl"),
 
     # ================= BUDGETS =================
     path("budgets/", budgets_list, name="budgets_list"),
@@ -56,6 +63,7 @@ urlpatterns = [
     # ================= API =================
     path("api/chat/", chat_api, name="chat_api"),        # AJAX chat
     path("api/chart-data/", chart_data, name="chart_data"),
+    path("api/search/", search_api, name="search_api"),
 
     # ================= PDF =================
     path("pdf/", monthly_pdf, name="monthly_pdf"),
@@ -63,6 +71,7 @@ urlpatterns = [
     # ================= ADMIN =================
     path("admin-dashboard/", admin_dashboard, name="admin_dashboard"),
     path("admin-users/", admin_users, name="admin_users"),
+    path("admin-users/bulk/", bulk_users, name="bulk_users"),
     path("admin-users/ban/<int:user_id>/", ban_user, name="ban_user"),
     path("admin-users/unban/<int:user_id>/", unban_user, name="unban_user"),
     path("admin-users/delete/<int:user_id>/", delete_user, name="delete_user"),
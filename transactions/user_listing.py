@@ -0,0 +1,81 @@
+# transactions/user_listing.py
+"""
+The staff user listing: search, per-user stats and sortable keyset pages.
+
+Every row's stats come from correlated subqueries in the page query itself
+(transaction count and volume from MonthlyRollup, budget count, last seen),
+so a page costs one query whatever its size, with no GROUP BY fan-out
+across the joined tables.
+"""
+from datetime import datetime
+from decimal import Decimal
+from urllib.parse import urlencode
+
+from django.contrib.auth.models import User
+from django.db.models import Count, DecimalField, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Budget, MonthlyRollup
+from .pagination import KeysetPage
+
+PER_PAGE = 25
+
+# ?sort= name -> (field or annotation, parser for its cursor value)
+USER_SORTS = {
+    "joined": ("date_joined", datetime.fromisoformat),
+    "username": ("username", str),
+    "transactions": ("txn_count", int),
+    "volume": ("volume", Decimal),
+    "budgets": ("budget_count", int),
+    "seen": ("seen", datetime.fromisoformat),
+}
+DEFAULT_SORT = "-joined"
+
+
+def _per_user(queryset, aggregate, output_field=None):
+    rows = queryset.filter(user=OuterRef("pk")).order_by().values("user")
+    return Subquery(rows.annotate(value=aggregate).values("value"), output_field=output_field)
+
+
+def annotated_users():
+    money = DecimalField(max_digits=16, decimal_places=2)
+    return User.objects.annotate(
+        txn_count=Coalesce(_per_user(MonthlyRollup.objects, Sum("count")), 0),
+        volume=Coalesce(
+            _per_user(MonthlyRollup.objects, Sum("total"), money),
+            Value(Decimal("0.00")),
+            output_field=money,
+        ),
+        budget_count=Coalesce(_per_user(Budget.objects, Count("id")), 0),
+        last_seen=F("activity__last_seen"),
+        # Never seen sorts by signup time, keeping the keyset non-null
+        seen=Coalesce(F("activity__last_seen"), F("date_joined")),
+    )
+
+
+def user_page(params):
+    """
+    (page, sort, query) for ?q=&sort=&cursor=. `sort` is a USER_SORTS
+    name, '-' prefixed for descending; unknown values fall back to newest
+    signups first.
+    """
+    query = params.get("q", "").strip()
+    sort = params.get("sort") or DEFAULT_SORT
+    if sort.lstrip("-") not in USER_SORTS:
+        sort = DEFAULT_SORT
+    field, parse = USER_SORTS[sort.lstrip("-")]
+
+    users = annotated_users()
+    if query:
+        users = users.filter(Q(username__icontains=query) | Q(email__icontains=query))
+
+    page = KeysetPage(
+        users, params.get("cursor"), per_page=PER_PAGE,
+        field=field, parse=parse, descending=sort.startswith("-"),
+    )
+    return page, sort, query
+
+
+def listing_querystring(query, sort):
+    """Search and sort as a query string, for pagination and header links."""
+    return urlencode({name: value for name, value in (("q", query), ("sort", sort)) if value})
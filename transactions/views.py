@@ -10,25 +10,37 @@ from datetime import date, timedelta
 # ===============================
 from django.shortcuts import render, redirect, get_object_or_404
 from django.http import JsonResponse, StreamingHttpResponse, HttpResponse
-from django.db.models import Sum, Q
-from django.core.paginator import Paginator
+from django.db.models import Sum
 from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.models import User
-from django.views.decorators.http import require_POST
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils.http import url_has_allowed_host_and_scheme
 from django.utils.timezone import now
+from django.views.decorators.http import require_POST
 
 # ===============================
 # Local app imports
 # ===============================
-from .models import Transaction, Budget
-from .forms import TransactionForm, BudgetForm
+from ai_finance_tracker import metrics
+from .models import Transaction, Budget, MonthlyRollup, PlatformStat
+from .forms import TransactionForm, BudgetForm, StatementImportForm
+from .importers import import_statement, ImportRowError, UNREADABLE_ERRORS
+from .filters import transaction_filters, filter_transactions, filter_querystring
+from .pagination import KeysetPage
+from .search import ranked_search
+from .conditional import data_etag, user_data_condition
+from .platform_stats import platform_series, platform_totals
+from .user_listing import listing_querystring, user_page
+from .decorators import async_login_required, async_require_POST
 
 # Optional models (may not exist yet after DB reset)
 try:
     from accounts.models import UserActivity
+    from accounts.activity import flush_last_seen
 except Exception:
-    UserActivity = None
+    UserActivity = flush_last_seen = None
 
 # ===============================
 # Insights / AI services (OPTIONAL)
@@ -40,12 +52,18 @@ try:
     from insights.month_compare import month_comparison
     from insights.budget_progress import budget_progress
     from insights.budget_suggest import suggest_budgets
-    from insights.chat_engine import finance_chat, finance_chat_stream
+    from insights.chat_engine import afinance_chat, afinance_chat_stream
+    from insights.snapshot import MonthSnapshot
+    from insights.periods import month_filter
+    from insights.services import category_breakdown
+    from insights.charts import render_category_chart
 except Exception as e:
     print("INSIGHTS IMPORT ERROR:", e)
     monthly_summary = budget_alerts = financial_health_score = None
     month_comparison = budget_progress = suggest_budgets = None
-    finance_chat = finance_chat_stream = None
+    afinance_chat = afinance_chat_stream = None
+    MonthSnapshot = month_filter = None
+    category_breakdown = render_category_chart = None
 
 app_name="transactions"
 
@@ -69,22 +87,27 @@ def dashboard(request):
     budgets = []
 
     try:
+        # One ledger snapshot shared by every insight below
+        snapshot = MonthSnapshot(request.user, today) if MonthSnapshot else None
+
         if monthly_summary:
-            summary = monthly_summary(request.user, today.month, today.year) or summary
+            summary = monthly_summary(
+                request.user, today.month, today.year, snapshot=snapshot
+            ) or summary
             summary.setdefault("insights", [])
 
         if budget_alerts:
-            alerts = budget_alerts(request.user) or []
+            alerts = budget_alerts(request.user, snapshot=snapshot) or []
             summary["insights"].extend(alerts)
 
         if financial_health_score:
-            health = financial_health_score(request.user) or {}
+            health = financial_health_score(request.user, snapshot=snapshot) or {}
 
         if month_comparison:
-            comparison = month_comparison(request.user) or {}
+            comparison = month_comparison(request.user, snapshot=snapshot) or {}
 
         if budget_progress:
-            budgets = budget_progress(request.user) or []
+            budgets = budget_progress(request.user, snapshot=snapshot) or []
 
     except Exception as e:
         print("DASHBOARD ERROR:", e)
@@ -92,21 +115,13 @@ def dashboard(request):
     # Transactions list
     qs = Transaction.objects.filter(
         user=request.user,
-        date__month=today.month,
-        date__year=today.year,
+        **month_filter(today.year, today.month),
     )
 
     query = request.GET.get("q", "").strip()
-    if query:
-        qs = qs.filter(
-            Q(category__icontains=query)
-            | Q(note__icontains=query)
-            | Q(transaction_type__icontains=query)
-        )
+    qs = filter_transactions(qs, {"q": query})
 
-    transactions = Paginator(qs.order_by("-date"), 10).get_page(
-        request.GET.get("page")
-    )
+    transactions = KeysetPage(qs, request.GET.get("cursor"), per_page=10)
 
     return render(
         request,
@@ -157,32 +172,46 @@ def delete_transaction(request, pk):
 
 
 # =========================================================
-# CHART DATA
+# STATEMENT IMPORT
 # =========================================================
 @login_required
-def chart_data(request):
-    today = date.today()
+def import_transactions(request):
+    form = StatementImportForm(request.POST or None, request.FILES or None)
+    stats = None
+    error = None
 
-    income = (
-        Transaction.objects.filter(
-            user=request.user,
-            transaction_type="INCOME",
-            date__month=today.month,
-            date__year=today.year,
-        ).aggregate(total=Sum("amount"))["total"]
-        or 0
-    )
+    if request.method == "POST" and form.is_valid():
+        upload = form.cleaned_data["statement"]
+        try:
+            stats = import_statement(
+                request.user,
+                upload.file,
+                name=upload.name,
+                fmt=form.cleaned_data["file_format"] or None,
+            )
+        except ImportRowError as e:
+            error = str(e)
+        except UNREADABLE_ERRORS as e:
+            form.add_error("statement", f"Couldn't read this file ({e}).")
 
-    expense = (
-        Transaction.objects.filter(
-            user=request.user,
-            transaction_type="EXPENSE",
-            date__month=today.month,
-            date__year=today.year,
-        ).aggregate(total=Sum("amount"))["total"]
-        or 0
+    return render(
+        request,
+        "import_form.html",
+        {"form": form, "stats": stats, "error": error},
     )
 
+
+# =========================================================
+# CHART DATA
+# =========================================================
+@login_required
+@user_data_condition("chart-data")
+def chart_data(request):
+    # Reads the user's MonthlyRollup rows, not the raw ledger
+    snapshot = MonthSnapshot(request.user, date.today())
+    income = snapshot.income
+    expense = snapshot.expense
+
     return JsonResponse(
         {
             "income": float(income),
@@ -197,39 +226,66 @@ def chart_data(request):
 # =========================================================
 @login_required
 def all_transactions(request):
-    qs = Transaction.objects.filter(user=request.user)
+    filters = transaction_filters(request.GET)
+    qs = filter_transactions(Transaction.objects.filter(user=request.user), filters)
 
-    query = request.GET.get("q", "").strip()
-    if query:
-        qs = qs.filter(
-            Q(category__icontains=query)
-            | Q(note__icontains=query)
-            | Q(transaction_type__icontains=query)
-        )
+    # Exact and O(months) from the rollups unless text/date filters apply
+    total = None
+    if not (filters["q"] or filters["start"] or filters["end"]):
+        rollups = MonthlyRollup.objects.filter(user=request.user)
+        if filters["type"]:
+            rollups = rollups.filter(transaction_type=filters["type"])
+        total = rollups.aggregate(n=Sum("count"))["n"] or 0
 
-    start = request.GET.get("start")
-    end = request.GET.get("end")
-    if start:
-        qs = qs.filter(date__gte=start)
-    if end:
-        qs = qs.filter(date__lte=end)
-
-    transactions = Paginator(qs.order_by("-date"), 15).get_page(
-        request.GET.get("page")
-    )
+    transactions = KeysetPage(qs, request.GET.get("cursor"), per_page=15, total=total)
 
     return render(
         request,
         "all_transaction.html",
         {
             "transactions": transactions,
-            "query": query,
-            "start_date": start,
-            "end_date": end,
+            "query": filters["q"],
+            "start_date": filters["start"],
+            "end_date": filters["end"],
+            "txn_type": filters["type"],
+            "filter_query": filter_querystring(filters),
         },
     )
 
 
+@login_required
+@user_data_condition("search", vary_on_query=True)
+def search_api(request):
+    """Best matches first; combines with the same start/end/type filters."""
+    filters = transaction_filters(request.GET)
+    try:
+        limit = min(max(int(request.GET.get("limit", 20)), 1), 100)
+    except ValueError:
+        limit = 20
+
+    if not filters["q"]:
+        return JsonResponse({"query": "", "results": []})
+
+    # Date/type filters narrow the candidates; the query itself is ranked
+    qs = filter_transactions(
+        Transaction.objects.filter(user=request.user), {**filters, "q": ""}
+    )
+    results = [
+        {
+            "id": txn.id,
+            "date": txn.date.isoformat(),
+            "transaction_type": txn.transaction_type,
+            "category": txn.category,
+            "amount": str(txn.amount),
+            "note": txn.note,
+            "rank": txn.rank,
+        }
+        for txn in ranked_search(qs, filters["q"], limit)
+    ]
+
+    return JsonResponse({"query": filters["q"], "results": results})
+
+
 # =========================================================
 # BUDGETS
 # =========================================================
@@ -270,9 +326,10 @@ def delete_budget(request, budget_id):
 # =========================================================
 # AI CHAT (NEVER 500)
 # =========================================================
-@login_required
-@require_POST
-def chat_api(request):
+# Async: a chat holds no worker thread while waiting on the model (ASGI)
+@async_login_required
+@async_require_POST
+async def chat_api(request):
     try:
         data = json.loads(request.body or "{}")
         msg = (data.get("message") or "").strip()
@@ -280,10 +337,10 @@ def chat_api(request):
         if not msg:
             return JsonResponse({"reply": "Ask something 🙂"})
 
-        if not finance_chat:
+        if not afinance_chat:
             return JsonResponse({"reply": "AI is disabled."})
 
-        reply = finance_chat(request.user, msg)
+        reply = await afinance_chat(request.user, msg)
         return JsonResponse({"reply": reply or "⚠️ No response."})
 
     except Exception as e:
@@ -294,10 +351,10 @@ def chat_api(request):
         )
 
 
-@login_required
-@require_POST
-def chat_stream(request):
-    if not finance_chat_stream:
+@async_login_required
+@async_require_POST
+async def chat_stream(request):
+    if not afinance_chat_stream:
         return StreamingHttpResponse("AI disabled.", content_type="text/plain")
 
     try:
@@ -306,9 +363,9 @@ def chat_stream(request):
     except Exception:
         message = ""
 
-    def event_stream():
+    async def event_stream():
         try:
-            for token in finance_chat_stream(request.user, message):
+            async for token in afinance_chat_stream(request.user, message):
                 yield token
         except Exception as e:
             print("CHAT STREAM ERROR:", e)
@@ -323,6 +380,9 @@ def chat_stream(request):
 @staff_member_required
 def admin_dashboard(request):
     try:
+        # Count this worker's buffered last-seen times too
+        if flush_last_seen:
+            flush_last_seen()
         online_users = (
             UserActivity.objects.filter(
                 last_seen__gte=now() - timedelta(minutes=5)
@@ -333,40 +393,58 @@ def admin_dashboard(request):
     except Exception:
         online_users = 0
 
-    total_income = (
-        Transaction.objects.filter(transaction_type="INCOME")
-        .aggregate(total=Sum("amount"))["total"]
-        or 0
-    )
-
-    total_expense = (
-        Transaction.objects.filter(transaction_type="EXPENSE")
-        .aggregate(total=Sum("amount"))["total"]
-        or 0
-    )
-
+    # Precomputed by `manage.py refresh_platform_stats`: no ledger scans here
     return render(
         request,
         "admin_dashboard.html",
         {
-            "total_users": User.objects.count(),
+            "totals": platform_totals(),
             "online_users": online_users,
-            "total_income": total_income,
-            "total_expense": total_expense,
-            "total_transactions": Transaction.objects.count(),
+            "daily_stats": platform_series(PlatformStat.DAY, 30),
+            "monthly_stats": platform_series(PlatformStat.MONTH, 12),
         },
     )
 
 
 @staff_member_required
 def admin_users(request):
+    users, sort, query = user_page(request.GET)
     return render(
         request,
         "admin_users.html",
-        {"users": User.objects.all().order_by("-date_joined")},
+        {
+            "users": users,
+            "sort": sort,
+            "query": query,
+            "filter_query": listing_querystring(query, sort),
+            "search_query": listing_querystring(query, None),
+        },
     )
 
 
+BULK_USER_ACTIONS = {"ban", "unban", "delete"}
+
+
+@staff_member_required
+@require_POST
+def bulk_users(request):
+    """Ban, unban or delete the selected users (never superusers or yourself)."""
+    action = request.POST.get("action")
+    selected = [pk for pk in request.POST.getlist("user_ids") if pk.isdigit()]
+
+    if action in BULK_USER_ACTIONS and selected:
+        users = User.objects.filter(pk__in=selected, is_superuser=False).exclude(pk=request.user.pk)
+        if action == "delete":
+            users.delete()
+        else:
+            users.update(is_active=action == "unban")
+
+    next_url = request.POST.get("next", "")
+    if not url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+        next_url = reverse("transactions:admin_users")
+    return redirect(next_url)
+
+
 @staff_member_required
 def ban_user(request, user_id):
     user = get_object_or_404(User, id=user_id)
@@ -398,48 +476,36 @@ def delete_user(request, user_id):
 def offline(request):
     return render(request, "offline.html")
 
-import matplotlib
-matplotlib.use("Agg")  # REQUIRED for servers (no GUI)
-
-import matplotlib.pyplot as plt
-from django.http import HttpResponse
-#from django.contrib.auth.decorators import login_required
-from datetime import date
+# =========================================================
+# EXPENSE CATEGORY CHART
+# =========================================================
+CHART_CACHE_TIMEOUT = 60 * 60 * 24
 
-from insights.services import category_breakdown
+metrics.describe("chart_cache_hits_total", "Category chart PNGs served from cache")
+metrics.describe("chart_cache_misses_total", "Category chart PNGs rendered")
 
 
 @login_required
+@user_data_condition("chart")
 def expense_category_chart(request):
     """
-    Generates a bar chart of expenses by category for the current month
-    and returns it as a PNG image response.
+    Bar chart of this month's expenses by category, as PNG. Renders are
+    cached per (user, month, data version) and revalidated with ETags.
     """
+    key = f"chart:{data_etag(request, 'category')}"
+    png = cache.get(key)
+    metrics.inc("chart_cache_hits_total" if png is not None else "chart_cache_misses_total")
 
-    today = date.today()
-
-    # Get expense breakdown for the logged-in user
-    df = category_breakdown(request.user, today.month, today.year)
+    if png is None:
+        today = date.today()
+        rows = list(category_breakdown(request.user, today.month, today.year))
+        png = render_category_chart(rows) if rows else b""
+        cache.set(key, png, CHART_CACHE_TIMEOUT)
 
-    if df.empty:
+    if not png:
         return HttpResponse("No data available", status=204)
 
-    # Create the chart
-    plt.figure(figsize=(6, 4))
-    plt.bar(df["category"], df["total"], color="#6F4FF2")
-    plt.title("Expense by Category (₹)")
-    plt.xlabel("Category")
-    plt.ylabel("Amount (₹)")
-    plt.xticks(rotation=30, ha="right")
-    plt.tight_layout()
-
-    # Return chart as PNG
-    response = HttpResponse(content_type="image/png")
-    plt.savefig(response, format="png", dpi=120)
-    plt.close()
-
-    return response
-    #return render(request, "expense_category_chart.html")
+    return HttpResponse(png, content_type="image/png")
 
 """from django.shortcuts import render
 from django.contrib.auth.decorators import login_required